@@ -8,6 +8,7 @@ from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_mail import Mail
 from flask_caching import Cache
+from sqlalchemy import event
 from config import config
 
 # 🔧 扩展实例化 (延迟初始化模式)
@@ -18,6 +19,25 @@ mail = Mail()
 cache = Cache()
 
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """🗄️ SQLite连接参数：WAL日志 + NORMAL同步，减少每次提交的fsync"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.close()
+
+
+def register_sqlite_pragmas(app):
+    """🗄️ 按配置为当前应用的SQLite引擎启用快速连接参数（SQLITE_FAST_PRAGMAS）"""
+    if not app.config.get('SQLITE_FAST_PRAGMAS'):
+        return
+    
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _set_sqlite_pragmas)
+
+
 def create_app(config_name='default'):
     """
     🏗️ Flask应用工厂函数
@@ -36,6 +56,7 @@ def create_app(config_name='default'):
     
     # 🔧 初始化扩展
     db.init_app(app)
+    register_sqlite_pragmas(app)
     migrate.init_app(app, db)
     mail.init_app(app)
     cache.init_app(app)
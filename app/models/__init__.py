@@ -8,7 +8,9 @@ from .tag import Tag
 from .inquiry import ProjectInquiry, InquiryResponse
 from .customer import Customer, CustomerInteraction, BusinessOpportunity
 from .user import User
+from .search_index import ContentTerm, TermDocumentFrequency, ContentRelated
 
 # 导出所有模型
 __all__ = ['Content', 'Project', 'Tag', 'ProjectInquiry', 'InquiryResponse', 
-           'Customer', 'CustomerInteraction', 'BusinessOpportunity', 'User']
\ No newline at end of file
+           'Customer', 'CustomerInteraction', 'BusinessOpportunity', 'User',
+           'ContentTerm', 'TermDocumentFrequency', 'ContentRelated']
\ No newline at end of file
@@ -3,10 +3,12 @@
 📊 data-scientist 设计的统一内容模型
 支持：技术博客、行业观察、生活分享、创意作品、代码片段
 """
+import threading
 from datetime import datetime
 from flask import url_for, current_app
 from app import db
-from sqlalchemy import or_
+from sqlalchemy import DDL, event, inspect, or_
+from sqlalchemy.orm import deferred
 
 # 内容-标签多对多关联表
 content_tags = db.Table('content_tags',
@@ -14,6 +16,39 @@ content_tags = db.Table('content_tags',
     db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True)
 )
 
+# Markdown渲染器：每个线程复用一个实例（Markdown对象非线程安全），避免每次渲染重新加载扩展
+_markdown_local = threading.local()
+
+
+def _get_markdown():
+    """获取当前线程的Markdown渲染器（已重置状态）"""
+    md = getattr(_markdown_local, 'md', None)
+    if md is None:
+        import markdown
+        
+        # Markdown扩展配置
+        extensions = [
+            'codehilite',  # 代码高亮
+            'toc',  # 目录生成
+            'tables',  # 表格支持
+            'fenced_code',  # 围栏代码块
+            'nl2br',  # 换行转换
+        ]
+        
+        extension_configs = {
+            'codehilite': {
+                'css_class': 'highlight',
+                'use_pygments': True,
+                'pygments_style': 'default'
+            },
+            'toc': {
+                'anchorlink': True
+            }
+        }
+        
+        md = _markdown_local.md = markdown.Markdown(extensions=extensions, extension_configs=extension_configs)
+    return md.reset()
+
 
 class Content(db.Model):
     """
@@ -38,6 +73,12 @@ class Content(db.Model):
     content_html = db.Column(db.Text)  # 渲染后的HTML
     summary = db.Column(db.Text)  # 摘要/简介
     
+    # 🔍 搜索用小写副本 (保存时自动同步，搜索评分无需每次查询都转换大小写)
+    title_lc = db.Column(db.String(200))
+    summary_lc = db.Column(db.Text)
+    content_lc = deferred(db.Column(db.Text))  # 正文较大，默认不加载
+    extracted_keywords = db.Column(db.JSON)  # 自动提取的关键词 [[词, 权重], ...]，用于相关推荐
+    
     # 📂 分类字段
     category = db.Column(db.String(50), nullable=False, index=True)
     # 类别: '技术', '观察', '生活', '创作', '代码'
@@ -111,8 +152,7 @@ class Content(db.Model):
         """生成URL友好的slug"""
         if not self.slug or force_regenerate:
             try:
-                from app.utils.slug_generator import SlugGenerator
-                generator = SlugGenerator()
+                from app.utils.slug_generator import slug_generator as generator
                 
                 # 生成基础slug
                 base_slug = generator.generate_slug(
@@ -165,31 +205,7 @@ class Content(db.Model):
             self.content_html = ''
             return
         
-        import markdown
-        from markdown.extensions import codehilite, toc, tables
-        
-        # Markdown扩展配置
-        extensions = [
-            'codehilite',  # 代码高亮
-            'toc',  # 目录生成
-            'tables',  # 表格支持
-            'fenced_code',  # 围栏代码块
-            'nl2br',  # 换行转换
-        ]
-        
-        extension_configs = {
-            'codehilite': {
-                'css_class': 'highlight',
-                'use_pygments': True,
-                'pygments_style': 'default'
-            },
-            'toc': {
-                'anchorlink': True
-            }
-        }
-        
-        md = markdown.Markdown(extensions=extensions, extension_configs=extension_configs)
-        self.content_html = md.convert(self.content)
+        self.content_html = _get_markdown().convert(self.content)
         
         # 生成摘要 (如果没有手动设置)
         if not self.summary:
@@ -240,8 +256,7 @@ class Content(db.Model):
     def calculate_seo_score(self):
         """计算SEO评分"""
         try:
-            from app.utils.seo_analyzer import SEOAnalyzer
-            analyzer = SEOAnalyzer()
+            from app.utils.seo_analyzer import seo_analyzer as analyzer
             
             # 构建内容URL
             content_url = self.get_url() if hasattr(self, 'get_url') else ''
@@ -400,24 +415,36 @@ class Content(db.Model):
             return self.summary
         return self.generate_summary(length or 150)
     
-    def update_tags(self, tag_names):
-        """更新内容标签"""
+    def update_tags(self, tag_names, tags_by_name=None):
+        """更新内容标签（tags_by_name 为可选的 标签名→标签 字典，批量处理多篇内容时共用以免重复查询）"""
         from app.models.tag import Tag
         
+        tag_names = [tag_name.strip() for tag_name in tag_names]
+        if tags_by_name is None:
+            tags_by_name = {}
+        
         # 清除现有标签
         self.tags.clear()
         
+        # 一次查询取回尚未缓存的已有标签
+        missing_names = [tag_name for tag_name in tag_names if tag_name not in tags_by_name]
+        if missing_names:
+            tags_by_name.update(
+                (tag.name, tag) for tag in Tag.query.filter(Tag.name.in_(missing_names)).all()
+            )
+        
         # 添加新标签
         for tag_name in tag_names:
-            tag = Tag.query.filter_by(name=tag_name.strip()).first()
+            tag = tags_by_name.get(tag_name)
             if not tag:
                 # 创建新标签
                 tag = Tag(
-                    name=tag_name.strip(),
+                    name=tag_name,
                     category=self.get_tag_category(),
                     color=self.get_tag_color()
                 )
                 db.session.add(tag)
+                tags_by_name[tag_name] = tag
             
             # 增加标签使用次数
             tag.usage_count = (tag.usage_count or 0) + 1
@@ -448,8 +475,7 @@ class Content(db.Model):
     def get_full_seo_analysis(self):
         """获取完整SEO分析"""
         try:
-            from app.utils.seo_analyzer import SEOAnalyzer
-            analyzer = SEOAnalyzer()
+            from app.utils.seo_analyzer import seo_analyzer as analyzer
             
             content_url = self.get_url() if hasattr(self, 'get_url') else ''
             
@@ -478,8 +504,7 @@ class Content(db.Model):
             return ""
         
         try:
-            from app.utils.seo_analyzer import SEOAnalyzer
-            analyzer = SEOAnalyzer()
+            from app.utils.seo_analyzer import seo_analyzer as analyzer
             
             # 使用SEO分析器的摘要生成功能
             summary = analyzer._extract_words(self.content)
@@ -509,11 +534,41 @@ class Content(db.Model):
         # 降级处理
         return self.generate_summary(length)
     
+    def sync_lowercase_fields(self):
+        """同步标题、摘要、正文的小写副本（保存时自动调用，旧数据由重建索引回填）"""
+        for field, lowercase_field in _LOWERCASE_FIELDS:
+            value = getattr(self, field)
+            setattr(self, lowercase_field, value.lower() if value else value)
+    
+    def extract_keywords(self, top_k=20):
+        """
+        使用jieba提取内容关键词（TF-IDF）
+        
+        Returns:
+            list: [[词, 权重], ...]；jieba不可用时返回None
+        """
+        try:
+            import jieba.analyse
+        except ImportError:
+            return None
+        
+        full_text = f"{self.title or ''} {self.summary or ''} {self.content or ''}"
+        return [
+            [word, round(weight, 4)]
+            for word, weight in jieba.analyse.extract_tags(full_text, topK=top_k, withWeight=True)
+        ]
+    
+    def get_extracted_keywords(self, limit=None):
+        """获取保存时提取的关键词（旧数据未提取时现场提取）"""
+        keywords = self.extracted_keywords
+        if keywords is None:
+            keywords = self.extract_keywords() or []
+        return keywords[:limit] if limit else keywords
+    
     def generate_seo_keywords(self, max_keywords=10):
         """生成SEO关键词"""
         try:
-            from app.utils.seo_analyzer import SEOAnalyzer
-            analyzer = SEOAnalyzer()
+            from app.utils.seo_analyzer import seo_analyzer as analyzer
             
             # 分析关键词
             full_text = f"{self.title} {self.content}"
@@ -546,8 +601,7 @@ class Content(db.Model):
     def get_slug_variations(self):
         """获取slug变体建议"""
         try:
-            from app.utils.slug_generator import SlugGenerator
-            generator = SlugGenerator()
+            from app.utils.slug_generator import slug_generator as generator
             
             return generator.suggest_slug_variations(self.title)
             
@@ -557,8 +611,7 @@ class Content(db.Model):
     def analyze_slug_quality(self):
         """分析slug质量"""
         try:
-            from app.utils.slug_generator import SlugGenerator
-            generator = SlugGenerator()
+            from app.utils.slug_generator import slug_generator as generator
             
             if self.slug:
                 return generator.analyze_slug_seo(self.slug)
@@ -579,8 +632,7 @@ class Content(db.Model):
     def get_sitemap_entry(self):
         """生成站点地图条目"""
         try:
-            from app.utils.seo_analyzer import SEOAnalyzer
-            analyzer = SEOAnalyzer()
+            from app.utils.seo_analyzer import seo_analyzer as analyzer
             
             # 根据内容类型设置更新频率和优先级
             changefreq_mapping = {
@@ -753,4 +805,44 @@ class Content(db.Model):
             func.count(cls.id).label('count')
         ).filter_by(is_published=True).group_by(cls.category).all()
         
-        return {stat.category: stat.count for stat in stats}
\ No newline at end of file
+        return {stat.category: stat.count for stat in stats}
+
+
+# 📇 复合索引：已发布内容按分类/时间、按浏览量排序的常用查询可直接走索引范围扫描
+db.Index('ix_content_pub_cat_created', Content.is_published, Content.category, Content.created_at.desc())
+db.Index('ix_content_pub_views', Content.is_published, Content.view_count.desc())
+
+# 🔎 标题三元组索引（仅PostgreSQL）：搜索建议的 ILIKE '%词%' 查询可走 pg_trgm GIN 索引，无需全表扫描
+event.listen(db.metadata, 'before_create', DDL(
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm'
+).execute_if(dialect='postgresql'))
+event.listen(Content.__table__, 'after_create', DDL(
+    'CREATE INDEX IF NOT EXISTS ix_content_title_trgm ON content USING gin (title gin_trgm_ops)'
+).execute_if(dialect='postgresql'))
+
+
+# 需要保存小写副本的字段
+_LOWERCASE_FIELDS = (('title', 'title_lc'), ('summary', 'summary_lc'), ('content', 'content_lc'))
+
+
+@event.listens_for(Content, 'before_insert')
+def _prepare_new_content(mapper, connection, target):
+    """新建内容时生成小写副本并提取关键词"""
+    target.sync_lowercase_fields()
+    
+    target.extracted_keywords = target.extract_keywords()
+
+
+@event.listens_for(Content, 'before_update')
+def _prepare_updated_content(mapper, connection, target):
+    """文本字段变化时同步小写副本和关键词（浏览量等字段更新不会触发）"""
+    state = inspect(target)
+    changed = False
+    for field, lowercase_field in _LOWERCASE_FIELDS:
+        if state.attrs[field].history.has_changes():
+            value = getattr(target, field)
+            setattr(target, lowercase_field, value.lower() if value else value)
+            changed = True
+    
+    if changed:
+        target.extracted_keywords = target.extract_keywords()
@@ -0,0 +1,61 @@
+"""
+🔍 搜索索引模型 - 内容词项倒排索引、相关内容推荐结果
+📊 data-scientist 设计的相关性评分数据结构
+数据库不支持SQLite FTS5时，全文搜索的相关性评分基于此索引在数据库内聚合完成
+"""
+from app import db
+
+
+class ContentTerm(db.Model):
+    """
+    🔍 内容词项 - 每篇内容每个字段中各词项的出现次数
+
+    发布或编辑内容时增量更新，查询时无需再对正文分词和逐字扫描
+    """
+    __tablename__ = 'content_term'
+
+    # 🆔 复合主键: 内容 + 词项 + 字段
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), primary_key=True)
+    term = db.Column(db.String(100), primary_key=True, index=True)
+    field = db.Column(db.String(20), primary_key=True)  # 'title', 'summary', 'content', 'tags'
+
+    # 📊 统计字段
+    tf = db.Column(db.Integer, nullable=False, default=0)  # 词频
+    doc_len = db.Column(db.Integer, nullable=False, default=0)  # 内容总词数
+
+    def __repr__(self):
+        return f'<ContentTerm {self.content_id}:{self.field}:{self.term}>'
+
+
+class TermDocumentFrequency(db.Model):
+    """
+    📈 词项文档频率 - 包含该词项的内容数量，用于计算IDF
+    """
+    __tablename__ = 'term_df'
+
+    term = db.Column(db.String(100), primary_key=True)
+    df = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TermDocumentFrequency {self.term}: {self.df}>'
+
+
+class ContentRelated(db.Model):
+    """
+    🔗 相关内容 - 每篇内容的混合推荐结果（按排名保存）
+
+    首次请求时计算并写入，内容发布状态、分类、标签或文本变化时清除受影响内容的结果，
+    之后的请求只需一次按主键范围的查询
+    """
+    __tablename__ = 'content_related'
+
+    # 🆔 复合主键: 内容 + 排名
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+
+    # 🔗 推荐结果
+    related_id = db.Column(db.Integer, db.ForeignKey('content.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ContentRelated {self.content_id}#{self.rank}: {self.related_id}>'
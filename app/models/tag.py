@@ -4,7 +4,7 @@
 """
 from datetime import datetime
 from app import db
-from sqlalchemy import func
+from sqlalchemy import DDL, event, func
 
 
 class Tag(db.Model):
@@ -258,4 +258,10 @@ class Tag(db.Model):
             if tag:
                 tag.usage_count = stat.count
         
-        db.session.commit()
\ No newline at end of file
+        db.session.commit()
+
+
+# 🔎 标签名三元组索引（仅PostgreSQL，pg_trgm 扩展在 content 模型中创建）：供搜索建议的 ILIKE 查询使用
+event.listen(Tag.__table__, 'after_create', DDL(
+    'CREATE INDEX IF NOT EXISTS ix_tag_name_trgm ON tag USING gin (name gin_trgm_ops)'
+).execute_if(dialect='postgresql'))
@@ -51,9 +51,9 @@ def submit_inquiry():
             try:
                 from app.utils.email_utils import send_inquiry_notification, send_inquiry_confirmation
                 # 发送管理员通知邮件
-                send_inquiry_notification(inquiry)
+                send_inquiry_notification(inquiry, background=True)
                 # 发送客户确认邮件
-                send_inquiry_confirmation(inquiry)
+                send_inquiry_confirmation(inquiry, background=True)
             except Exception as e:
                 current_app.logger.error(f'邮件发送失败: {str(e)}')
             
@@ -341,7 +341,7 @@ def newsletter_subscribe():
                 'title': '欢迎订阅！',
                 'content': '<h2>感谢您的订阅！</h2><p>您已成功订阅我们的技术分享和项目更新。我们将定期为您发送最新的技术文章、项目案例和行业洞察。</p><p>如果您有任何问题或建议，请随时联系我们。</p>'
             }
-            send_newsletter(email, newsletter_data)
+            send_newsletter(email, newsletter_data, background=True)
         except Exception as e:
             current_app.logger.error(f'欢迎邮件发送失败: {str(e)}')
         
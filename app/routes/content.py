@@ -129,7 +129,7 @@ def portfolio():
             from app.utils.github_service import get_github_stats, batch_get_github_stats, GitHubService, format_github_stats_for_display
             
             # 获取速率限制信息
-            github_service = GitHubService()
+            github_service = GitHubService.get_default()
             github_rate_limit = github_service.get_rate_limit_info()
             
             # 收集所有项目的GitHub URL
@@ -12,7 +12,7 @@ from .content_utils import (
 from .email_utils import (
     EmailSender, EmailTemplates,
     send_inquiry_notification, send_inquiry_confirmation, 
-    send_inquiry_response, send_newsletter
+    send_inquiry_response, send_newsletter, send_newsletter_bulk
 )
 
 __all__ = [
@@ -25,5 +25,5 @@ __all__ = [
     # 邮件工具
     'EmailSender', 'EmailTemplates',
     'send_inquiry_notification', 'send_inquiry_confirmation',
-    'send_inquiry_response', 'send_newsletter'
+    'send_inquiry_response', 'send_newsletter', 'send_newsletter_bulk'
 ]
\ No newline at end of file
@@ -3,16 +3,113 @@
 🔷 backend-architect 设计的邮件系统工具函数
 """
 import os
+import base64
+import mimetypes
 import smtplib
+from functools import lru_cache
 from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
-from email import encoders
 from email.utils import formataddr
-from flask import current_app, render_template_string
+from html.parser import HTMLParser
+from urllib.parse import quote
+from flask import current_app
 from jinja2 import Template
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+
+# 后台发送邮件的线程池：SMTP 发送不再阻塞触发它的请求
+_email_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='email-sender')
+
+
+def _get_mail_config():
+    """
+    读取邮件配置
+    每个应用只从 config 读取一次，结果缓存在 app.extensions 中
+    
+    Returns:
+        dict: EmailSender 所需的配置项
+    """
+    app = current_app._get_current_object()
+    mail_config = app.extensions.get('email_sender')
+    if mail_config is None:
+        config = app.config
+        username = config.get('MAIL_USERNAME', '')
+        mail_config = app.extensions['email_sender'] = {
+            'smtp_server': config.get('MAIL_SERVER', 'smtp.gmail.com'),
+            'smtp_port': config.get('MAIL_PORT', 587),
+            'username': username,
+            'password': config.get('MAIL_PASSWORD', ''),
+            'use_tls': config.get('MAIL_USE_TLS', True),
+            'use_ssl': config.get('MAIL_USE_SSL', False),
+            'sender_name': config.get('MAIL_SENDER_NAME', '个人门户'),
+            'sender_email': config.get('MAIL_SENDER_EMAIL', username),
+        }
+    return mail_config
+
+
+@lru_cache(maxsize=64)
+def _guess_attachment_type(ext):
+    """按扩展名推断附件的 MIME 类型（按扩展名缓存）"""
+    mime_type = mimetypes.types_map.get(ext.lower(), 'application/octet-stream')
+    return tuple(mime_type.split('/', 1))
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """从渲染后的HTML邮件中提取纯文本，用作邮件的文本备选内容"""
+    
+    SKIP_TAGS = frozenset(('head', 'style', 'script'))
+    BLOCK_TAGS = frozenset((
+        'p', 'br', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+        'ul', 'ol', 'li', 'table', 'tr'
+    ))
+    CELL_TAGS = frozenset(('th', 'td'))
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts = []
+        self._skip_depth = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append('\n')
+        elif tag in self.CELL_TAGS:
+            self._parts.append(' ')
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append('\n')
+    
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(data)
+    
+    def get_text(self):
+        """合并文本并压缩多余空白"""
+        lines = (' '.join(line.split()) for line in ''.join(self._parts).splitlines())
+        return '\n'.join(line for line in lines if line)
+
+
+def html_to_text(html):
+    """
+    将HTML邮件内容转换为纯文本
+    
+    Args:
+        html: HTML字符串
+    
+    Returns:
+        str: 纯文本内容
+    """
+    parser = _HTMLTextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.get_text()
 
 
 class EmailSender:
@@ -23,14 +120,15 @@ class EmailSender:
     
     def __init__(self):
         """初始化邮件配置"""
-        self.smtp_server = current_app.config.get('MAIL_SERVER', 'smtp.gmail.com')
-        self.smtp_port = current_app.config.get('MAIL_PORT', 587)
-        self.username = current_app.config.get('MAIL_USERNAME', '')
-        self.password = current_app.config.get('MAIL_PASSWORD', '')
-        self.use_tls = current_app.config.get('MAIL_USE_TLS', True)
-        self.use_ssl = current_app.config.get('MAIL_USE_SSL', False)
-        self.sender_name = current_app.config.get('MAIL_SENDER_NAME', '个人门户')
-        self.sender_email = current_app.config.get('MAIL_SENDER_EMAIL', self.username)
+        mail_config = _get_mail_config()
+        self.smtp_server = mail_config['smtp_server']
+        self.smtp_port = mail_config['smtp_port']
+        self.username = mail_config['username']
+        self.password = mail_config['password']
+        self.use_tls = mail_config['use_tls']
+        self.use_ssl = mail_config['use_ssl']
+        self.sender_name = mail_config['sender_name']
+        self.sender_email = mail_config['sender_email']
         
     def send_email(self, to_email, subject, body, html_body=None, attachments=None, cc=None, bcc=None):
         """
@@ -49,60 +147,12 @@ class EmailSender:
             tuple: (success, message)
         """
         try:
-            # 创建邮件对象
-            msg = MIMEMultipart('alternative')
-            msg['From'] = formataddr((self.sender_name, self.sender_email))
-            
-            # 处理收件人
-            if isinstance(to_email, str):
-                msg['To'] = to_email
-                recipients = [to_email]
-            else:
-                msg['To'] = ', '.join(to_email)
-                recipients = to_email
-            
-            # 处理抄送
-            if cc:
-                if isinstance(cc, str):
-                    msg['Cc'] = cc
-                    recipients.extend([cc])
-                else:
-                    msg['Cc'] = ', '.join(cc)
-                    recipients.extend(cc)
-            
-            # 密抄不在邮件头中显示
-            if bcc:
-                if isinstance(bcc, str):
-                    recipients.extend([bcc])
-                else:
-                    recipients.extend(bcc)
-            
-            msg['Subject'] = subject
-            msg['Date'] = formataddr((datetime.now().strftime('%a, %d %b %Y %H:%M:%S %z'), ''))
-            
-            # 添加文本内容
-            text_part = MIMEText(body, 'plain', 'utf-8')
-            msg.attach(text_part)
-            
-            # 添加HTML内容
-            if html_body:
-                html_part = MIMEText(html_body, 'html', 'utf-8')
-                msg.attach(html_part)
-            
-            # 添加附件
-            if attachments:
-                for attachment in attachments:
-                    self._add_attachment(msg, attachment)
+            msg, recipients = self._build_message(
+                to_email, subject, body, html_body, attachments, cc, bcc
+            )
             
             # 连接SMTP服务器并发送
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            
-            if self.use_tls:
-                server.starttls()
-            elif self.use_ssl:
-                server = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port)
-            
-            server.login(self.username, self.password)
+            server = self._connect()
             server.send_message(msg, to_addrs=recipients)
             server.quit()
             
@@ -114,6 +164,150 @@ class EmailSender:
             logging.error(error_msg)
             return False, error_msg
     
+    def send_email_async(self, *args, **kwargs):
+        """
+        在后台线程中发送邮件，立即返回不阻塞当前请求
+        参数与 send_email 相同，发送结果记录在日志中
+        
+        Returns:
+            tuple: (success, message)，success 表示已加入发送队列
+        """
+        _email_executor.submit(self.send_email, *args, **kwargs)
+        return True, "邮件已加入发送队列"
+    
+    def send_bulk(self, messages, max_connections=4):
+        """
+        批量发送邮件
+        每个SMTP连接持久复用、顺序发送一批邮件，多个连接并发以重叠网络I/O
+        
+        Args:
+            messages: 邮件参数字典列表（键与 send_email 的参数一致）
+            max_connections: 最大并发SMTP连接数
+            
+        Returns:
+            tuple: (成功数量, 失败列表[(收件人, 错误信息)])
+        """
+        messages = list(messages)
+        if not messages:
+            return 0, []
+        
+        connections = max(1, min(max_connections, len(messages)))
+        batches = [messages[i::connections] for i in range(connections)]
+        
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            results = list(executor.map(self._send_batch, batches))
+        
+        sent = sum(batch_sent for batch_sent, _ in results)
+        failed = [failure for _, batch_failed in results for failure in batch_failed]
+        
+        logging.info(f"批量邮件发送完成: 成功 {sent} 封，失败 {len(failed)} 封")
+        return sent, failed
+    
+    def _send_batch(self, messages):
+        """
+        在同一个SMTP连接上顺序发送一批邮件
+        
+        Returns:
+            tuple: (成功数量, 失败列表[(收件人, 错误信息)])
+        """
+        sent = 0
+        failed = []
+        server = None
+        index = 0
+        
+        try:
+            server = self._connect()
+            for index, kwargs in enumerate(messages):
+                try:
+                    msg, recipients = self._build_message(**kwargs)
+                    server.send_message(msg, to_addrs=recipients)
+                    sent += 1
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                        smtplib.SMTPDataError) as e:
+                    # 单封邮件被拒时 smtplib 已发送 RSET，连接可继续复用
+                    failed.append((kwargs['to_email'], str(e)))
+                    logging.error(f"邮件发送失败: {kwargs['to_email']} - {str(e)}")
+            index = len(messages)
+        except Exception as e:
+            # 连接失败或中断：本批剩余邮件全部记为失败
+            failed.extend((kwargs['to_email'], str(e)) for kwargs in messages[index:])
+            logging.error(f"批量邮件发送中断: {str(e)}")
+        finally:
+            if server is not None:
+                try:
+                    server.quit()
+                except Exception:
+                    pass
+        
+        return sent, failed
+    
+    def _build_message(self, to_email, subject, body, html_body=None, attachments=None, cc=None, bcc=None):
+        """
+        构建邮件对象
+        
+        Returns:
+            tuple: (邮件对象, 实际收件人列表)
+        """
+        # 创建邮件对象
+        msg = MIMEMultipart('alternative')
+        msg['From'] = formataddr((self.sender_name, self.sender_email))
+        
+        # 处理收件人
+        if isinstance(to_email, str):
+            msg['To'] = to_email
+            recipients = [to_email]
+        else:
+            msg['To'] = ', '.join(to_email)
+            recipients = list(to_email)
+        
+        # 处理抄送
+        if cc:
+            if isinstance(cc, str):
+                msg['Cc'] = cc
+                recipients.extend([cc])
+            else:
+                msg['Cc'] = ', '.join(cc)
+                recipients.extend(cc)
+        
+        # 密抄不在邮件头中显示
+        if bcc:
+            if isinstance(bcc, str):
+                recipients.extend([bcc])
+            else:
+                recipients.extend(bcc)
+        
+        msg['Subject'] = subject
+        msg['Date'] = formataddr((datetime.now().strftime('%a, %d %b %Y %H:%M:%S %z'), ''))
+        
+        # 添加文本内容
+        text_part = MIMEText(body, 'plain', 'utf-8')
+        msg.attach(text_part)
+        
+        # 添加HTML内容
+        if html_body:
+            html_part = MIMEText(html_body, 'html', 'utf-8')
+            msg.attach(html_part)
+        
+        # 添加附件
+        if attachments:
+            for attachment in attachments:
+                self._add_attachment(msg, attachment)
+        
+        return msg, recipients
+    
+    def _connect(self):
+        """建立并登录SMTP连接"""
+        if self.use_tls:
+            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+            server.starttls()
+        elif self.use_ssl:
+            server = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port)
+        else:
+            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        
+        server.login(self.username, self.password)
+        return server
+    
     def _add_attachment(self, msg, attachment):
         """
         添加附件到邮件
@@ -129,11 +323,14 @@ class EmailSender:
                 file_path = attachment
                 filename = os.path.basename(file_path)
             
+            # 一次性编码为 base64（每76字符换行），避免 encoders.encode_base64 再遍历一遍载荷
             with open(file_path, "rb") as f:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(f.read())
+                encoded = base64.encodebytes(f.read()).decode('ascii')
             
-            encoders.encode_base64(part)
+            maintype, subtype = _guess_attachment_type(os.path.splitext(filename)[1])
+            part = MIMEBase(maintype, subtype)
+            part.set_payload(encoded)
+            part['Content-Transfer-Encoding'] = 'base64'
             part.add_header(
                 'Content-Disposition',
                 f'attachment; filename= {filename}'
@@ -405,9 +602,13 @@ class EmailTemplates:
         return template
 
 
+# 批量发送时退订链接中邮箱的占位符
+UNSUBSCRIBE_EMAIL_MARKER = '__UNSUBSCRIBE_EMAIL__'
+
+
 # 便捷的邮件发送函数
-def send_inquiry_notification(inquiry):
-    """发送新咨询通知给管理员"""
+def send_inquiry_notification(inquiry, background=False):
+    """发送新咨询通知给管理员（background=True 时在后台线程发送）"""
     try:
         sender = EmailSender()
         template = Template(EmailTemplates.get_inquiry_notification_template())
@@ -415,14 +616,15 @@ def send_inquiry_notification(inquiry):
         # 获取管理员邮箱
         admin_email = current_app.config.get('ADMIN_EMAIL', sender.username)
         
-        # 渲染模板
+        # 渲染模板，文本备选内容直接从HTML中提取
         html_body = template.render(inquiry=inquiry)
+        text_body = html_to_text(html_body)
         
         # 发送邮件
         subject = f"🆕 新的项目咨询：{inquiry.subject}"
-        text_body = f"收到来自 {inquiry.client_name} ({inquiry.client_email}) 的项目咨询\n\n咨询类型：{inquiry.inquiry_type}\n主题：{inquiry.subject}\n\n详细内容：\n{inquiry.description}"
         
-        return sender.send_email(
+        send = sender.send_email_async if background else sender.send_email
+        return send(
             to_email=admin_email,
             subject=subject,
             body=text_body,
@@ -434,20 +636,21 @@ def send_inquiry_notification(inquiry):
         return False, str(e)
 
 
-def send_inquiry_confirmation(inquiry):
-    """发送咨询确认邮件给客户"""
+def send_inquiry_confirmation(inquiry, background=False):
+    """发送咨询确认邮件给客户（background=True 时在后台线程发送）"""
     try:
         sender = EmailSender()
         template = Template(EmailTemplates.get_inquiry_confirmation_template())
         
-        # 渲染模板
+        # 渲染模板，文本备选内容直接从HTML中提取
         html_body = template.render(inquiry=inquiry)
+        text_body = html_to_text(html_body)
         
         # 发送邮件
         subject = f"✅ 咨询确认：{inquiry.subject}"
-        text_body = f"尊敬的 {inquiry.client_name}，\n\n我们已收到您关于\"{inquiry.subject}\"的咨询，感谢您的信任！\n\n我们将在24-48小时内回复您的咨询。\n\n此致\n敬礼！"
         
-        return sender.send_email(
+        send = sender.send_email_async if background else sender.send_email
+        return send(
             to_email=inquiry.client_email,
             subject=subject,
             body=text_body,
@@ -459,20 +662,21 @@ def send_inquiry_confirmation(inquiry):
         return False, str(e)
 
 
-def send_inquiry_response(inquiry, response):
-    """发送咨询回复邮件给客户"""
+def send_inquiry_response(inquiry, response, background=False):
+    """发送咨询回复邮件给客户（background=True 时在后台线程发送）"""
     try:
         sender = EmailSender()
         template = Template(EmailTemplates.get_inquiry_response_template())
         
-        # 渲染模板
+        # 渲染模板，文本备选内容直接从HTML中提取
         html_body = template.render(inquiry=inquiry, response=response)
+        text_body = html_to_text(html_body)
         
         # 发送邮件
         subject = f"📧 Re: {inquiry.subject}"
-        text_body = f"尊敬的 {inquiry.client_name}，\n\n关于您的咨询\"{inquiry.subject}\"，我们的回复如下：\n\n{response.response}\n\n如有问题请随时联系。\n\n此致\n敬礼！"
         
-        return sender.send_email(
+        send = sender.send_email_async if background else sender.send_email
+        return send(
             to_email=inquiry.client_email,
             subject=subject,
             body=text_body,
@@ -484,8 +688,8 @@ def send_inquiry_response(inquiry, response):
         return False, str(e)
 
 
-def send_newsletter(email, newsletter_data):
-    """发送邮件订阅内容"""
+def send_newsletter(email, newsletter_data, background=False):
+    """发送邮件订阅内容（background=True 时在后台线程发送）"""
     try:
         sender = EmailSender()
         template = Template(EmailTemplates.get_newsletter_template())
@@ -500,7 +704,8 @@ def send_newsletter(email, newsletter_data):
         subject = newsletter_data.get('title', '📚 技术周报')
         text_body = newsletter_data.get('text_content', '请查看HTML版本的邮件内容')
         
-        return sender.send_email(
+        send = sender.send_email_async if background else sender.send_email
+        return send(
             to_email=email,
             subject=subject,
             body=text_body,
@@ -509,4 +714,47 @@ def send_newsletter(email, newsletter_data):
         
     except Exception as e:
         logging.error(f"发送邮件订阅失败: {str(e)}")
-        return False, str(e)
\ No newline at end of file
+        return False, str(e)
+
+
+def send_newsletter_bulk(emails, newsletter_data, max_connections=4):
+    """
+    批量发送邮件订阅内容
+    
+    Args:
+        emails: 订阅者邮箱列表
+        newsletter_data: 订阅内容数据
+        max_connections: 最大并发SMTP连接数
+    
+    Returns:
+        tuple: (成功数量, 失败列表[(收件人, 错误信息)])
+    """
+    try:
+        sender = EmailSender()
+        template = Template(EmailTemplates.get_newsletter_template())
+        base_url = current_app.config.get('BASE_URL', '')
+        
+        subject = newsletter_data.get('title', '📚 技术周报')
+        text_body = newsletter_data.get('text_content', '请查看HTML版本的邮件内容')
+        
+        # 模板只渲染一次，每个收件人仅替换退订链接中的邮箱
+        common_html = template.render(
+            newsletter=newsletter_data,
+            unsubscribe_url=f"{base_url}/unsubscribe?email={UNSUBSCRIBE_EMAIL_MARKER}"
+        )
+        
+        messages = [
+            {
+                'to_email': email,
+                'subject': subject,
+                'body': text_body,
+                'html_body': common_html.replace(UNSUBSCRIBE_EMAIL_MARKER, quote(email))
+            }
+            for email in emails
+        ]
+        
+        return sender.send_bulk(messages, max_connections=max_connections)
+        
+    except Exception as e:
+        logging.error(f"批量发送邮件订阅失败: {str(e)}")
+        return 0, [(email, str(e)) for email in emails]
@@ -2,12 +2,29 @@
 🗂️ 文件处理工具模块
 处理文件上传、图片优化、文件验证等功能
 """
+import io
 import os
-import uuid
-from PIL import Image, ImageOps
+import secrets
 from werkzeug.utils import secure_filename
 from flask import current_app
-import mimetypes
+
+# Pillow 导入开销较大，仅在需要处理图片的函数内按需导入
+
+
+# 图片文件头部签名：按前4字节查表，JPEG 第4字节不固定单独按前3字节判断
+IMAGE_SIGNATURES = {
+    b'\x89PNG': 'PNG',
+    b'GIF8': 'GIF',
+    b'RIFF': 'WebP',  # WebP 文件以 RIFF 开头
+}
+JPEG_SIGNATURE = b'\xFF\xD8\xFF'
+
+# 允许上传的文件扩展名
+DEFAULT_ALLOWED_EXTENSIONS = frozenset(('png', 'jpg', 'jpeg', 'gif', 'webp', 'svg'))
+IMAGE_EXTENSIONS = frozenset(('png', 'jpg', 'jpeg', 'gif', 'webp'))
+
+# 尺寸达标且小于该大小的 JPEG 不再重新编码
+OPTIMIZED_JPEG_MAX_BYTES = 200 * 1024
 
 
 def allowed_file(filename, allowed_extensions=None):
@@ -16,16 +33,13 @@ def allowed_file(filename, allowed_extensions=None):
     
     Args:
         filename: 文件名
-        allowed_extensions: 允许的扩展名列表
+        allowed_extensions: 允许的扩展名集合
     
     Returns:
         bool: 是否允许的文件格式
     """
-    if not allowed_extensions:
-        allowed_extensions = ['png', 'jpg', 'jpeg', 'gif', 'webp', 'svg']
-    
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in allowed_extensions
+    _, sep, ext = filename.rpartition('.')
+    return bool(sep) and ext.lower() in (allowed_extensions or DEFAULT_ALLOWED_EXTENSIONS)
 
 
 def get_file_size(filepath):
@@ -62,7 +76,7 @@ def generate_unique_filename(original_filename):
     """
     filename = secure_filename(original_filename)
     name, ext = os.path.splitext(filename)
-    unique_id = uuid.uuid4().hex[:8]
+    unique_id = secrets.token_hex(4)
     return f"{name}_{unique_id}{ext}"
 
 
@@ -90,6 +104,106 @@ def save_upload_file(file, upload_folder, filename=None):
     return filepath
 
 
+def _is_already_optimized(img, file_size, max_width, max_height):
+    """判断图片是否已是尺寸和体积都达标的 JPEG（只读取文件头，不解码像素）"""
+    width, height = img.size
+    return (img.format == 'JPEG' and width <= max_width and height <= max_height
+            and file_size < OPTIMIZED_JPEG_MAX_BYTES)
+
+
+def _prepare_image(img, max_width, max_height):
+    """
+    将已打开的图片转换为RGB并缩小到限定尺寸内
+    
+    Args:
+        img: 已打开的 PIL 图片对象
+        max_width: 最大宽度
+        max_height: 最大高度
+    
+    Returns:
+        Image: 处理后的RGB图片
+    """
+    from PIL import Image
+    
+    # JPEG 在解码阶段直接按 1/2、1/4、1/8 缩放，避免全分辨率解码
+    if img.format == 'JPEG':
+        img.draft('RGB', (max_width * 2, max_height * 2))
+    
+    # 调色板图片仅在带透明色时才需要经过RGBA
+    if img.mode == 'P':
+        img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+    
+    # 带透明通道的图片直接以Alpha通道为蒙版贴到白色背景上
+    if img.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+    
+    # 保持长宽比缩小到限定尺寸内（使用高质量重采样）
+    img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+    
+    return img
+
+
+def _save_optimized(img, image_path, quality):
+    """
+    压缩保存图片，仅在结果更小时覆盖原文件
+    
+    Returns:
+        bool: 是否已覆盖原文件
+    """
+    # 先在内存中压缩，只有结果更小时才写回磁盘
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=quality, optimize=True)
+    data = buffer.getbuffer()
+    
+    if len(data) < os.path.getsize(image_path):
+        with open(image_path, 'wb') as f:
+            f.write(data)
+        return True
+    
+    return False
+
+
+def _save_thumbnail(img, image_path, size):
+    """
+    基于已解码的图片生成居中的固定尺寸缩略图
+    
+    Returns:
+        str: 缩略图路径
+    """
+    from PIL import Image
+    
+    name, ext = os.path.splitext(image_path)
+    thumbnail_path = f"{name}_thumb{ext}"
+    
+    # 转换为RGB模式
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    else:
+        img = img.copy()
+    
+    # 创建缩略图（保持长宽比）
+    img.thumbnail(size, Image.Resampling.LANCZOS)
+    
+    # 创建固定尺寸的画布
+    thumb = Image.new('RGB', size, (255, 255, 255))
+    
+    # 计算居中位置
+    x = (size[0] - img.size[0]) // 2
+    y = (size[1] - img.size[1]) // 2
+    
+    # 粘贴图片到画布中心
+    thumb.paste(img, (x, y))
+    
+    # 保存缩略图
+    thumb.save(thumbnail_path, 'JPEG', quality=80, optimize=True)
+    
+    return thumbnail_path
+
+
 def optimize_image(image_path, max_width=1200, max_height=800, quality=85):
     """
     优化图片：调整大小、压缩质量
@@ -103,49 +217,15 @@ def optimize_image(image_path, max_width=1200, max_height=800, quality=85):
     Returns:
         str: 优化后的图片路径
     """
+    from PIL import Image
+    
     try:
         with Image.open(image_path) as img:
-            # 转换为RGB模式（如果是RGBA）
-            if img.mode in ('RGBA', 'LA', 'P'):
-                # 创建白色背景
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # 获取原始尺寸
-            width, height = img.size
-            
-            # 计算新尺寸（保持长宽比）
-            if width > max_width or height > max_height:
-                # 计算缩放比例
-                width_ratio = max_width / width
-                height_ratio = max_height / height
-                ratio = min(width_ratio, height_ratio)
-                
-                new_width = int(width * ratio)
-                new_height = int(height * ratio)
-                
-                # 使用高质量重采样
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # 生成优化后的文件名
-            name, ext = os.path.splitext(image_path)
-            optimized_path = f"{name}_optimized{ext}"
-            
-            # 保存优化后的图片
-            img.save(optimized_path, 'JPEG', quality=quality, optimize=True)
-            
-            # 如果优化后的文件更小，删除原文件并重命名
-            if os.path.getsize(optimized_path) < os.path.getsize(image_path):
-                os.remove(image_path)
-                os.rename(optimized_path, image_path)
-            else:
-                os.remove(optimized_path)
+            if _is_already_optimized(img, os.path.getsize(image_path), max_width, max_height):
+                return image_path
             
+            img = _prepare_image(img, max_width, max_height)
+            _save_optimized(img, image_path, quality)
             return image_path
             
     except Exception as e:
@@ -164,38 +244,29 @@ def create_thumbnail(image_path, size=(300, 200)):
     Returns:
         str: 缩略图路径
     """
+    from PIL import Image
+    
     try:
-        name, ext = os.path.splitext(image_path)
-        thumbnail_path = f"{name}_thumb{ext}"
-        
         with Image.open(image_path) as img:
-            # 转换为RGB模式
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # 创建缩略图（保持长宽比）
-            img.thumbnail(size, Image.Resampling.LANCZOS)
-            
-            # 创建固定尺寸的画布
-            thumb = Image.new('RGB', size, (255, 255, 255))
-            
-            # 计算居中位置
-            x = (size[0] - img.size[0]) // 2
-            y = (size[1] - img.size[1]) // 2
-            
-            # 粘贴图片到画布中心
-            thumb.paste(img, (x, y))
-            
-            # 保存缩略图
-            thumb.save(thumbnail_path, 'JPEG', quality=80, optimize=True)
-            
-            return thumbnail_path
+            return _save_thumbnail(img, image_path, size)
             
     except Exception as e:
         current_app.logger.error(f"缩略图生成失败：{str(e)}")
         return image_path
 
 
+def _image_info(image_path, image_format, mode, size):
+    """组装图片信息字典"""
+    return {
+        'format': image_format,
+        'mode': mode,
+        'size': size,
+        'width': size[0],
+        'height': size[1],
+        'file_size': get_file_size(image_path)
+    }
+
+
 def get_image_info(image_path):
     """
     获取图片信息
@@ -206,16 +277,11 @@ def get_image_info(image_path):
     Returns:
         dict: 图片信息
     """
+    from PIL import Image
+    
     try:
         with Image.open(image_path) as img:
-            return {
-                'format': img.format,
-                'mode': img.mode,
-                'size': img.size,
-                'width': img.size[0],
-                'height': img.size[1],
-                'file_size': get_file_size(image_path)
-            }
+            return _image_info(image_path, img.format, img.mode, img.size)
     except Exception as e:
         current_app.logger.error(f"获取图片信息失败：{str(e)}")
         return None
@@ -230,22 +296,22 @@ def cleanup_old_files(directory, days=7):
         days: 保留天数
     """
     import time
-    from datetime import datetime, timedelta
     
     if not os.path.exists(directory):
         return
     
     cutoff_time = time.time() - (days * 24 * 60 * 60)
+    logger = current_app.logger
     
-    for filename in os.listdir(directory):
-        filepath = os.path.join(directory, filename)
-        if os.path.isfile(filepath):
-            if os.path.getmtime(filepath) < cutoff_time:
+    # scandir 的 DirEntry 缓存了文件类型和 stat 结果，避免逐个文件重复 stat
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff_time:
                 try:
-                    os.remove(filepath)
-                    current_app.logger.info(f"已清理旧文件：{filepath}")
+                    os.remove(entry.path)
+                    logger.info(f"已清理旧文件：{entry.path}")
                 except Exception as e:
-                    current_app.logger.error(f"清理文件失败 {filepath}: {str(e)}")
+                    logger.error(f"清理文件失败 {entry.path}: {str(e)}")
 
 
 def validate_image_file(file):
@@ -256,8 +322,10 @@ def validate_image_file(file):
         file: 文件对象
     
     Returns:
-        dict: 验证结果
+        dict: 验证结果（验证通过时 data 为已读入的文件内容）
     """
+    from PIL import Image
+    
     result = {
         'valid': False,
         'errors': []
@@ -269,7 +337,7 @@ def validate_image_file(file):
         return result
     
     # 检查文件格式
-    if not allowed_file(file.filename, ['png', 'jpg', 'jpeg', 'gif', 'webp']):
+    if not allowed_file(file.filename, IMAGE_EXTENSIONS):
         result['errors'].append('不支持的文件格式，仅支持 PNG, JPG, JPEG, GIF, WebP')
         return result
     
@@ -280,33 +348,29 @@ def validate_image_file(file):
     
     # 验证文件内容（检查是否真的是图片）
     try:
-        file.seek(0)
-        header = file.read(32)
+        # validate_file_size 已将指针重置到开头，大小已限制在 5MB 内，一次性读入内存
+        data = file.read()
         file.seek(0)
         
         # 检查文件头部签名
-        image_signatures = {
-            b'\xFF\xD8\xFF': 'JPEG',
-            b'\x89PNG\r\n\x1a\n': 'PNG',
-            b'GIF8': 'GIF',
-            b'RIFF': 'WebP'  # WebP 文件以 RIFF 开头
-        }
-        
-        is_valid_image = False
-        for signature in image_signatures:
-            if header.startswith(signature):
-                is_valid_image = True
-                break
-        
-        if not is_valid_image:
+        if data[:3] != JPEG_SIGNATURE and data[:4] not in IMAGE_SIGNATURES:
             result['errors'].append('文件不是有效的图片格式')
             return result
         
+        # 校验图片结构完整性，提前发现截断或损坏的文件
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                img.verify()
+        except Exception:
+            result['errors'].append('图片文件已损坏或无法识别')
+            return result
+        
     except Exception as e:
         result['errors'].append(f'文件验证失败：{str(e)}')
         return result
     
     result['valid'] = True
+    result['data'] = data
     return result
 
 
@@ -314,9 +378,11 @@ class ImageProcessor:
     """图片处理类"""
     
     def __init__(self, upload_folder=None):
-        self.upload_folder = upload_folder or current_app.config.get(
-            'UPLOAD_FOLDER', 
-            os.path.join(current_app.static_folder, 'uploads')
+        # 只在未指定目录时才读取应用配置
+        self.upload_folder = (
+            upload_folder
+            or current_app.config.get('UPLOAD_FOLDER')
+            or os.path.join(current_app.static_folder, 'uploads')
         )
     
     def process_upload(self, file, subfolder='images', create_thumbnail=False):
@@ -331,6 +397,8 @@ class ImageProcessor:
         Returns:
             dict: 处理结果
         """
+        from PIL import Image
+        
         # 验证文件
         validation = validate_image_file(file)
         if not validation['valid']:
@@ -347,19 +415,27 @@ class ImageProcessor:
             filename = generate_unique_filename(file.filename)
             filepath = save_upload_file(file, upload_path, filename)
             
-            # 优化图片
-            optimized_path = optimize_image(filepath)
-            
-            # 创建缩略图（如果需要）
+            # 只打开、解码一次：优化、缩略图和图片信息都基于同一个图片对象
             thumbnail_path = None
-            if create_thumbnail:
-                thumbnail_path = create_thumbnail(optimized_path)
+            # 直接复用验证时读入内存的内容，无需从磁盘重新读取
+            with Image.open(io.BytesIO(validation['data'])) as img:
+                image_format, image_mode, image_size = img.format, img.mode, img.size
+                
+                # 优化图片（已达标的 JPEG 直接跳过解码和重新编码）
+                if not _is_already_optimized(img, len(validation['data']), 1200, 800):
+                    img = _prepare_image(img, 1200, 800)
+                    if _save_optimized(img, filepath, 85):
+                        image_format, image_mode, image_size = 'JPEG', img.mode, img.size
+                
+                # 创建缩略图（如果需要）
+                if create_thumbnail:
+                    thumbnail_path = _save_thumbnail(img, filepath, (300, 200))
             
             # 获取图片信息
-            image_info = get_image_info(optimized_path)
+            image_info = _image_info(filepath, image_format, image_mode, image_size)
             
             # 生成Web访问URL
-            relative_path = os.path.relpath(optimized_path, current_app.static_folder)
+            relative_path = os.path.relpath(filepath, current_app.static_folder)
             image_url = f"/static/{relative_path.replace(os.sep, '/')}"
             
             thumbnail_url = None
@@ -4,14 +4,380 @@
 """
 import requests
 import json
+import hashlib
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
 from typing import Dict, Optional, List, Tuple
-from flask import current_app
-from app import db
+from urllib.parse import urlencode
+from flask import current_app, g, has_app_context
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app import db, cache
 import logging
 
 logger = logging.getLogger(__name__)
 
+class RateLimiter:
+    """
+    线程安全的令牌桶限速器
+    允许短时突发请求，同时把长期请求速率限制在GitHub配额之内
+    """
+    
+    def __init__(self, rate: float, capacity: int):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 令牌桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, timeout: float = 5.0) -> bool:
+        """
+        获取一个令牌，必要时等待
+        
+        Args:
+            timeout: 最长等待时间（秒）
+            
+        Returns:
+            是否成功获取令牌；等待时间超过timeout时立即返回False
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            if wait > timeout:
+                return False
+            
+            # 先预占令牌，在锁外等待，不阻塞其他线程计算自己的等待时间
+            self._tokens -= 1
+        
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+
+class TokenPool:
+    """
+    GitHub令牌池
+    按轮询顺序为每个请求选择令牌，跳过配额已耗尽的令牌直到其重置时间
+    """
+    
+    def __init__(self, tokens: List[Optional[str]]):
+        """
+        Args:
+            tokens: 令牌列表，[None] 表示匿名访问
+        """
+        self.tokens = list(tokens) or [None]
+        self._cycle = itertools.cycle(self.tokens)
+        self._exhausted_until: Dict[Optional[str], float] = {}
+        self._lock = threading.Lock()
+    
+    def next_token(self) -> Optional[str]:
+        """选择下一个可用令牌；全部耗尽时返回最早重置的令牌"""
+        with self._lock:
+            now = time.time()
+            for _ in range(len(self.tokens)):
+                token = next(self._cycle)
+                if self._exhausted_until.get(token, 0) <= now:
+                    return token
+            return min(self.tokens, key=lambda t: self._exhausted_until.get(t, 0))
+    
+    def record_response(self, token: Optional[str], response: requests.Response) -> None:
+        """根据响应头中的速率限制信息标记耗尽的令牌"""
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining == '0' and reset:
+            with self._lock:
+                self._exhausted_until[token] = float(reset)
+
+
+# 认证用户每小时5000次，匿名用户每小时60次
+AUTHENTICATED_RATE_LIMIT = 5000
+ANONYMOUS_RATE_LIMIT = 60
+
+# 按token共享的HTTP会话：复用到 api.github.com 的 TCP/TLS 连接
+_sessions: Dict[Optional[str], requests.Session] = {}
+_rate_limiters: Dict[Optional[str], RateLimiter] = {}
+_token_pools: Dict[Tuple[Optional[str], ...], TokenPool] = {}
+_sessions_lock = threading.Lock()
+
+
+def _get_session(token: Optional[str]) -> requests.Session:
+    """
+    获取（或创建）指定token对应的共享会话
+    
+    Args:
+        token: GitHub访问令牌，None表示匿名访问
+        
+    Returns:
+        配置好连接池和请求头的 requests.Session
+    """
+    session = _sessions.get(token)
+    if session is not None:
+        return session
+    
+    with _sessions_lock:
+        session = _sessions.get(token)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=20,
+                # 服务端瞬时错误自动指数退避重试（最多约3.5秒，请求在Web请求内执行，不能长时间阻塞）；
+                # 429 与 Retry-After 不等待重试，直接返回由调用方使用缓存数据。
+                # GraphQL 只发送只读查询，POST 也可安全重试
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.5,
+                    status_forcelist=[500, 502, 503, 504],
+                    allowed_methods=frozenset(Retry.DEFAULT_ALLOWED_METHODS | {'POST'}),
+                    respect_retry_after_header=False,
+                    raise_on_status=False
+                )
+            )
+            session.mount('https://', adapter)
+            
+            session.headers.update({
+                'Accept': 'application/vnd.github.v3+json',
+                'User-Agent': 'PersonalPortal/1.0'
+            })
+            # 设置认证头
+            if token:
+                session.headers['Authorization'] = f'token {token}'
+            
+            _sessions[token] = session
+    
+    return session
+
+
+def _get_rate_limiter(token: Optional[str]) -> RateLimiter:
+    """
+    获取（或创建）指定token对应的限速器，同一token的所有请求共享配额
+    
+    Args:
+        token: GitHub访问令牌，None表示匿名访问
+        
+    Returns:
+        RateLimiter 实例
+    """
+    limiter = _rate_limiters.get(token)
+    if limiter is not None:
+        return limiter
+    
+    with _sessions_lock:
+        limiter = _rate_limiters.get(token)
+        if limiter is None:
+            hourly_limit = AUTHENTICATED_RATE_LIMIT if token else ANONYMOUS_RATE_LIMIT
+            limiter = RateLimiter(rate=hourly_limit / 3600, capacity=min(100, hourly_limit))
+            _rate_limiters[token] = limiter
+    
+    return limiter
+
+
+def _get_token_pool(tokens: Tuple[Optional[str], ...]) -> TokenPool:
+    """获取（或创建）一组令牌对应的共享令牌池，轮询位置和耗尽状态在所有实例间共享"""
+    pool = _token_pools.get(tokens)
+    if pool is not None:
+        return pool
+    
+    with _sessions_lock:
+        pool = _token_pools.get(tokens)
+        if pool is None:
+            pool = _token_pools[tokens] = TokenPool(list(tokens))
+    
+    return pool
+
+
+def _configured_tokens() -> Tuple[Optional[str], ...]:
+    """
+    读取配置中的GitHub令牌
+    GITHUB_TOKENS（逗号分隔）优先，其次为单个 GITHUB_TOKEN，都未配置时匿名访问
+    """
+    tokens = current_app.config.get('GITHUB_TOKENS')
+    if isinstance(tokens, str):
+        tokens = [token.strip() for token in tokens.split(',')]
+    tokens = [token for token in (tokens or []) if token]
+    
+    if not tokens:
+        tokens = [current_app.config.get('GITHUB_TOKEN')]
+    
+    return tuple(tokens)
+
+
+@lru_cache(maxsize=1024)
+def _parse_github_url(github_url: str) -> Optional[Tuple[str, str]]:
+    """解析GitHub URL获取(owner, repo)，同一URL只解析一次"""
+    if not github_url:
+        return None
+        
+    # 支持多种URL格式
+    # https://github.com/owner/repo
+    # https://github.com/owner/repo.git
+    # git@github.com:owner/repo.git
+    try:
+        if 'github.com' in github_url:
+            if github_url.startswith('git@'):
+                # SSH格式: git@github.com:owner/repo.git
+                path_part = github_url.split(':')[1]
+            else:
+                # HTTPS格式: https://github.com/owner/repo
+                path_part = github_url.split('github.com/')[1]
+            
+            # 移除.git后缀（rstrip 会误删仓库名末尾的 . g i t 字符）
+            if path_part.endswith('.git'):
+                path_part = path_part[:-4]
+            
+            # 分割owner和repo
+            parts = path_part.split('/')
+            if len(parts) >= 2:
+                return parts[0], parts[1]
+                
+    except (IndexError, AttributeError) as e:
+        logger.warning(f"Failed to parse GitHub URL {github_url}: {e}")
+        
+    return None
+
+
+# GraphQL 仓库字段：一次请求取回基本信息、语言统计和最新提交
+_GRAPHQL_REPOSITORY_FIELDS = '''
+    name
+    nameWithOwner
+    description
+    stargazerCount
+    forkCount
+    watchers { totalCount }
+    issues(states: OPEN) { totalCount }
+    pullRequests(states: OPEN) { totalCount }
+    primaryLanguage { name }
+    createdAt
+    updatedAt
+    pushedAt
+    diskUsage
+    licenseInfo { name }
+    homepageUrl
+    repositoryTopics(first: 20) { nodes { topic { name } } }
+    isArchived
+    isDisabled
+    isPrivate
+    languages(first: 100, orderBy: {field: SIZE, direction: DESC}) {
+        totalSize
+        edges { size node { name } }
+    }
+    defaultBranchRef {
+        name
+        target {
+            ... on Commit {
+                history(first: 3) {
+                    nodes { oid messageHeadline url author { name date } }
+                }
+            }
+        }
+    }
+'''
+
+_GRAPHQL_REPOSITORY_QUERY = (
+    'query($owner: String!, $name: String!) {'
+    f' repository(owner: $owner, name: $name) {{ {_GRAPHQL_REPOSITORY_FIELDS} }} '
+    '}'
+)
+
+
+# 单个GraphQL批量查询中包含的仓库数量上限
+GRAPHQL_BATCH_SIZE = 50
+
+
+def _build_graphql_batch_query(count: int) -> str:
+    """构建包含 count 个别名 repository 查询的GraphQL语句（r0, r1, ...）"""
+    variables = ', '.join(f'$o{i}: String!, $n{i}: String!' for i in range(count))
+    blocks = ' '.join(
+        f'r{i}: repository(owner: $o{i}, name: $n{i}) {{ {_GRAPHQL_REPOSITORY_FIELDS} }}'
+        for i in range(count)
+    )
+    return f'query({variables}) {{ {blocks} }}'
+
+
+def _parse_graphql_repository(data: Dict) -> Tuple[Dict, Dict[str, int], List[Dict], Optional[int]]:
+    """
+    将GraphQL仓库数据转换为与REST接口一致的结构
+    
+    Args:
+        data: GraphQL返回的repository节点
+        
+    Returns:
+        (基本信息, 语言统计, 最新提交, 全部语言总字节数) tuple
+    """
+    branch = data.get('defaultBranchRef') or {}
+    history = ((branch.get('target') or {}).get('history') or {}).get('nodes') or []
+    
+    repo_info = {
+        'name': data.get('name'),
+        'full_name': data.get('nameWithOwner'),
+        'description': data.get('description'),
+        'stars': data.get('stargazerCount', 0),
+        'forks': data.get('forkCount', 0),
+        'watchers': (data.get('watchers') or {}).get('totalCount', 0),
+        'open_issues': (data.get('issues') or {}).get('totalCount', 0)
+                       + (data.get('pullRequests') or {}).get('totalCount', 0),
+        'language': (data.get('primaryLanguage') or {}).get('name'),
+        'created_at': data.get('createdAt'),
+        'updated_at': data.get('updatedAt'),
+        'pushed_at': data.get('pushedAt'),
+        'size': data.get('diskUsage') or 0,  # KB
+        'default_branch': branch.get('name', 'main'),
+        'license': (data.get('licenseInfo') or {}).get('name'),
+        'homepage': data.get('homepageUrl'),
+        'topics': [node['topic']['name'] for node in (data.get('repositoryTopics') or {}).get('nodes', [])],
+        'archived': data.get('isArchived', False),
+        'disabled': data.get('isDisabled', False),
+        'private': data.get('isPrivate', False)
+    }
+    
+    # 语言只取前100种，百分比以全部语言的 totalSize 为分母，与REST接口返回全部语言时一致
+    language_connection = data.get('languages') or {}
+    languages = {
+        edge['node']['name']: edge['size']
+        for edge in language_connection.get('edges', [])
+    }
+    
+    commits = [{
+        'sha': commit.get('oid'),
+        'message': commit.get('messageHeadline', ''),
+        'author': (commit.get('author') or {}).get('name'),
+        'date': (commit.get('author') or {}).get('date'),
+        'url': commit.get('url')
+    } for commit in history]
+    
+    return repo_info, languages, commits, language_connection.get('totalSize')
+
+
+def _build_stats(owner: str, repo: str, repo_info: Dict,
+                 languages: Optional[Dict[str, int]], commits: Optional[List[Dict]],
+                 languages_total: Optional[int] = None) -> Dict:
+    """组合完整的仓库统计信息（languages_total 缺省时为各语言字节数之和）"""
+    languages = languages or {}
+    return {
+        'basic': repo_info,
+        'languages': languages,
+        'languages_total': languages_total if languages_total is not None else sum(languages.values()),
+        'recent_commits': commits or [],
+        'fetched_at': datetime.utcnow().isoformat(),
+        'owner': owner,
+        'repo': repo
+    }
+
 
 class GitHubService:
     """
@@ -26,23 +392,42 @@ class GitHubService:
     
     def __init__(self, token: Optional[str] = None):
         """初始化GitHub服务"""
-        self.token = token or current_app.config.get('GITHUB_TOKEN')
+        self.token_pool = _get_token_pool((token,) if token else _configured_tokens())
+        self.token = self.token_pool.tokens[0]
         self.base_url = 'https://api.github.com'
-        self.session = requests.Session()
+        self.graphql_url = f'{self.base_url}/graphql'
+    
+    @classmethod
+    def get_default(cls) -> 'GitHubService':
+        """
+        获取使用默认配置的服务实例
         
-        # 设置认证头
-        if self.token:
-            self.session.headers.update({
-                'Authorization': f'token {self.token}',
-                'Accept': 'application/vnd.github.v3+json',
-                'User-Agent': 'PersonalPortal/1.0'
-            })
-        else:
-            # 无token时使用基本头部
-            self.session.headers.update({
-                'Accept': 'application/vnd.github.v3+json',
-                'User-Agent': 'PersonalPortal/1.0'
-            })
+        应用上下文内的多次调用共享同一实例（保存在flask.g上），
+        避免每次调用都重新读取配置；无应用上下文时直接新建实例
+        """
+        if not has_app_context():
+            return cls()
+        
+        service = g.get('_gh_service')
+        if service is None:
+            service = g._gh_service = cls()
+        return service
+    
+    def _request(self, method: str, url: str, **kwargs) -> Optional[requests.Response]:
+        """
+        从令牌池轮询选择令牌并发送请求
+        
+        Returns:
+            响应对象；本地限速器拒绝请求时返回None
+        """
+        token = self.token_pool.next_token()
+        if not _get_rate_limiter(token).acquire():
+            logger.warning(f"Local rate limit reached, skipping request to {url}")
+            return None
+        
+        response = _get_session(token).request(method, url, **kwargs)
+        self.token_pool.record_response(token, response)
+        return response
     
     def parse_github_url(self, github_url: str) -> Optional[Tuple[str, str]]:
         """
@@ -54,34 +439,40 @@ class GitHubService:
         Returns:
             (owner, repo) tuple或None
         """
-        if not github_url:
-            return None
-            
-        # 支持多种URL格式
-        # https://github.com/owner/repo
-        # https://github.com/owner/repo.git
-        # git@github.com:owner/repo.git
-        try:
-            if 'github.com' in github_url:
-                if github_url.startswith('git@'):
-                    # SSH格式: git@github.com:owner/repo.git
-                    path_part = github_url.split(':')[1]
-                else:
-                    # HTTPS格式: https://github.com/owner/repo
-                    path_part = github_url.split('github.com/')[1]
-                
-                # 移除.git后缀
-                path_part = path_part.rstrip('.git')
-                
-                # 分割owner和repo
-                parts = path_part.split('/')
-                if len(parts) >= 2:
-                    return parts[0], parts[1]
-                    
-        except (IndexError, AttributeError) as e:
-            logger.warning(f"Failed to parse GitHub URL {github_url}: {e}")
+        return _parse_github_url(github_url)
+    
+    def _conditional_get(self, url: str, params: Optional[Dict] = None, timeout: int = 10) -> Tuple[int, Optional[object]]:
+        """
+        发送带 If-None-Match 的条件GET请求
+        304 响应不消耗速率限制，直接返回缓存的数据
+        
+        Args:
+            url: 请求地址
+            params: 查询参数
+            timeout: 超时时间（秒）
             
-        return None
+        Returns:
+            (状态码, JSON数据) tuple，非200时数据为None
+        """
+        cache_key = f"{url}?{urlencode(sorted(params.items()))}" if params else url
+        cached = GitHubCache.get_etag_entry(cache_key)
+        headers = {'If-None-Match': cached['etag']} if cached else None
+        
+        response = self._request('GET', url, params=params, headers=headers, timeout=timeout)
+        if response is None:
+            return 429, None
+        
+        if response.status_code == 304 and cached:
+            return 200, cached['payload']
+        
+        if response.status_code == 200:
+            payload = response.json()
+            etag = response.headers.get('ETag')
+            if etag:
+                GitHubCache.store_etag_entry(cache_key, etag, payload)
+            return 200, payload
+        
+        return response.status_code, None
     
     def get_repository_info(self, owner: str, repo: str) -> Optional[Dict]:
         """
@@ -96,10 +487,9 @@ class GitHubService:
         """
         try:
             url = f'{self.base_url}/repos/{owner}/{repo}'
-            response = self.session.get(url, timeout=10)
+            status_code, data = self._conditional_get(url)
             
-            if response.status_code == 200:
-                data = response.json()
+            if status_code == 200:
                 return {
                     'name': data.get('name'),
                     'full_name': data.get('full_name'),
@@ -121,12 +511,12 @@ class GitHubService:
                     'disabled': data.get('disabled', False),
                     'private': data.get('private', False)
                 }
-            elif response.status_code == 404:
+            elif status_code == 404:
                 logger.warning(f"Repository {owner}/{repo} not found")
-            elif response.status_code == 403:
+            elif status_code == 403:
                 logger.warning(f"Rate limited or access denied for {owner}/{repo}")
             else:
-                logger.warning(f"Unexpected status {response.status_code} for {owner}/{repo}")
+                logger.warning(f"Unexpected status {status_code} for {owner}/{repo}")
                 
         except requests.RequestException as e:
             logger.error(f"Failed to fetch repository info for {owner}/{repo}: {e}")
@@ -146,12 +536,12 @@ class GitHubService:
         """
         try:
             url = f'{self.base_url}/repos/{owner}/{repo}/languages'
-            response = self.session.get(url, timeout=10)
+            status_code, data = self._conditional_get(url)
             
-            if response.status_code == 200:
-                return response.json()
+            if status_code == 200:
+                return data
             else:
-                logger.warning(f"Failed to get languages for {owner}/{repo}: {response.status_code}")
+                logger.warning(f"Failed to get languages for {owner}/{repo}: {status_code}")
                 
         except requests.RequestException as e:
             logger.error(f"Failed to fetch languages for {owner}/{repo}: {e}")
@@ -174,10 +564,9 @@ class GitHubService:
             url = f'{self.base_url}/repos/{owner}/{repo}/commits'
             params = {'per_page': min(count, 100)}  # GitHub API最大100
             
-            response = self.session.get(url, params=params, timeout=10)
+            status_code, commits = self._conditional_get(url, params=params)
             
-            if response.status_code == 200:
-                commits = response.json()
+            if status_code == 200:
                 return [{
                     'sha': commit.get('sha'),
                     'message': commit.get('commit', {}).get('message', '').split('\n')[0],  # 只取第一行
@@ -186,7 +575,7 @@ class GitHubService:
                     'url': commit.get('html_url')
                 } for commit in commits]
             else:
-                logger.warning(f"Failed to get commits for {owner}/{repo}: {response.status_code}")
+                logger.warning(f"Failed to get commits for {owner}/{repo}: {status_code}")
                 
         except requests.RequestException as e:
             logger.error(f"Failed to fetch commits for {owner}/{repo}: {e}")
@@ -209,28 +598,126 @@ class GitHubService:
             
         owner, repo = parsed
         
-        # 获取基本信息
-        repo_info = self.get_repository_info(owner, repo)
+        # GraphQL 需要认证：有token时一次请求取回全部数据
+        if self.token:
+            return self.get_repository_stats_graphql(owner, repo)
+        
+        # 三个接口互不依赖，并发请求，耗时约为一次往返
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            info_future = executor.submit(self.get_repository_info, owner, repo)
+            languages_future = executor.submit(self.get_repository_languages, owner, repo)
+            commits_future = executor.submit(self.get_latest_commits, owner, repo, 3)
+            
+            # 获取基本信息
+            repo_info = info_future.result()
+            # 获取语言统计
+            languages = languages_future.result()
+            # 获取最新提交
+            commits = commits_future.result()
+        
         if not repo_info:
             return None
         
-        # 获取语言统计
-        languages = self.get_repository_languages(owner, repo)
+        # 组合结果
+        return _build_stats(owner, repo, repo_info, languages, commits)
+    
+    def get_repository_stats_graphql(self, owner: str, repo: str) -> Optional[Dict]:
+        """
+        通过GraphQL一次请求获取完整的仓库统计信息（需要token）
+        
+        Args:
+            owner: 仓库所有者
+            repo: 仓库名称
+            
+        Returns:
+            完整统计信息字典，结构与REST方式一致
+        """
+        try:
+            response = self._request(
+                'POST',
+                self.graphql_url,
+                json={
+                    'query': _GRAPHQL_REPOSITORY_QUERY,
+                    'variables': {'owner': owner, 'name': repo}
+                },
+                timeout=10
+            )
+            
+            if response is None:
+                return None
+            elif response.status_code == 200:
+                payload = response.json()
+                data = (payload.get('data') or {}).get('repository')
+                if data:
+                    repo_info, languages, commits, languages_total = _parse_graphql_repository(data)
+                    return _build_stats(owner, repo, repo_info, languages, commits, languages_total)
+                logger.warning(f"Repository {owner}/{repo} not found: {payload.get('errors')}")
+            elif response.status_code in (401, 403):
+                logger.warning(f"Rate limited or access denied for {owner}/{repo}")
+            else:
+                logger.warning(f"Unexpected status {response.status_code} for {owner}/{repo}")
+                
+        except requests.RequestException as e:
+            logger.error(f"Failed to fetch GraphQL stats for {owner}/{repo}: {e}")
+            
+        return None
+    
+    def get_repositories_stats_graphql(self, repos: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[Dict]]:
+        """
+        通过带别名的GraphQL查询批量获取多个仓库的统计信息（需要token）
+        每 GRAPHQL_BATCH_SIZE 个仓库只发送一次请求
         
-        # 获取最新提交
-        commits = self.get_latest_commits(owner, repo, 3)
+        Args:
+            repos: (owner, repo) 列表
+            
+        Returns:
+            (owner, repo) 到统计信息的映射字典
+        """
+        results = {}
         
-        # 组合结果
-        stats = {
-            'basic': repo_info,
-            'languages': languages or {},
-            'recent_commits': commits or [],
-            'fetched_at': datetime.utcnow().isoformat(),
-            'owner': owner,
-            'repo': repo
-        }
+        for start in range(0, len(repos), GRAPHQL_BATCH_SIZE):
+            chunk = repos[start:start + GRAPHQL_BATCH_SIZE]
+            variables = {}
+            for i, (owner, repo) in enumerate(chunk):
+                variables[f'o{i}'] = owner
+                variables[f'n{i}'] = repo
+                results[(owner, repo)] = None
+            
+            try:
+                response = self._request(
+                    'POST',
+                    self.graphql_url,
+                    json={
+                        'query': _build_graphql_batch_query(len(chunk)),
+                        'variables': variables
+                    },
+                    timeout=20
+                )
+                
+                if response is None:
+                    continue
+                elif response.status_code != 200:
+                    logger.warning(f"Unexpected status {response.status_code} for GraphQL batch query")
+                    continue
+                
+                payload = response.json()
+                data = payload.get('data') or {}
+                if payload.get('errors'):
+                    logger.warning(f"GraphQL batch query returned errors: {payload['errors']}")
+                
+                # 按别名拆分结果；不存在的仓库对应的别名为 null
+                for i, (owner, repo) in enumerate(chunk):
+                    repository = data.get(f'r{i}')
+                    if repository:
+                        repo_info, languages, commits, languages_total = _parse_graphql_repository(repository)
+                        results[(owner, repo)] = _build_stats(
+                            owner, repo, repo_info, languages, commits, languages_total
+                        )
+                        
+            except requests.RequestException as e:
+                logger.error(f"Failed to fetch GraphQL batch stats: {e}")
         
-        return stats
+        return results
     
     def get_rate_limit_info(self) -> Optional[Dict]:
         """
@@ -241,9 +728,11 @@ class GitHubService:
         """
         try:
             url = f'{self.base_url}/rate_limit'
-            response = self.session.get(url, timeout=5)
+            response = self._request('GET', url, timeout=5)
             
-            if response.status_code == 200:
+            if response is None:
+                return None
+            elif response.status_code == 200:
                 data = response.json()
                 core = data.get('resources', {}).get('core', {})
                 return {
@@ -267,10 +756,34 @@ class GitHubCache:
     避免频繁调用API，提高性能
     """
     
+    # REST接口的 ETag 缓存：{请求地址: {'etag', 'payload'}}，按LRU淘汰
+    ETAG_CACHE_SIZE = 512
+    _etag_entries: 'OrderedDict[str, Dict]' = OrderedDict()
+    _etag_lock = threading.Lock()
+    
+    @classmethod
+    def get_etag_entry(cls, request_key: str) -> Optional[Dict]:
+        """获取请求地址对应的 ETag 和响应数据"""
+        with cls._etag_lock:
+            entry = cls._etag_entries.get(request_key)
+            if entry is not None:
+                cls._etag_entries.move_to_end(request_key)
+            return entry
+    
+    @classmethod
+    def store_etag_entry(cls, request_key: str, etag: str, payload) -> None:
+        """保存请求地址对应的 ETag 和响应数据"""
+        with cls._etag_lock:
+            cls._etag_entries[request_key] = {'etag': etag, 'payload': payload}
+            cls._etag_entries.move_to_end(request_key)
+            while len(cls._etag_entries) > cls.ETAG_CACHE_SIZE:
+                cls._etag_entries.popitem(last=False)
+    
     @staticmethod
     def get_cache_key(github_url: str) -> str:
-        """生成缓存键"""
-        return f"github_stats_{hash(github_url)}"
+        """生成缓存键（跨进程稳定，内置 hash() 每个进程的结果都不同）"""
+        digest = hashlib.blake2b(github_url.encode('utf-8'), digest_size=16).hexdigest()
+        return f"github_stats_{digest}"
     
     @staticmethod
     def get_cached_stats(github_url: str) -> Optional[Dict]:
@@ -284,13 +797,9 @@ class GitHubCache:
             缓存的统计数据或None
         """
         try:
-            # 这里可以集成Redis或简单的文件缓存
-            # 暂时使用简单的内存缓存实现
+            # 缓存后端由 CACHE_TYPE 配置决定（RedisCache 可在多个 worker 间共享）
             cache_key = GitHubCache.get_cache_key(github_url)
-            
-            # 实际项目中应该使用Redis等持久化缓存
-            # 这里先返回None，表示缓存未命中
-            return None
+            return cache.get(cache_key)
             
         except Exception as e:
             logger.error(f"Failed to get cached stats: {e}")
@@ -308,10 +817,7 @@ class GitHubCache:
         """
         try:
             cache_key = GitHubCache.get_cache_key(github_url)
-            
-            # 实际项目中应该使用Redis等持久化缓存
-            # 这里暂时跳过缓存存储
-            pass
+            cache.set(cache_key, stats, timeout=ttl)
             
         except Exception as e:
             logger.error(f"Failed to cache stats: {e}")
@@ -340,7 +846,7 @@ def get_github_stats(github_url: str, use_cache: bool = True) -> Optional[Dict]:
     
     # 创建服务实例并获取数据
     try:
-        github_service = GitHubService()
+        github_service = GitHubService.get_default()
         stats = github_service.get_repository_stats(github_url)
         
         # 缓存结果
@@ -354,29 +860,75 @@ def get_github_stats(github_url: str, use_cache: bool = True) -> Optional[Dict]:
         return None
 
 
-def batch_get_github_stats(github_urls: List[str]) -> Dict[str, Optional[Dict]]:
+def batch_get_github_stats(github_urls: List[str], use_cache: bool = True) -> Dict[str, Optional[Dict]]:
     """
-    批量获取GitHub统计信息
+    批量获取GitHub统计信息（带缓存）
     
     Args:
         github_urls: GitHub URL列表
+        use_cache: 是否使用缓存
         
     Returns:
         URL到统计信息的映射字典
     """
-    results = {}
-    github_service = GitHubService()
+    results = {url: None for url in github_urls}
+    urls = [url for url in results if url]
+    
+    # 检查缓存，只请求未命中的URL
+    if use_cache:
+        for url in urls:
+            results[url] = GitHubCache.get_cached_stats(url)
+        urls = [url for url in urls if results[url] is None]
     
-    for url in github_urls:
-        if url:
+    if not urls:
+        return results
+    
+    results.update(_fetch_github_stats(urls))
+    
+    # 缓存结果
+    if use_cache:
+        for url in urls:
+            if results[url]:
+                GitHubCache.cache_stats(url, results[url])
+    
+    return results
+
+
+def _fetch_github_stats(urls: List[str]) -> Dict[str, Optional[Dict]]:
+    """
+    从GitHub获取多个仓库的统计信息（不经过缓存）
+    
+    Args:
+        urls: GitHub URL列表（已去重、非空）
+        
+    Returns:
+        URL到统计信息的映射字典
+    """
+    results = {url: None for url in urls}
+    
+    # 所有线程共享同一个服务实例（同一个连接池）
+    github_service = GitHubService.get_default()
+    
+    # 有token时用带别名的GraphQL查询，一次请求取回全部仓库
+    if github_service.token:
+        parsed_urls = {url: github_service.parse_github_url(url) for url in urls}
+        repos = list(dict.fromkeys(parsed for parsed in parsed_urls.values() if parsed))
+        repo_stats = github_service.get_repositories_stats_graphql(repos)
+        for url, parsed in parsed_urls.items():
+            if parsed:
+                results[url] = repo_stats.get(parsed)
+        return results
+    
+    with ThreadPoolExecutor(max_workers=min(8, len(urls))) as executor:
+        futures = {
+            url: executor.submit(github_service.get_repository_stats, url)
+            for url in urls
+        }
+        for url, future in futures.items():
             try:
-                stats = github_service.get_repository_stats(url)
-                results[url] = stats
+                results[url] = future.result()
             except Exception as e:
                 logger.error(f"Failed to get stats for {url}: {e}")
-                results[url] = None
-        else:
-            results[url] = None
     
     return results
 
@@ -400,12 +952,13 @@ def format_github_stats_for_display(stats: Optional[Dict]) -> Dict:
     basic = stats['basic']
     languages = stats.get('languages', {})
     
-    # 计算语言百分比
-    total_bytes = sum(languages.values())
+    # 计算语言百分比（分母为全部语言的总字节数，旧缓存数据中没有时按已有语言求和）
+    total_bytes = stats.get('languages_total') or sum(languages.values())
     language_percentages = []
     
     if total_bytes > 0:
-        for lang, bytes_count in sorted(languages.items(), key=lambda x: x[1], reverse=True):
+        # 只显示前5种语言，无需对全部语言排序
+        for lang, bytes_count in heapq.nlargest(5, languages.items(), key=itemgetter(1)):
             percentage = (bytes_count / total_bytes) * 100
             language_percentages.append({
                 'name': lang,
@@ -418,8 +971,10 @@ def format_github_stats_for_display(stats: Optional[Dict]) -> Dict:
         if not date_str:
             return None
         try:
-            dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            return dt.strftime('%Y-%m-%d')
+            # 只用到日期部分，ISO时间戳前10位即为UTC日期（解析仅用于校验格式）
+            date_part = date_str[:10]
+            datetime.strptime(date_part, '%Y-%m-%d')
+            return date_part
         except:
             return date_str
     
@@ -432,7 +987,7 @@ def format_github_stats_for_display(stats: Optional[Dict]) -> Dict:
         'watchers': basic.get('watchers', 0),
         'open_issues': basic.get('open_issues', 0),
         'language': basic.get('language'),
-        'languages': language_percentages[:5],  # 只显示前5种语言
+        'languages': language_percentages,
         'license': basic.get('license'),
         'created_at': format_date(basic.get('created_at')),
         'updated_at': format_date(basic.get('updated_at')),
@@ -3,74 +3,173 @@
 处理所有媒体文件的组织、分类、清理功能
 """
 import os
+import errno
 import json
 import shutil
-from datetime import datetime, timedelta
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from flask import current_app
-from .file_handler import get_file_size, get_image_info
+from .file_handler import get_image_info
+
+
+_IMAGE_EXTS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.webp'})
+_DOCUMENT_EXTS = frozenset({'.pdf', '.doc', '.docx', '.txt', '.md'})
+_ARCHIVE_EXTS = frozenset({'.zip', '.rar', '.7z', '.tar', '.gz'})
+
+
+def _file_extension(name):
+    """获取小写扩展名（含点号），规则与 os.path.splitext 相同"""
+    stem, dot, ext = name.rpartition('.')
+    return f'.{ext.lower()}' if stem and dot else ''
+
+
+def _optimize_one(image_path):
+    """
+    在工作进程中优化单张图片
+    
+    工作进程中没有应用上下文，因此不记录日志，而是把错误信息返回给主进程
+    
+    Returns:
+        tuple: (图片路径, 原大小字节数, 新大小字节数, 错误信息)
+    """
+    from PIL import Image
+    from .file_handler import _is_already_optimized, _prepare_image, _save_optimized
+    
+    original_size = os.path.getsize(image_path)
+    try:
+        with Image.open(image_path) as img:
+            if not _is_already_optimized(img, original_size, 1200, 800):
+                _save_optimized(_prepare_image(img, 1200, 800), image_path, 85)
+        return image_path, original_size, os.path.getsize(image_path), None
+    except Exception as e:
+        return image_path, original_size, original_size, str(e)
+
+
+def _move_file(src, dst):
+    """移动文件：同一文件系统内直接原子重命名，跨设备时回退到 shutil.move"""
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
 
 
 class MediaManager:
     """媒体文件管理器"""
     
+    # 文件夹结构缓存有效期（秒）
+    STRUCTURE_CACHE_SECONDS = 30
+    
     def __init__(self):
         self.upload_folder = current_app.config.get(
             'UPLOAD_FOLDER',
             os.path.join(current_app.static_folder, 'uploads')
         )
         self.max_storage_mb = current_app.config.get('MAX_STORAGE_MB', 1000)  # 1GB默认限制
+        
+        # 文件夹结构扫描结果缓存，同一实例上的多个操作共享一次扫描
+        self._structure = None
+        self._structure_scanned_at = 0
+    
+    def get_folder_structure(self, force=False):
+        """
+        获取文件夹结构（结果缓存 STRUCTURE_CACHE_SECONDS 秒）
+        
+        Args:
+            force: 是否忽略缓存强制重新扫描
+        """
+        if (not force and self._structure is not None
+                and time.monotonic() - self._structure_scanned_at < self.STRUCTURE_CACHE_SECONDS):
+            return self._structure
+        
+        self._structure = self._scan_folder_structure()
+        self._structure_scanned_at = time.monotonic()
+        return self._structure
+    
+    def invalidate(self):
+        """文件发生变动后清除文件夹结构缓存"""
+        self._structure = None
     
-    def get_folder_structure(self):
-        """获取文件夹结构"""
+    def _scan_folder_structure(self):
+        """扫描上传目录，获取文件夹结构"""
         structure = {}
         if not os.path.exists(self.upload_folder):
             return structure
         
-        for root, dirs, files in os.walk(self.upload_folder):
-            # 计算相对路径
-            rel_path = os.path.relpath(root, self.upload_folder)
-            if rel_path == '.':
-                rel_path = '/'
+        self._scan_directory(self.upload_folder, '/', structure)
+        return structure
+    
+    def _scan_directory(self, dir_path, rel_path, structure):
+        """
+        用 os.scandir 递归扫描目录（与 os.walk 相同的自顶向下顺序）
+        
+        每个文件只 stat 一次，大小和时间都从同一个 stat 结果中读取
+        """
+        dirs = []
+        files = []
+        folder = {'dirs': dirs, 'files': files, 'size': 0, 'count': 0}
+        structure[rel_path] = folder
+        
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError as e:
+            current_app.logger.warning(f"无法读取目录 {dir_path}: {str(e)}")
+            return
+        
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
             
-            structure[rel_path] = {
-                'dirs': dirs,
-                'files': [],
-                'size': 0,
-                'count': len(files)
-            }
+            if is_dir:
+                dirs.append(entry.name)
+                # 与 os.walk 默认行为一致，不跟随符号链接目录
+                if not entry.is_symlink():
+                    subdirs.append(entry)
+                continue
             
-            # 收集文件信息
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    size = get_file_size(file_path)
-                    created = datetime.fromtimestamp(os.path.getctime(file_path))
-                    modified = datetime.fromtimestamp(os.path.getmtime(file_path))
-                    
-                    file_info = {
-                        'name': file,
-                        'size': size,
-                        'size_mb': round(size, 2),
-                        'created_at': created.strftime('%Y-%m-%d %H:%M:%S'),
-                        'modified_at': modified.strftime('%Y-%m-%d %H:%M:%S'),
-                        'extension': os.path.splitext(file)[1].lower(),
-                        'is_image': file.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')),
-                        'path': os.path.join(rel_path, file).replace('\\', '/')
-                    }
-                    
-                    # 如果是图片，获取图片信息
-                    if file_info['is_image']:
-                        img_info = get_image_info(file_path)
-                        if img_info:
-                            file_info.update(img_info)
-                    
-                    structure[rel_path]['files'].append(file_info)
-                    structure[rel_path]['size'] += size
-                    
-                except Exception as e:
-                    current_app.logger.warning(f"无法获取文件信息 {file_path}: {str(e)}")
+            folder['count'] += 1
+            try:
+                st = entry.stat()
+                size = st.st_size / (1024 * 1024)
+                name = entry.name
+                extension = _file_extension(name)
+                
+                file_info = {
+                    'name': name,
+                    'size': size,
+                    'size_mb': round(size, 2),
+                    'created_at': datetime.fromtimestamp(st.st_ctime).strftime('%Y-%m-%d %H:%M:%S'),
+                    'modified_at': datetime.fromtimestamp(st.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
+                    # 原始时间戳，供日期计算使用，避免再从字符串解析
+                    'created_ts': st.st_ctime,
+                    'modified_ts': st.st_mtime,
+                    'extension': extension,
+                    'is_image': extension in _IMAGE_EXTS,
+                    'path': os.path.join(rel_path, name).replace('\\', '/')
+                }
+                
+                # 如果是图片，获取图片信息
+                if file_info['is_image']:
+                    img_info = get_image_info(entry.path)
+                    if img_info:
+                        file_info.update(img_info)
+                
+                files.append(file_info)
+                folder['size'] += size
+                
+            except Exception as e:
+                current_app.logger.warning(f"无法获取文件信息 {entry.path}: {str(e)}")
         
-        return structure
+        for entry in subdirs:
+            child_rel = entry.name if rel_path == '/' else os.path.join(rel_path, entry.name)
+            self._scan_directory(entry.path, child_rel, structure)
     
     def get_storage_stats(self):
         """获取存储统计信息"""
@@ -78,13 +177,14 @@ class MediaManager:
             'total_size_mb': 0,
             'total_files': 0,
             'folders': {},
-            'file_types': {},
+            'file_types': defaultdict(lambda: {'count': 0, 'size_mb': 0}),
             'large_files': [],  # 大于10MB的文件
             'old_files': [],   # 超过30天未使用的文件
             'storage_usage_percent': 0
         }
         
         structure = self.get_folder_structure()
+        now = time.time()
         
         for folder_path, folder_data in structure.items():
             # 文件夹统计
@@ -101,12 +201,9 @@ class MediaManager:
             # 文件分析
             for file_info in folder_data['files']:
                 # 文件类型统计
-                ext = file_info['extension'] or 'no_extension'
-                if ext not in stats['file_types']:
-                    stats['file_types'][ext] = {'count': 0, 'size_mb': 0}
-                
-                stats['file_types'][ext]['count'] += 1
-                stats['file_types'][ext]['size_mb'] += file_info['size']
+                type_stats = stats['file_types'][file_info['extension'] or 'no_extension']
+                type_stats['count'] += 1
+                type_stats['size_mb'] += file_info['size']
                 
                 # 大文件检测
                 if file_info['size'] > 10:  # 大于10MB
@@ -117,13 +214,13 @@ class MediaManager:
                     })
                 
                 # 旧文件检测
-                modified_date = datetime.strptime(file_info['modified_at'], '%Y-%m-%d %H:%M:%S')
-                if (datetime.now() - modified_date).days > 30:
+                days_old = int((now - file_info['modified_ts']) // 86400)
+                if days_old > 30:
                     stats['old_files'].append({
                         'path': file_info['path'],
                         'name': file_info['name'],
                         'modified_at': file_info['modified_at'],
-                        'days_old': (datetime.now() - modified_date).days
+                        'days_old': days_old
                     })
         
         # 计算百分比
@@ -136,6 +233,8 @@ class MediaManager:
         # 存储使用率
         stats['storage_usage_percent'] = round((stats['total_size_mb'] / self.max_storage_mb) * 100, 1)
         
+        stats['file_types'] = dict(stats['file_types'])
+        
         # 排序
         stats['large_files'] = sorted(stats['large_files'], key=lambda x: x['size_mb'], reverse=True)[:10]
         stats['old_files'] = sorted(stats['old_files'], key=lambda x: x['days_old'], reverse=True)[:20]
@@ -176,14 +275,15 @@ class MediaManager:
                         # 移动文件
                         if target_folder and file_path != target_path:
                             try:
-                                # 确保目标文件夹存在
-                                os.makedirs(os.path.dirname(target_path), exist_ok=True)
-                                shutil.move(file_path, target_path)
+                                _move_file(file_path, target_path)
                                 organized_count += 1
                                 current_app.logger.info(f"文件已整理: {file_info['name']} -> {target_folder}")
                             except Exception as e:
                                 current_app.logger.error(f"整理文件失败 {file_info['name']}: {str(e)}")
             
+            if organized_count:
+                self.invalidate()
+            
             return {
                 'success': True,
                 'organized_count': organized_count,
@@ -207,13 +307,11 @@ class MediaManager:
                 return 'images/content'
         
         # 文档类型
-        doc_extensions = ['.pdf', '.doc', '.docx', '.txt', '.md']
-        if file_info['extension'] in doc_extensions:
+        if file_info['extension'] in _DOCUMENT_EXTS:
             return 'documents'
         
         # 压缩文件
-        archive_extensions = ['.zip', '.rar', '.7z', '.tar', '.gz']
-        if file_info['extension'] in archive_extensions:
+        if file_info['extension'] in _ARCHIVE_EXTS:
             return 'archives'
         
         # 临时文件
@@ -224,40 +322,43 @@ class MediaManager:
         return None  # 不移动
     
     def cleanup_old_files(self, days=30, dry_run=False):
-        """清理旧文件"""
+        """清理旧文件（直接扫描目录，不读取图片信息）"""
         cleaned_files = []
         total_size_saved = 0
-        cutoff_date = datetime.now() - timedelta(days=days)
+        now = time.time()
+        cutoff_ts = now - days * 86400
         
         try:
-            structure = self.get_folder_structure()
+            for folder_path, entry in self._iter_files():
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                if st.st_mtime >= cutoff_ts:
+                    continue
+                
+                rel_path = os.path.join(folder_path, entry.name).replace('\\', '/')
+                size = st.st_size / (1024 * 1024)
+                
+                cleaned_files.append({
+                    'path': rel_path,
+                    'name': entry.name,
+                    'size_mb': round(size, 2),
+                    'days_old': int((now - st.st_mtime) // 86400)
+                })
+                
+                total_size_saved += size
+                
+                # 实际删除文件
+                if not dry_run:
+                    try:
+                        os.remove(entry.path)
+                        current_app.logger.info(f"已删除旧文件: {rel_path}")
+                    except Exception as e:
+                        current_app.logger.error(f"删除文件失败 {rel_path}: {str(e)}")
             
-            for folder_path, folder_data in structure.items():
-                for file_info in folder_data['files']:
-                    modified_date = datetime.strptime(file_info['modified_at'], '%Y-%m-%d %H:%M:%S')
-                    
-                    if modified_date < cutoff_date:
-                        file_path = os.path.join(
-                            self.upload_folder,
-                            file_info['path'].lstrip('/')
-                        )
-                        
-                        cleaned_files.append({
-                            'path': file_info['path'],
-                            'name': file_info['name'],
-                            'size_mb': file_info['size_mb'],
-                            'days_old': (datetime.now() - modified_date).days
-                        })
-                        
-                        total_size_saved += file_info['size']
-                        
-                        # 实际删除文件
-                        if not dry_run:
-                            try:
-                                os.remove(file_path)
-                                current_app.logger.info(f"已删除旧文件: {file_info['path']}")
-                            except Exception as e:
-                                current_app.logger.error(f"删除文件失败 {file_info['path']}: {str(e)}")
+            if cleaned_files and not dry_run:
+                self.invalidate()
             
             return {
                 'success': True,
@@ -274,33 +375,34 @@ class MediaManager:
             }
     
     def optimize_all_images(self):
-        """批量优化所有图片"""
-        from .file_handler import optimize_image
-        
+        """批量优化所有图片（多进程并行处理）"""
         optimized_count = 0
         total_size_saved = 0
         
         try:
             structure = self.get_folder_structure()
             
-            for folder_path, folder_data in structure.items():
-                for file_info in folder_data['files']:
-                    if file_info['is_image']:
-                        file_path = os.path.join(
-                            self.upload_folder,
-                            file_info['path'].lstrip('/')
-                        )
-                        
-                        original_size = file_info['size']
-                        
-                        # 优化图片
-                        optimize_image(file_path)
-                        
-                        # 计算节省的空间
-                        new_size = get_file_size(file_path)
-                        if new_size < original_size:
-                            total_size_saved += (original_size - new_size)
-                            optimized_count += 1
+            image_paths = [
+                os.path.join(self.upload_folder, file_info['path'].lstrip('/'))
+                for folder_data in structure.values()
+                for file_info in folder_data['files']
+                if file_info['is_image']
+            ]
+            
+            if image_paths:
+                max_workers = min(os.cpu_count() or 1, len(image_paths))
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    results = list(executor.map(_optimize_one, image_paths, chunksize=8))
+                
+                for file_path, original_size, new_size, error in results:
+                    if error:
+                        current_app.logger.error(f"图片优化失败 {file_path}: {error}")
+                    elif new_size < original_size:
+                        total_size_saved += (original_size - new_size) / (1024 * 1024)
+                        optimized_count += 1
+            
+            if optimized_count:
+                self.invalidate()
             
             return {
                 'success': True,
@@ -315,38 +417,67 @@ class MediaManager:
                 'message': f'批量优化失败：{str(e)}'
             }
     
+    def _iter_files(self, dir_path=None, rel_path='/'):
+        """
+        逐个产出上传目录中的文件，不构建完整的文件夹结构
+        
+        Yields:
+            tuple: (相对文件夹路径, os.DirEntry)
+        """
+        if dir_path is None:
+            dir_path = self.upload_folder
+        
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError:
+            return
+        
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        child_rel = entry.name if rel_path == '/' else os.path.join(rel_path, entry.name)
+                        yield from self._iter_files(entry.path, child_rel)
+                    continue
+            except OSError:
+                continue
+            yield rel_path, entry
+    
     def search_files(self, query, file_type=None):
-        """搜索文件"""
+        """搜索文件（只按文件名匹配，不读取图片内容）"""
         results = []
         query_lower = query.lower()
         
         try:
-            structure = self.get_folder_structure()
-            
-            for folder_path, folder_data in structure.items():
-                for file_info in folder_data['files']:
-                    # 文件名匹配
-                    if query_lower in file_info['name'].lower():
-                        match = True
-                    else:
-                        match = False
-                    
-                    # 文件类型筛选
-                    if match and file_type:
-                        if file_type == 'images' and not file_info['is_image']:
-                            match = False
-                        elif file_type == 'documents' and file_info['extension'] not in ['.pdf', '.doc', '.docx', '.txt', '.md']:
-                            match = False
-                    
-                    if match:
-                        results.append({
-                            'name': file_info['name'],
-                            'path': file_info['path'],
-                            'size_mb': file_info['size_mb'],
-                            'modified_at': file_info['modified_at'],
-                            'is_image': file_info['is_image'],
-                            'folder': folder_path
-                        })
+            for folder_path, entry in self._iter_files():
+                name = entry.name
+                # 文件名匹配
+                if query_lower not in name.lower():
+                    continue
+                
+                extension = _file_extension(name)
+                is_image = extension in _IMAGE_EXTS
+                
+                # 文件类型筛选
+                if file_type == 'images' and not is_image:
+                    continue
+                if file_type == 'documents' and extension not in _DOCUMENT_EXTS:
+                    continue
+                
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                
+                results.append({
+                    'name': name,
+                    'path': os.path.join(folder_path, name).replace('\\', '/'),
+                    'size_mb': round(st.st_size / (1024 * 1024), 2),
+                    'modified_at': datetime.fromtimestamp(st.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
+                    'is_image': is_image,
+                    'folder': folder_path
+                })
             
             return {
                 'success': True,
@@ -358,4 +489,4 @@ class MediaManager:
             return {
                 'success': False,
                 'message': f'搜索失败：{str(e)}'
-            }
\ No newline at end of file
+            }
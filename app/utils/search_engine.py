@@ -3,28 +3,445 @@
 全文搜索、语义搜索、相关推荐和分类筛选
 """
 import re
+import math
 import jieba
 import jieba.analyse
 from datetime import datetime, timedelta
 from collections import Counter
-from sqlalchemy import or_, and_, func, desc
+from functools import lru_cache
+from flask import current_app
+from sqlalchemy import (
+    Integer, or_, and_, func, desc, case, column, event, inspect, literal, select, text, union_all
+)
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import lazyload, load_only, selectinload, undefer
+from app import db, cache
 from app.models.content import Content, content_tags
+from app.models.search_index import ContentRelated, ContentTerm, TermDocumentFrequency
 from app.models.tag import Tag
 
 
+# 全文搜索索引
+# SQLite 使用 FTS5 虚拟表：文本先经 jieba 分词再以空格连接写入，FTS5 默认的 unicode61
+# 分词器即可按中文词语建立索引，相关性排序由数据库内置的 bm25() 完成，只返回当前页的结果。
+# 其他数据库（或SQLite未编译FTS5时）使用 content_term/term_df 倒排索引表，
+# 相关性评分在数据库内按 BM25 聚合，停用词不写入倒排索引。
+FTS_TABLE = 'content_fts'
+FTS_COLUMNS = ('title', 'summary', 'content', 'tags')
+MAX_TERM_LENGTH = 100
+
+# 倒排索引平均文档长度（BM25 长度归一化用）的缓存键，索引写入时清除
+AVG_DOC_LEN_CACHE_KEY = 'search:avg_doc_len'
+
+# 停用词（均为小写，查询分词和倒排索引共用）
+STOP_WORDS = frozenset({
+    '的', '了', '是', '在', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说',
+    '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这', '那', '这个', '那个', '什么', '怎么',
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are'
+})
+
+# 各数据库（按URL）的索引状态缓存，drop_all 时清除
+_fts_ready_engines = set()
+_fts_unsupported_engines = set()
+_term_index_engines = set()
+_related_table_engines = set()
+
+# 搜索功能在 content 表上新增的列，旧数据库由 SearchIndexer.upgrade_schema 补齐
+SEARCH_CONTENT_COLUMNS = ('title_lc', 'summary_lc', 'content_lc', 'extracted_keywords')
+
+# 影响混合推荐结果的内容字段，变化时清除受影响内容已保存的相关内容
+RELATED_FIELDS = ('is_published', 'category', 'title', 'content', 'tags', 'extracted_keywords')
+
+
+def _tokenize(value):
+    """分词并转小写，跳过空白和纯标点"""
+    if not value:
+        return
+    for word in jieba.cut(value.lower()):
+        if any(ch.isalnum() for ch in word):
+            yield word
+
+
+def _segment(value):
+    """分词后以空格连接，用于写入FTS索引"""
+    return ' '.join(_tokenize(value))
+
+
+def _content_fields(content):
+    """获取内容中需要建立索引的各字段文本"""
+    return {
+        'title': content.title,
+        'summary': content.summary,
+        'content': content.content,
+        'tags': ' '.join(tag.name for tag in content.tags)
+    }
+
+
+def _engine_key(connection):
+    """索引状态缓存的键：按数据库URL区分（同一数据库的多个引擎共用状态）"""
+    return connection.engine.url
+
+
+def _fts_exists(connection):
+    """当前数据库是否已有可用的FTS5索引（仅SQLite）"""
+    if connection.dialect.name != 'sqlite':
+        return False
+    
+    engine_key = _engine_key(connection)
+    if engine_key in _fts_ready_engines:
+        return True
+    
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': FTS_TABLE}
+    ).first() is not None
+    if exists:
+        _fts_ready_engines.add(engine_key)
+    return exists
+
+
+def _create_fts_table(connection):
+    """
+    创建FTS5虚拟表
+    
+    Returns:
+        bool: 是否创建成功（SQLite未编译FTS5时为False）
+    """
+    try:
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({', '.join(FTS_COLUMNS)})"
+        ))
+    except DBAPIError as e:
+        _fts_unsupported_engines.add(_engine_key(connection))
+        current_app.logger.warning(f"无法创建FTS5全文索引，改用倒排索引表：{str(e)}")
+        return False
+    
+    _fts_ready_engines.add(_engine_key(connection))
+    return True
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_fts_with_schema(target, connection, **kw):
+    """create_all 时随其他表一起创建FTS5索引（仅SQLite）"""
+    if connection.dialect.name == 'sqlite':
+        _create_fts_table(connection)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def _drop_fts_with_schema(target, connection, **kw):
+    """drop_all 时一并删除FTS5索引，并清除该数据库的索引状态缓存"""
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+    
+    engine_key = _engine_key(connection)
+    for engines in (_fts_ready_engines, _fts_unsupported_engines,
+                    _term_index_engines, _related_table_engines):
+        engines.discard(engine_key)
+
+
+def _ensure_fts(connection):
+    """
+    确保FTS5索引存在，旧数据库中（create_all 时尚未注册该表）首次创建时为已有内容回填索引
+    
+    Returns:
+        bool: 索引是否可用（非SQLite或SQLite未编译FTS5时为False）
+    """
+    if connection.dialect.name != 'sqlite' or _engine_key(connection) in _fts_unsupported_engines:
+        return False
+    if _fts_exists(connection):
+        return True
+    
+    if not _create_fts_table(connection):
+        return False
+    
+    tag_names = {}
+    for content_id, tag_name in connection.execute(text(
+        "SELECT content_tags.content_id, tag.name FROM content_tags "
+        "JOIN tag ON tag.id = content_tags.tag_id"
+    )):
+        tag_names.setdefault(content_id, []).append(tag_name)
+    
+    for row in connection.execute(text("SELECT id, title, summary, content FROM content")).fetchall():
+        _write_fts_row(connection, row.id, {
+            'title': row.title,
+            'summary': row.summary,
+            'content': row.content,
+            'tags': ' '.join(tag_names.get(row.id, []))
+        })
+    
+    return True
+
+
+def _fts_match_expression(keywords):
+    """FTS5 MATCH 表达式：关键词作为前缀短语匹配，任意关键词命中即可"""
+    return ' OR '.join('"{}"*'.format(keyword.replace('"', '""')) for keyword in keywords)
+
+
+def _write_fts_row(connection, content_id, fields):
+    """写入（或替换）单条内容的FTS索引"""
+    connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {'id': content_id})
+    connection.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) "
+             f"VALUES (:id, {', '.join(':' + column for column in FTS_COLUMNS)})"),
+        dict({column: _segment(fields[column]) for column in FTS_COLUMNS}, id=content_id)
+    )
+
+
+def _term_index_exists(connection):
+    """倒排索引表是否已创建（未执行 create_all 的旧数据库中不存在）"""
+    engine_key = _engine_key(connection)
+    if engine_key in _term_index_engines:
+        return True
+    
+    exists = inspect(connection).has_table(ContentTerm.__tablename__)
+    if exists:
+        _term_index_engines.add(engine_key)
+    return exists
+
+
+def _related_table_exists(connection):
+    """相关内容表是否已创建（未执行 create_all 的旧数据库中不存在）"""
+    engine_key = _engine_key(connection)
+    if engine_key in _related_table_engines:
+        return True
+    
+    exists = inspect(connection).has_table(ContentRelated.__tablename__)
+    if exists:
+        _related_table_engines.add(engine_key)
+    return exists
+
+
+def _clear_related(connection):
+    """清空已保存的相关内容，下次请求时重新计算（重建索引时使用）"""
+    if _related_table_exists(connection):
+        connection.execute(ContentRelated.__table__.delete())
+
+
+def _attribute_values(target, name):
+    """属性在本次变更前后的全部取值（只读取已加载的值，不触发查询）"""
+    history = inspect(target).attrs[name].history
+    return [
+        value for values in (history.added, history.unchanged, history.deleted)
+        for value in values or () if value is not None
+    ]
+
+
+def _invalidate_related(connection, target):
+    """
+    清除受该内容变化影响的已保存相关内容，下次请求时重新计算
+    
+    影响范围：该内容自身的推荐结果、推荐了该内容的结果，以及与它同分类（变更前后）
+    或有共同标签的内容的结果（标签、分类两路候选可能因此变化）。仅关键词相近的内容
+    不在此列，其结果在下次重建索引（flask rebuild_search_index）时刷新
+    """
+    if not _related_table_exists(connection):
+        return
+    
+    related_table = ContentRelated.__table__
+    conditions = [
+        related_table.c.content_id == target.id,
+        related_table.c.related_id == target.id
+    ]
+    
+    categories = set(_attribute_values(target, 'category'))
+    if categories:
+        conditions.append(related_table.c.content_id.in_(
+            select(Content.id).where(Content.category.in_(categories))
+        ))
+    
+    # 标签取变更前后已加载的值，以及关联表中当前的记录
+    tag_ids = {tag.id for tag in _attribute_values(target, 'tags') if tag.id is not None}
+    tag_filter = content_tags.c.tag_id.in_(
+        select(content_tags.c.tag_id).where(content_tags.c.content_id == target.id)
+    )
+    if tag_ids:
+        tag_filter = or_(tag_filter, content_tags.c.tag_id.in_(tag_ids))
+    conditions.append(related_table.c.content_id.in_(
+        select(content_tags.c.content_id).where(tag_filter)
+    ))
+    
+    connection.execute(related_table.delete().where(or_(*conditions)))
+
+
+def _chunks(items, size=500):
+    """分批处理，避免单条语句的参数过多"""
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _adjust_document_frequency(connection, terms, delta):
+    """增减词项的文档频率"""
+    df_table = TermDocumentFrequency.__table__
+    for batch in _chunks(terms):
+        connection.execute(
+            df_table.update()
+            .where(df_table.c.term.in_(batch))
+            .values(df=df_table.c.df + delta)
+        )
+        if delta > 0:
+            existing = {
+                row.term for row in connection.execute(
+                    select(df_table.c.term).where(df_table.c.term.in_(batch))
+                )
+            }
+            missing = [{'term': term, 'df': delta} for term in batch if term not in existing]
+            if missing:
+                connection.execute(df_table.insert(), missing)
+    
+    if delta < 0:
+        connection.execute(df_table.delete().where(df_table.c.df <= 0))
+
+
+def _write_term_rows(connection, content_id, fields, update_df=True):
+    """写入（或替换）单条内容的倒排索引，并增量更新文档频率"""
+    term_table = ContentTerm.__table__
+    old_terms = set()
+    if update_df:
+        old_terms = {
+            row.term for row in connection.execute(
+                select(term_table.c.term).where(term_table.c.content_id == content_id).distinct()
+            )
+        }
+    connection.execute(term_table.delete().where(term_table.c.content_id == content_id))
+    
+    field_counts = {
+        field: Counter(
+            term for term in _tokenize(fields[field])
+            if len(term) <= MAX_TERM_LENGTH and term not in STOP_WORDS
+        )
+        for field in FTS_COLUMNS
+    }
+    doc_len = sum(sum(counts.values()) for counts in field_counts.values())
+    rows = [
+        {'content_id': content_id, 'term': term, 'field': field, 'tf': tf, 'doc_len': doc_len}
+        for field, counts in field_counts.items()
+        for term, tf in counts.items()
+    ]
+    if rows:
+        connection.execute(term_table.insert(), rows)
+    cache.delete(AVG_DOC_LEN_CACHE_KEY)
+    
+    if update_df:
+        new_terms = {row['term'] for row in rows}
+        _adjust_document_frequency(connection, new_terms - old_terms, 1)
+        _adjust_document_frequency(connection, old_terms - new_terms, -1)
+
+
+def _remove_term_rows(connection, content_id):
+    """删除单条内容的倒排索引"""
+    term_table = ContentTerm.__table__
+    old_terms = {
+        row.term for row in connection.execute(
+            select(term_table.c.term).where(term_table.c.content_id == content_id).distinct()
+        )
+    }
+    connection.execute(term_table.delete().where(term_table.c.content_id == content_id))
+    cache.delete(AVG_DOC_LEN_CACHE_KEY)
+    _adjust_document_frequency(connection, old_terms, -1)
+
+
+def _index_content(connection, content):
+    """将内容写入当前数据库可用的搜索索引"""
+    if _ensure_fts(connection):
+        _write_fts_row(connection, content.id, _content_fields(content))
+    elif _term_index_exists(connection):
+        _write_term_rows(connection, content.id, _content_fields(content))
+
+
+@event.listens_for(Content, 'after_insert')
+def _index_new_content(mapper, connection, target):
+    """新建内容时写入搜索索引"""
+    _index_content(connection, target)
+    if target.is_published:
+        _invalidate_related(connection, target)
+
+
+@event.listens_for(Content, 'after_update')
+def _reindex_updated_content(mapper, connection, target):
+    """内容的文本或标签变化时重建其搜索索引（浏览量等字段更新不会触发）"""
+    state = inspect(target)
+    if any(state.attrs[column].history.has_changes() for column in FTS_COLUMNS):
+        _index_content(connection, target)
+    if any(state.attrs[field].history.has_changes() for field in RELATED_FIELDS):
+        _invalidate_related(connection, target)
+
+
+@event.listens_for(Content, 'before_delete')
+def _remove_content_index(mapper, connection, target):
+    """删除内容前移除其搜索索引"""
+    if _fts_exists(connection):
+        connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {'id': target.id})
+    elif _term_index_exists(connection):
+        _remove_term_rows(connection, target.id)
+    _invalidate_related(connection, target)
+
+
+def _lowercase_field(content, field):
+    """读取字段的小写副本（小写副本字段加入前保存的旧数据现场转换）"""
+    value = getattr(content, f'{field}_lc')
+    if value is None:
+        value = (getattr(content, field) or '').lower()
+    return value
+
+
+# 句子切分（按中英文句末标点）
+_SENTENCE_PATTERN = re.compile(r'[^。！？.!?]+')
+
+
+@lru_cache(maxsize=256)
+def _keyword_pattern(keywords):
+    """
+    编译同时匹配全部关键词的正则（长词优先）
+    
+    按关键词元组缓存，同一次查询的所有结果共用一个编译结果，每段文本只需扫描一遍
+    """
+    return re.compile(
+        '|'.join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True)),
+        re.IGNORECASE
+    )
+
+
+def _highlight(value, keywords):
+    """一次扫描为文本中的所有关键词添加 <mark> 高亮"""
+    if not value or not keywords:
+        return value
+    return _keyword_pattern(tuple(keywords)).sub(r'<mark>\g<0></mark>', value)
+
+
 class SearchEngine:
     """智能搜索引擎"""
     
+    # 非相关性排序方式对应的排序字段
+    SORT_COLUMNS = {
+        'date': Content.created_at,
+        'views': func.coalesce(Content.view_count, 0),
+        'likes': func.coalesce(Content.like_count, 0)
+    }
+    
+    # 相关性排序时参与精确评分的最大候选数量
+    RELEVANCE_CANDIDATE_LIMIT = 500
+    
+    # BM25 参数：词频饱和度 k1、文档长度归一化强度 b
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    
+    # IDF 低于该值的常见词（如"的"）不参与关键词评分
+    MIN_TERM_IDF = 0.1
+    
+    # 混合推荐结果保存的条数，请求数量不超过该值时直接读取保存的结果
+    RELATED_CACHE_SIZE = 20
+    
+    # 热门内容、分类统计、搜索建议的缓存时间（秒），缓存后端由 CACHE_TYPE 配置决定
+    CACHE_TIMEOUT = 60
+    
     def __init__(self):
-        # 初始化jieba分词
-        jieba.initialize()
+        # 初始化jieba分词，复用默认分词器实例（jieba.analyse 也使用它，避免重复加载词典）
+        self._tokenizer = jieba.dt
+        self._tokenizer.initialize()
         
         # 停用词
-        self.stop_words = {
-            '的', '了', '是', '在', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说',
-            '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这', '那', '这个', '那个', '什么', '怎么',
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are'
-        }
+        self.stop_words = STOP_WORDS
         
         # 权重配置
         self.weights = {
@@ -56,56 +473,142 @@ class SearchEngine:
         if not keywords:
             return self._empty_result()
         
+        # 按相关性排序时优先使用FTS5索引，排序与分页都在数据库内完成
+        if sort_by == 'relevance':
+            ranked = self._fts_search(keywords, category, page, per_page)
+            if ranked is not None:
+                total, paged_results = ranked
+                return self._build_search_result(
+                    paged_results, total, keywords, query, category, page, per_page, sort_by
+                )
+        
         # 构建基础查询
         base_query = Content.query.filter(Content.is_published == True)
         
         if category:
             base_query = base_query.filter(Content.category == category)
         
-        # 构建搜索条件
-        search_conditions = []
-        
-        for keyword in keywords:
-            # 为每个关键词创建搜索条件
-            keyword_conditions = [
-                Content.title.contains(keyword),
-                Content.summary.contains(keyword), 
-                Content.content.contains(keyword)
-            ]
-            search_conditions.append(or_(*keyword_conditions))
-        
-        # 组合所有搜索条件
-        if search_conditions:
-            search_query = base_query.filter(or_(*search_conditions))
+        # 构建搜索条件：有FTS5索引时，按日期/浏览量/点赞排序也使用与相关性排序相同的索引匹配，
+        # 切换排序方式不会改变结果集合和总数
+        if sort_by != 'relevance' and _fts_exists(db.session.connection()):
+            search_query = base_query.filter(Content.id.in_(
+                text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match")
+                .bindparams(match=_fts_match_expression(keywords))
+                .columns(column('rowid', Integer))
+            ))
         else:
-            return self._empty_result()
+            search_conditions = []
+            
+            for keyword in keywords:
+                # 为每个关键词创建搜索条件
+                keyword_conditions = [
+                    Content.title.contains(keyword),
+                    Content.summary.contains(keyword), 
+                    Content.content.contains(keyword)
+                ]
+                search_conditions.append(or_(*keyword_conditions))
+            
+            # 组合所有搜索条件
+            if search_conditions:
+                search_query = base_query.filter(or_(*search_conditions))
+            else:
+                return self._empty_result()
+        
+        total = search_query.count()
+        
+        # 按日期/浏览量/点赞排序时，排序和分页都在数据库内完成，只加载当前页
+        sort_column = self.SORT_COLUMNS.get(sort_by)
+        if sort_column is not None:
+            page_items = search_query.options(selectinload(Content.tags))\
+                         .order_by(desc(sort_column), desc(Content.id))\
+                         .limit(per_page).offset((page - 1) * per_page).all()
+            scores = self._calculate_relevance_scores(page_items, keywords, query)
+            paged_results = [(content, scores[content.id]) for content in page_items]
+            return self._build_search_result(
+                paged_results, total, keywords, query, category, page, per_page, sort_by
+            )
         
-        # 获取结果用于相关性计算
-        all_results = search_query.all()
+        # 按相关性排序：先按标题命中数在数据库内粗排，只对前若干条候选做精确评分，
+        # 总数也以候选数量为上限，保证每一页都有结果（关键词已是小写，匹配标题的小写副本）
+        # 候选只加载评分用到的列，正文和标签留到分页后只为当前页加载
+        total = min(total, self.RELEVANCE_CANDIDATE_LIMIT)
+        title_hits = sum(case((Content.title_lc.contains(keyword), 1), else_=0) for keyword in keywords)
+        candidates = search_query\
+                     .options(load_only(
+                         Content.title, Content.summary, Content.title_lc, Content.summary_lc,
+                         Content.is_featured, Content.view_count
+                     ))\
+                     .order_by(desc(title_hits), desc(func.coalesce(Content.view_count, 0)))\
+                     .limit(self.RELEVANCE_CANDIDATE_LIMIT).all()
         
         # 计算相关性评分
-        scored_results = []
-        for content in all_results:
-            score = self._calculate_relevance_score(content, keywords, query)
-            scored_results.append((content, score))
-        
-        # 排序
-        if sort_by == 'relevance':
-            scored_results.sort(key=lambda x: x[1], reverse=True)
-        elif sort_by == 'date':
-            scored_results.sort(key=lambda x: x[0].created_at, reverse=True)
-        elif sort_by == 'views':
-            scored_results.sort(key=lambda x: x[0].view_count or 0, reverse=True)
-        elif sort_by == 'likes':
-            scored_results.sort(key=lambda x: x[0].like_count or 0, reverse=True)
+        scores = self._calculate_relevance_scores(candidates, keywords, query)
+        scored_results = [(content, scores[content.id]) for content in candidates]
+        scored_results.sort(key=lambda x: x[1], reverse=True)
         
         # 分页
-        total = len(scored_results)
         start = (page - 1) * per_page
         end = start + per_page
         paged_results = scored_results[start:end]
         
-        # 构建返回结果
+        # 为当前页内容一次性补全其余列和标签（同一会话中返回的是同一批对象）
+        if paged_results:
+            Content.query.options(selectinload(Content.tags))\
+                .filter(Content.id.in_([content.id for content, score in paged_results]))\
+                .populate_existing().all()
+        
+        return self._build_search_result(
+            paged_results, total, keywords, query, category, page, per_page, sort_by
+        )
+    
+    def _fts_search(self, keywords, category, page, per_page):
+        """
+        基于FTS5索引的相关性搜索，使用bm25()按字段权重排序
+        
+        Returns:
+            tuple: (总数, [(content, score), ...])；索引不可用时返回None
+        """
+        connection = db.session.connection()
+        if not _fts_exists(connection):
+            return None
+        
+        params = {'match': _fts_match_expression(keywords)}
+        conditions = f"{FTS_TABLE} MATCH :match AND content.is_published = 1"
+        if category:
+            conditions += " AND content.category = :category"
+            params['category'] = category
+        
+        from_clause = (f"FROM {FTS_TABLE} JOIN content ON content.id = {FTS_TABLE}.rowid "
+                       f"WHERE {conditions}")
+        column_weights = ', '.join(str(round(self.weights[column] * 10, 2)) for column in FTS_COLUMNS)
+        
+        try:
+            total = connection.execute(text(f"SELECT count(*) {from_clause}"), params).scalar()
+            rows = connection.execute(
+                text(f"SELECT content.id, bm25({FTS_TABLE}, {column_weights}) AS bm25_score {from_clause} "
+                     f"ORDER BY bm25_score LIMIT :limit OFFSET :offset"),
+                dict(params, limit=per_page, offset=(page - 1) * per_page)
+            ).fetchall()
+        except DBAPIError as e:
+            current_app.logger.warning(f"FTS搜索失败，使用普通搜索：{str(e)}")
+            return None
+        
+        contents = {}
+        if rows:
+            contents = {
+                content.id: content
+                for content in Content.query.options(selectinload(Content.tags))
+                .filter(Content.id.in_([row.id for row in rows])).all()
+            }
+        
+        # bm25() 越小越相关，取反作为评分
+        return total, [
+            (contents[row.id], round(-row.bm25_score, 2)) for row in rows if row.id in contents
+        ]
+    
+    def _build_search_result(self, paged_results, total, keywords, query, category,
+                             page, per_page, sort_by):
+        """构建搜索结果"""
         results = []
         for content, score in paged_results:
             result = {
@@ -131,55 +634,50 @@ class SearchEngine:
         """
         语义搜索（基于关键词提取和标签匹配）
         """
+        if not query.strip():
+            return []
+        
         # 提取查询的关键词和主题
         keywords = jieba.analyse.extract_tags(query, topK=10, withWeight=True)
         if not keywords:
             return []
         
-        # 基于关键词权重搜索
-        results = []
+        terms = [keyword for keyword, weight in keywords if keyword not in self.stop_words]
+        if not terms:
+            return []
         
-        # 搜索标题和内容
-        for keyword, weight in keywords:
-            if keyword in self.stop_words:
-                continue
-                
-            # 搜索内容
-            contents = Content.query.filter(
-                Content.is_published == True,
+        # 一次查询取回匹配任一关键词的内容
+        contents = Content.query.options(
+            selectinload(Content.tags),
+            undefer(Content.content_lc)
+        ).filter(
+            Content.is_published == True,
+            or_(*[
                 or_(
-                    Content.title.contains(keyword),
-                    Content.content.contains(keyword),
-                    Content.summary.contains(keyword)
+                    Content.title.contains(term),
+                    Content.content.contains(term),
+                    Content.summary.contains(term)
                 )
-            ).all()
-            
-            for content in contents:
-                # 计算语义相关度
-                semantic_score = self._calculate_semantic_score(content, keywords)
-                results.append((content, semantic_score))
-        
-        # 去重并按相关度排序
-        unique_results = {}
-        for content, score in results:
-            if content.id in unique_results:
-                unique_results[content.id] = max(unique_results[content.id], score)
-            else:
-                unique_results[content.id] = score
-        
-        # 获取排序后的内容
-        sorted_content_ids = sorted(unique_results.items(), key=lambda x: x[1], reverse=True)
-        
-        final_results = []
-        for content_id, score in sorted_content_ids[:limit]:
-            content = Content.query.get(content_id)
-            if content:
-                final_results.append({
-                    'content': content,
-                    'semantic_score': score
-                })
+                for term in terms
+            ])
+        ).all()
+        
+        # 字段使用预存的小写副本，关键词也在循环外统一转小写
+        keywords = [(keyword.lower(), weight) for keyword, weight in keywords]
+        
+        # 计算语义相关度并排序
+        scored_results = [
+            (content, self._calculate_semantic_score(content, keywords)) for content in contents
+        ]
+        scored_results.sort(key=lambda x: x[1], reverse=True)
         
-        return final_results
+        return [
+            {
+                'content': content,
+                'semantic_score': score
+            }
+            for content, score in scored_results[:limit]
+        ]
     
     def search_by_tags(self, tag_names, limit=20):
         """标签搜索"""
@@ -197,6 +695,7 @@ class SearchEngine:
         from app import db
         
         results = db.session.query(Content)\
+                    .options(selectinload(Content.tags))\
                     .join(content_tags)\
                     .filter(content_tags.c.tag_id.in_(tag_ids))\
                     .filter(Content.is_published == True)\
@@ -225,18 +724,28 @@ class SearchEngine:
         elif method == 'keywords':
             return self._get_related_by_keywords(content, limit)
         else:  # mixed
+            if limit <= self.RELATED_CACHE_SIZE:
+                return self._get_saved_related(content, limit)
             return self._get_related_mixed(content, limit)
     
     def get_trending_content(self, days=7, limit=10):
         """获取热门内容（基于浏览量和时间）"""
+        cache_key = f'search:trending:{days}:{limit}'
+        cached_ids = cache.get(cache_key)
+        if cached_ids is not None:
+            # 缓存的是排好序的ID列表，按原顺序重新加载内容
+            return self._load_in_order(cached_ids)
+        
         since_date = datetime.now() - timedelta(days=days)
         
         results = Content.query\
+                  .options(selectinload(Content.tags))\
                   .filter(Content.is_published == True)\
                   .filter(Content.created_at >= since_date)\
                   .order_by(desc(Content.view_count), desc(Content.created_at))\
                   .limit(limit).all()
         
+        cache.set(cache_key, [content.id for content in results], timeout=self.CACHE_TIMEOUT)
         return results
     
     def get_search_suggestions(self, query, limit=5):
@@ -244,12 +753,20 @@ class SearchEngine:
         if len(query) < 2:
             return []
         
+        # 自动完成每次按键都会请求，相同查询在缓存时间内直接复用结果
+        cache_key = f'search:suggestions:{limit}:{query}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         suggestions = []
         
-        # 基于标题的建议
+        # 基于标题的建议（PostgreSQL 上 ILIKE 可使用标题/标签名的 pg_trgm 三元组索引）
+        # 建议只用到标题，不加载标签
         title_matches = Content.query\
+                       .options(lazyload(Content.tags))\
                        .filter(Content.is_published == True)\
-                       .filter(Content.title.contains(query))\
+                       .filter(Content.title.ilike(f'%{query}%'))\
                        .order_by(desc(Content.view_count))\
                        .limit(limit).all()
         
@@ -263,7 +780,7 @@ class SearchEngine:
         # 基于标签的建议
         if len(suggestions) < limit:
             tag_matches = Tag.query\
-                         .filter(Tag.name.contains(query))\
+                         .filter(Tag.name.ilike(f'%{query}%'))\
                          .order_by(desc(Tag.usage_count))\
                          .limit(limit - len(suggestions)).all()
             
@@ -274,11 +791,15 @@ class SearchEngine:
                     'url': f'/search?tag={tag.name}'
                 })
         
+        cache.set(cache_key, suggestions, timeout=self.CACHE_TIMEOUT)
         return suggestions
     
     def get_category_stats(self):
         """获取分类统计"""
-        from app import db
+        cache_key = 'search:category_stats'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         stats = db.session.query(
             Content.category,
@@ -288,7 +809,7 @@ class SearchEngine:
          .group_by(Content.category)\
          .order_by(desc('count')).all()
         
-        return [
+        results = [
             {
                 'category': stat.category,
                 'count': stat.count,
@@ -296,77 +817,143 @@ class SearchEngine:
             }
             for stat in stats
         ]
+        
+        cache.set(cache_key, results, timeout=self.CACHE_TIMEOUT)
+        return results
     
     def _extract_keywords(self, query):
-        """提取关键词"""
-        # 中文分词
-        words = jieba.lcut(query.lower())
-        
-        # 英文分词（简单空格分割）
-        english_words = re.findall(r'[a-zA-Z]+', query.lower())
-        
-        # 合并并过滤
-        all_words = words + english_words
-        keywords = [word for word in all_words if len(word) > 1 and word not in self.stop_words]
-        
-        return list(set(keywords))  # 去重
+        """提取关键词（jieba同时切分中英文，一次遍历完成过滤和去重）"""
+        seen = set()
+        keywords = []
+        for word in self._tokenizer.cut(query.lower(), HMM=True):
+            if len(word) > 1 and word not in self.stop_words and word not in seen:
+                seen.add(word)
+                keywords.append(word)
+        
+        return keywords
     
-    def _calculate_relevance_score(self, content, keywords, original_query):
-        """计算相关性评分"""
-        score = 0
-        
-        # 标题匹配
-        title_matches = sum(1 for keyword in keywords if keyword in content.title.lower())
-        score += title_matches * self.weights['title'] * 10
-        
-        # 摘要匹配
-        if content.summary:
-            summary_matches = sum(1 for keyword in keywords if keyword in content.summary.lower())
-            score += summary_matches * self.weights['summary'] * 10
+    def _calculate_relevance_scores(self, contents, keywords, original_query):
+        """
+        批量计算相关性评分
         
-        # 内容匹配
-        if content.content:
-            content_matches = sum(1 for keyword in keywords if keyword in content.content.lower())
-            score += content_matches * self.weights['content'] * 10
+        关键词匹配部分由倒排索引在数据库内聚合，再叠加完整查询匹配和内容质量加分
         
-        # 标签匹配
-        if content.tags:
-            tag_names = [tag.name.lower() for tag in content.tags]
-            tag_matches = sum(1 for keyword in keywords if any(keyword in tag_name for tag_name in tag_names))
-            score += tag_matches * self.weights['tags'] * 10
+        Returns:
+            dict: {content_id: score}
+        """
+        term_scores = self._index_term_scores([content.id for content in contents], keywords)
+        query_lower = original_query.lower()
         
-        # 完整查询匹配（加分）
-        if original_query.lower() in content.title.lower():
-            score += 20
-        elif content.summary and original_query.lower() in content.summary.lower():
-            score += 15
-        elif content.content and original_query.lower() in content.content.lower():
-            score += 10
+        scores = {}
+        for content in contents:
+            score = term_scores.get(content.id, 0)
+            
+            # 完整查询匹配（加分）
+            if query_lower in _lowercase_field(content, 'title'):
+                score += 20
+            elif query_lower in _lowercase_field(content, 'summary'):
+                score += 15
+            
+            # 内容质量加分
+            if content.is_featured:
+                score += 5
+            
+            if content.view_count and content.view_count > 100:
+                score += min(content.view_count / 100, 10)  # 最多加10分
+            
+            scores[content.id] = round(score, 2)
         
-        # 内容质量加分
-        if content.is_featured:
-            score += 5
+        return scores
+    
+    def _index_term_scores(self, content_ids, keywords):
+        """
+        基于倒排索引计算 BM25 关键词评分：
+        SUM(idf * 字段权重 * tf * (k1 + 1) / (tf + k1 * (1 - b + b * 文档长度 / 平均文档长度)))
         
-        if content.view_count and content.view_count > 100:
-            score += min(content.view_count / 100, 10)  # 最多加10分
+        Returns:
+            dict: {content_id: score}，索引不可用时为空
+        """
+        if not content_ids or not _term_index_exists(db.session.connection()):
+            return {}
+        
+        document_frequency = dict(
+            db.session.query(TermDocumentFrequency.term, TermDocumentFrequency.df)
+            .filter(TermDocumentFrequency.term.in_(keywords))
+            .all()
+        )
+        if not document_frequency:
+            return {}
+        
+        total_docs = db.session.query(func.count(Content.id)).scalar() or 0
+        idf = {}
+        for term, df in document_frequency.items():
+            weight = math.log((total_docs - df + 0.5) / (df + 0.5) + 1)
+            # 几乎每篇内容都包含的词对排序没有区分度，直接跳过
+            if weight >= self.MIN_TERM_IDF:
+                idf[term] = weight
+        if not idf:
+            return {}
+        
+        avg_doc_len = self._average_doc_length()
+        
+        field_weight = case(
+            {field: round(self.weights[field] * 10, 2) for field in FTS_COLUMNS},
+            value=ContentTerm.field,
+            else_=0
+        )
+        term_idf = case(idf, value=ContentTerm.term, else_=0)
+        k1, b = self.BM25_K1, self.BM25_B
+        saturated_tf = ContentTerm.tf * (k1 + 1) / (
+            ContentTerm.tf + k1 * (1 - b + b * ContentTerm.doc_len / avg_doc_len)
+        )
+        
+        rows = db.session.query(
+            ContentTerm.content_id,
+            func.sum(term_idf * field_weight * saturated_tf)
+        ).filter(
+            ContentTerm.content_id.in_(content_ids),
+            ContentTerm.term.in_(list(idf))
+        ).group_by(ContentTerm.content_id).all()
+        
+        return {content_id: float(score or 0) for content_id, score in rows}
+    
+    def _average_doc_length(self):
+        """
+        倒排索引中内容的平均文档长度
         
-        return round(score, 2)
+        需要扫描整个倒排索引表，结果缓存到下次写入索引为止（超时后也会重新统计）
+        """
+        avg_doc_len = cache.get(AVG_DOC_LEN_CACHE_KEY)
+        if avg_doc_len is not None:
+            return avg_doc_len
+        
+        doc_lengths = db.session.query(
+            func.max(ContentTerm.doc_len).label('doc_len')
+        ).group_by(ContentTerm.content_id).subquery()
+        avg_doc_len = db.session.query(func.avg(doc_lengths.c.doc_len)).scalar()
+        avg_doc_len = float(avg_doc_len or 0) or 1.0
+        
+        cache.set(AVG_DOC_LEN_CACHE_KEY, avg_doc_len)
+        return avg_doc_len
     
     def _calculate_semantic_score(self, content, keywords):
-        """计算语义相关度"""
+        """计算语义相关度（keywords 须为小写的 (关键词, 权重) 列表）"""
         score = 0
+        title = _lowercase_field(content, 'title')
+        summary = _lowercase_field(content, 'summary')
+        body = _lowercase_field(content, 'content')
         
         for keyword, weight in keywords:
             # 标题权重更高
-            if keyword in content.title.lower():
+            if keyword in title:
                 score += weight * 0.5
             
             # 摘要权重中等
-            if content.summary and keyword in content.summary.lower():
+            if keyword in summary:
                 score += weight * 0.3
             
             # 内容权重较低
-            if content.content and keyword in content.content.lower():
+            if keyword in body:
                 score += weight * 0.2
         
         return round(score, 3)
@@ -376,27 +963,11 @@ class SearchEngine:
         highlights = {}
         
         # 高亮标题
-        highlighted_title = content.title
-        for keyword in keywords:
-            highlighted_title = re.sub(
-                f'({re.escape(keyword)})', 
-                r'<mark>\1</mark>', 
-                highlighted_title, 
-                flags=re.IGNORECASE
-            )
-        highlights['title'] = highlighted_title
+        highlights['title'] = _highlight(content.title, keywords)
         
         # 高亮摘要
         if content.summary:
-            highlighted_summary = content.summary
-            for keyword in keywords:
-                highlighted_summary = re.sub(
-                    f'({re.escape(keyword)})', 
-                    r'<mark>\1</mark>', 
-                    highlighted_summary, 
-                    flags=re.IGNORECASE
-                )
-            highlights['summary'] = highlighted_summary
+            highlights['summary'] = _highlight(content.summary, keywords)
         
         # 生成内容片段（带高亮）
         if content.content:
@@ -407,76 +978,87 @@ class SearchEngine:
     
     def _generate_content_snippet(self, content_text, keywords, max_length=200):
         """生成内容摘要片段"""
-        # 寻找包含关键词的句子
-        sentences = re.split(r'[。！？.!?]', content_text)
-        
-        best_sentence = ""
+        # 逐句扫描寻找包含关键词最多的句子，只记录最佳句子的位置，不切分整篇正文
+        pattern = _keyword_pattern(tuple(keywords)) if keywords else None
+        best_span = None
         max_keyword_count = 0
         
-        for sentence in sentences:
-            keyword_count = sum(1 for keyword in keywords if keyword in sentence.lower())
+        for sentence in _SENTENCE_PATTERN.finditer(content_text):
+            if best_span is None:
+                best_span = sentence.span()
+            if pattern is None:
+                break
+            
+            keyword_count = len({
+                match.group().lower()
+                for match in pattern.finditer(content_text, sentence.start(), sentence.end())
+            })
             if keyword_count > max_keyword_count:
                 max_keyword_count = keyword_count
-                best_sentence = sentence
+                best_span = sentence.span()
         
-        if not best_sentence and sentences:
-            best_sentence = sentences[0]
+        best_sentence = content_text[best_span[0]:best_span[1]] if best_span else ""
         
         # 截断到指定长度
         if len(best_sentence) > max_length:
             best_sentence = best_sentence[:max_length] + "..."
         
         # 添加高亮
-        highlighted_snippet = best_sentence
-        for keyword in keywords:
-            highlighted_snippet = re.sub(
-                f'({re.escape(keyword)})', 
-                r'<mark>\1</mark>', 
-                highlighted_snippet, 
-                flags=re.IGNORECASE
-            )
-        
-        return highlighted_snippet
+        return _highlight(best_sentence, keywords)
     
     def _get_related_by_tags(self, content, limit):
         """基于标签的相关内容"""
-        if not content.tags:
+        query = self._related_by_tags_query(content)
+        if query is None:
+            return []
+        return query.options(selectinload(Content.tags)).limit(limit).all()
+    
+    def _get_related_by_category(self, content, limit):
+        """基于分类的相关内容"""
+        return self._related_by_category_query(content)\
+               .options(selectinload(Content.tags))\
+               .limit(limit).all()
+    
+    def _get_related_by_keywords(self, content, limit):
+        """基于关键词的相关内容"""
+        query = self._related_by_keywords_query(content)
+        if query is None:
             return []
+        return query.options(selectinload(Content.tags)).limit(limit).all()
+    
+    def _related_by_tags_query(self, content):
+        """构建基于标签的相关内容查询（按共同标签数排序，不含LIMIT），无标签时返回None"""
+        if not content.tags:
+            return None
         
         tag_ids = [tag.id for tag in content.tags]
         
-        from app import db
-        
-        related = db.session.query(Content)\
-                   .join(content_tags)\
-                   .filter(content_tags.c.tag_id.in_(tag_ids))\
-                   .filter(Content.id != content.id)\
-                   .filter(Content.is_published == True)\
-                   .group_by(Content.id)\
-                   .order_by(db.func.count(content_tags.c.tag_id).desc(), Content.created_at.desc())\
-                   .limit(limit).all()
-        
-        return related
+        return db.session.query(Content)\
+                 .join(content_tags)\
+                 .filter(content_tags.c.tag_id.in_(tag_ids))\
+                 .filter(Content.id != content.id)\
+                 .filter(Content.is_published == True)\
+                 .group_by(Content.id)\
+                 .order_by(db.func.count(content_tags.c.tag_id).desc(), Content.created_at.desc())
     
-    def _get_related_by_category(self, content, limit):
-        """基于分类的相关内容"""
+    def _related_by_category_query(self, content):
+        """构建基于分类的相关内容查询（不含LIMIT）"""
         return Content.query\
                .filter(Content.category == content.category)\
                .filter(Content.id != content.id)\
                .filter(Content.is_published == True)\
-               .order_by(desc(Content.view_count), desc(Content.created_at))\
-               .limit(limit).all()
+               .order_by(desc(Content.view_count), desc(Content.created_at))
     
-    def _get_related_by_keywords(self, content, limit):
-        """基于关键词的相关内容"""
+    def _related_by_keywords_query(self, content):
+        """构建基于关键词的相关内容查询（不含LIMIT），无可用关键词时返回None"""
         if not content.content:
-            return []
+            return None
         
-        # 从当前内容提取关键词
-        keywords = jieba.analyse.extract_tags(content.title + " " + content.content, topK=5)
+        # 使用保存内容时提取的关键词
+        keywords = [word for word, weight in content.get_extracted_keywords(limit=5)]
         
         if not keywords:
-            return []
+            return None
         
         # 搜索包含这些关键词的其他内容
         search_conditions = []
@@ -488,58 +1070,103 @@ class SearchEngine:
                 )
             )
         
-        if search_conditions:
-            related = Content.query\
-                     .filter(Content.id != content.id)\
-                     .filter(Content.is_published == True)\
-                     .filter(or_(*search_conditions))\
-                     .order_by(desc(Content.view_count), desc(Content.created_at))\
-                     .limit(limit).all()
-            return related
-        
-        return []
+        return Content.query\
+               .filter(Content.id != content.id)\
+               .filter(Content.is_published == True)\
+               .filter(or_(*search_conditions))\
+               .order_by(desc(Content.view_count), desc(Content.created_at))
     
     def _get_related_mixed(self, content, limit):
         """混合推荐算法"""
-        related_contents = {}
-        
-        # 基于标签的相关内容（权重最高）
-        tag_related = self._get_related_by_tags(content, limit * 2)
-        for item in tag_related:
-            related_contents[item.id] = {
-                'content': item,
-                'score': 10,  # 标签匹配权重最高
-                'reason': 'tags'
-            }
+        return self._load_in_order([content_id for content_id, score in self._rank_related_mixed(content, limit)])
+    
+    def _rank_related_mixed(self, content, limit):
+        """
+        混合推荐排名
         
-        # 基于分类的相关内容
-        category_related = self._get_related_by_category(content, limit)
-        for item in category_related:
-            if item.id in related_contents:
-                related_contents[item.id]['score'] += 5
-            else:
-                related_contents[item.id] = {
-                    'content': item,
-                    'score': 5,
-                    'reason': 'category'
-                }
-        
-        # 基于关键词的相关内容
-        keyword_related = self._get_related_by_keywords(content, limit)
-        for item in keyword_related:
-            if item.id in related_contents:
-                related_contents[item.id]['score'] += 3
-            else:
-                related_contents[item.id] = {
-                    'content': item,
-                    'score': 3,
-                    'reason': 'keywords'
-                }
+        标签、分类、关键词三路候选通过 UNION ALL 合并为一条查询，
+        在数据库内按权重求和排序
+        
+        Returns:
+            list: [(content_id, score), ...]
+        """
+        branches = [
+            (self._related_by_tags_query(content), limit * 2, 10),  # 标签匹配权重最高
+            (self._related_by_category_query(content), limit, 5),
+            (self._related_by_keywords_query(content), limit, 3)
+        ]
+        
+        selects = []
+        for query, branch_limit, weight in branches:
+            if query is None:
+                continue
+            candidates = query.with_entities(
+                Content.id.label('id'),
+                literal(weight).label('weight')
+            ).limit(branch_limit).subquery()
+            selects.append(select(candidates.c.id, candidates.c.weight))
+        
+        if not selects:
+            return []
+        
+        related = union_all(*selects).subquery()
+        score = func.sum(related.c.weight).label('score')
+        rows = db.session.execute(
+            select(related.c.id, score)
+            .group_by(related.c.id)
+            .order_by(desc(score), desc(func.max(related.c.weight)), desc(related.c.id))
+            .limit(limit)
+        ).all()
+        
+        return [(row.id, row.score) for row in rows]
+    
+    def _get_saved_related(self, content, limit):
+        """
+        读取保存的混合推荐结果，尚未保存时计算前 RELATED_CACHE_SIZE 条并写入
         
-        # 按评分排序并返回
-        sorted_related = sorted(related_contents.values(), key=lambda x: x['score'], reverse=True)
+        结果通过独立连接单独提交，不提交请求会话（避免会话中的对象过期）
+        """
+        if not _related_table_exists(db.session.connection()):
+            return self._get_related_mixed(content, limit)
         
-        return [item['content'] for item in sorted_related[:limit]]
+        related_ids = [
+            related_id for related_id, in db.session.query(ContentRelated.related_id)
+            .filter(ContentRelated.content_id == content.id)
+            .order_by(ContentRelated.rank)
+            .limit(limit)
+        ]
+        if related_ids:
+            return self._load_in_order(related_ids)
+        
+        ranked = self._rank_related_mixed(content, self.RELATED_CACHE_SIZE)
+        if ranked and db.engine.url.database not in (None, '', ':memory:'):
+            # 内存数据库的所有连接共用同一个底层连接，单独提交会连带提交请求会话，因此不保存
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(ContentRelated.__table__.insert(), [
+                        {'content_id': content.id, 'rank': rank, 'related_id': related_id, 'score': score}
+                        for rank, (related_id, score) in enumerate(ranked)
+                    ])
+            except IntegrityError:
+                # 并发请求已写入同一内容的结果，直接使用本次计算的结果
+                pass
+            except DBAPIError as e:
+                # 数据库被锁定或相关内容表缺失等，之后每次请求都会重新计算，需要在日志中可见
+                current_app.logger.warning(f"保存相关内容失败，本次使用现场计算的结果：{str(e)}")
+        
+        return self._load_in_order([related_id for related_id, score in ranked[:limit]])
+    
+    def _load_in_order(self, content_ids):
+        """按给定ID顺序加载内容（含标签）"""
+        if not content_ids:
+            return []
+        
+        contents = {
+            item.id: item
+            for item in Content.query.options(selectinload(Content.tags))
+            .filter(Content.id.in_(content_ids)).all()
+        }
+        return [contents[content_id] for content_id in content_ids if content_id in contents]
     
     def _empty_result(self):
         """空搜索结果"""
@@ -562,17 +1189,126 @@ class SearchIndexer:
     def __init__(self):
         self.engine = SearchEngine()
     
+    def rebuild_index(self):
+        """
+        回填内容的搜索字段并重建当前数据库使用的搜索索引（用于索引建立前已存在的数据库）
+        
+        Returns:
+            int: 已索引的内容数量
+        """
+        self.refresh_content_fields()
+        
+        connection = db.session.connection()
+        _clear_related(connection)
+        if _ensure_fts(connection):
+            return self.rebuild_fts_index()
+        return self.rebuild_term_index()
+    
+    def upgrade_schema(self):
+        """
+        为旧数据库补齐搜索功能新增的列和表（create_all 不会修改已存在的表）
+        
+        Returns:
+            list: 本次新增的列名和表名
+        """
+        connection = db.session.connection()
+        table = Content.__table__
+        existing = {column['name'] for column in inspect(connection).get_columns(table.name)}
+        
+        added = []
+        for name in SEARCH_CONTENT_COLUMNS:
+            if name in existing:
+                continue
+            column_type = table.c[name].type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+            added.append(f'{table.name}.{name}')
+        
+        # 倒排索引表、相关内容表整表新增，只创建缺少的表
+        index_tables = [model.__table__ for model in (ContentTerm, TermDocumentFrequency, ContentRelated)]
+        missing_tables = [index_table for index_table in index_tables
+                          if not inspect(connection).has_table(index_table.name)]
+        if missing_tables:
+            db.metadata.create_all(bind=connection, tables=missing_tables)
+            added.extend(index_table.name for index_table in missing_tables)
+        
+        db.session.commit()
+        return added
+    
+    def refresh_content_fields(self):
+        """
+        回填各内容保存时生成的搜索字段（小写副本、关键词），用于这些字段加入前保存的旧数据
+        
+        Returns:
+            int: 已处理的内容数量
+        """
+        contents = Content.query.options(undefer(Content.content_lc)).all()
+        for content in contents:
+            content.sync_lowercase_fields()
+            content.extracted_keywords = content.extract_keywords()
+        
+        db.session.flush()
+        return len(contents)
+    
+    def rebuild_fts_index(self):
+        """
+        重建SQLite FTS5全文索引
+        
+        Returns:
+            int: 已索引的内容数量；当前数据库不支持FTS5时返回0
+        """
+        connection = db.session.connection()
+        if not _ensure_fts(connection):
+            return 0
+        
+        connection.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        contents = Content.query.options(selectinload(Content.tags)).all()
+        for content in contents:
+            _write_fts_row(connection, content.id, _content_fields(content))
+        
+        db.session.commit()
+        return len(contents)
+    
+    def rebuild_term_index(self):
+        """
+        重建 content_term/term_df 倒排索引
+        
+        Returns:
+            int: 已索引的内容数量；索引表不存在时返回0
+        """
+        connection = db.session.connection()
+        if not _term_index_exists(connection):
+            return 0
+        
+        term_table = ContentTerm.__table__
+        df_table = TermDocumentFrequency.__table__
+        connection.execute(term_table.delete())
+        connection.execute(df_table.delete())
+        cache.delete(AVG_DOC_LEN_CACHE_KEY)
+        
+        contents = Content.query.options(selectinload(Content.tags)).all()
+        for content in contents:
+            _write_term_rows(connection, content.id, _content_fields(content), update_df=False)
+        
+        # 文档频率在全部词项写入后一次性统计
+        connection.execute(df_table.insert().from_select(
+            ['term', 'df'],
+            select(term_table.c.term, func.count(func.distinct(term_table.c.content_id)))
+            .group_by(term_table.c.term)
+        ))
+        
+        db.session.commit()
+        return len(contents)
+    
     def build_search_index(self):
-        """构建搜索索引（为将来全文搜索优化准备）"""
+        """重建搜索索引，并返回各内容的关键词摘要"""
+        self.rebuild_index()
+        
         contents = Content.query.filter_by(is_published=True).all()
         
         index_data = []
         for content in contents:
-            # 提取所有文本内容
-            full_text = f"{content.title} {content.summary or ''} {content.content or ''}"
-            
-            # 分词
-            keywords = jieba.analyse.extract_tags(full_text, topK=20, withWeight=True)
+            # 使用保存内容时提取的关键词
+            keywords = [tuple(keyword) for keyword in content.get_extracted_keywords()]
             
             # 构建索引条目
             index_entry = {
@@ -591,10 +1327,18 @@ class SearchIndexer:
         return index_data
     
     def update_content_index(self, content_id):
-        """更新单个内容的索引"""
-        # 这里可以实现增量索引更新
-        # 为将来的性能优化准备
-        pass
+        """
+        手动更新单个内容的索引
+        
+        内容新建、编辑和删除时已由模型事件自动增量更新，此方法用于修复个别内容的索引
+        """
+        content = Content.query.get(content_id)
+        if not content:
+            return False
+        
+        _index_content(db.session.connection(), content)
+        db.session.commit()
+        return True
 
 
 # 全局搜索引擎实例
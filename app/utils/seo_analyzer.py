@@ -2,31 +2,225 @@
 🔍 SEO 分析工具
 提供全面的SEO分析功能，包括关键词分析、内容质量评估、技术SEO检查
 """
+import os
 import re
+import sys
+from bisect import bisect_left
 import json
+import hashlib
+import heapq
+import threading
 from datetime import datetime
 from urllib.parse import urlparse
-from collections import Counter
-import jieba
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
+from itertools import chain, islice
+from operator import itemgetter
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound
+
+# 优先使用C实现的 jieba_fast（接口与 jieba 一致），未安装时使用 jieba
+try:
+    import jieba_fast as jieba
+except ImportError:
+    import jieba
+
+# 词典缓存文件可通过 JIEBA_CACHE_FILE 指定到持久目录（默认位于系统临时目录），
+# 可选的 JIEBA_USER_DICT 用于加载站点专有词汇。导入时加载词典，避免首次分析请求承担加载延迟；
+# 配合 gunicorn --preload 在 fork 前完成加载，各 worker 共享同一份内存页
+if os.environ.get('JIEBA_CACHE_FILE'):
+    jieba.dt.cache_file = os.environ['JIEBA_CACHE_FILE']
+jieba.initialize()
+if os.environ.get('JIEBA_USER_DICT'):
+    jieba.load_userdict(os.environ['JIEBA_USER_DICT'])
+
+# 优先使用 orjson 序列化JSON报告（未安装时使用标准库 json）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(data):
+    """序列化为缩进2格、保留中文字符的JSON字符串"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+# 预编译的正则表达式（模块加载时编译一次，分析时直接复用）
+_LINK_RE = re.compile(r'\[.*?\]\(.*?\)')
+_IMG_RE = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+# 标题与列表（沿用原有的计数规则：h1 也计入 ##、### 行以及行中的 "C# " 等）
+_HEADING_RES = (
+    ('h1', re.compile(r'#\s+.*')),
+    ('h2', re.compile(r'##\s+.*')),
+    ('h3', re.compile(r'###\s+.*')),
+)
+_LIST_RE = re.compile(r'^\s*[-*+]\s+.*', re.MULTILINE)
+# 句子：以非空白字符开头和结尾、不含句末标点的片段（等价于按标点切分后 strip 并去掉空句）
+_SENTENCE_RE = re.compile(r'[^。！？.!?\s](?:[^。！？.!?]*[^。！？.!?\s])?')
+_PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+_NON_SPACE_RE = re.compile(r'\S')
+_TRAILING_SPACE_RE = re.compile(r'\s*\Z')
+_CJK_RUN_RE = re.compile(r'[\u4e00-\u9fff]+')
+_URL_CLEAN_RE = re.compile(r'[a-zA-Z0-9\-_/]')
+_EN_WORD_RE = re.compile(r'\b[a-zA-Z]{2,}\b')
+
+# 停用词（模块级常量，分词缓存与各分析器实例共用）
+_STOP_WORDS = frozenset({
+    '的', '了', '是', '在', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说',
+    '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这', '那', '这个', '那个', '什么', '怎么',
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'
+})
+
+# 评分表：(上限(含), 得分, 评级, 问题提示)，按上限升序排列，用二分查找定位所在区间
+def _build_grid(*rows):
+    """构建评分表，同时生成供二分查找的上限元组"""
+    return tuple(row[0] for row in rows), rows
+
+
+_TITLE_LENGTH_GRID = _build_grid(
+    (9, 5, 'too_short', '标题过短，缺乏描述性'),
+    (60, 15, 'optimal', None),
+    (70, 12, 'good', '标题稍长，可能在搜索结果中被截断'),
+    (float('inf'), 8, 'too_long', '标题过长，将在搜索结果中被截断'),
+)
+_DESCRIPTION_LENGTH_GRID = _build_grid(
+    (119, 8, 'too_short', '元描述过短，建议扩充到120-160字符'),
+    (160, 15, 'optimal', None),
+    (200, 12, 'good', '元描述稍长，可能在搜索结果中被截断'),
+    (float('inf'), 5, 'too_long', '元描述过长，将在搜索结果中被截断'),
+)
+_CONTENT_LENGTH_GRID = _build_grid(
+    (299, 5, 'too_short', '内容长度不足，建议增加到300字符以上'),
+    (499, 8, 'adequate', None),
+    (float('inf'), 10, 'good', None),
+)
+_SENTENCE_LENGTH_GRID = _build_grid(
+    (20, 5, 'good', None),
+    (30, 3, 'adequate', None),
+    (float('inf'), 0, 'too_long', '句子平均长度过长，建议使用更短的句子'),
+)
+
+
+def _grade(value, grid):
+    """在评分表中查找数值所在区间，返回 (得分, 评级, 问题提示)"""
+    bounds, rows = grid
+    _, score, rating, issue = rows[bisect_left(bounds, value)]
+    return score, rating, issue
+
+
+def _scan_markdown(content):
+    """
+    统计Markdown结构：各项均用预编译正则逐个匹配计数，不生成匹配结果列表
+    
+    Returns:
+        dict: {h1, h2, h3, lists, links, images_total, images_with_alt}
+    """
+    structure = {key: sum(1 for _ in pattern.finditer(content)) for key, pattern in _HEADING_RES}
+    structure['lists'] = sum(1 for _ in _LIST_RE.finditer(content))
+    structure['links'] = sum(1 for _ in _LINK_RE.finditer(content))
+    
+    images_total = images_with_alt = 0
+    for image in _IMG_RE.finditer(content):
+        images_total += 1
+        if image.group(1).strip():
+            images_with_alt += 1
+    structure['images_total'] = images_total
+    structure['images_with_alt'] = images_with_alt
+    
+    return structure
+
+
+# 当天日期字符串缓存：(日期, 驻留后的 'YYYY-MM-DD' 字符串)
+_today_cache = (None, None)
+
+
+def _today_str():
+    """返回当天日期字符串，同一天内所有站点地图条目共用同一个字符串对象"""
+    global _today_cache
+    today = datetime.now().date()
+    cached_date, cached_str = _today_cache
+    if cached_date != today:
+        cached_str = sys.intern(today.strftime('%Y-%m-%d'))
+        _today_cache = (today, cached_str)
+    return cached_str
+
+
+def _parse_html(markup):
+    """解析HTML，优先使用C实现的lxml解析器，未安装时使用内置解析器"""
+    try:
+        return BeautifulSoup(markup, 'lxml')
+    except FeatureNotFound:
+        return BeautifulSoup(markup, 'html.parser')
+
+
+# 分词结果缓存：{文本摘要: 词汇元组}，按LRU淘汰（以摘要为键，缓存中不保留原文）
+# 分词是分析中最耗时的一步；完整分析结果不缓存，深拷贝结果的开销与重新分析相当
+_WORDS_CACHE_SIZE = 1024
+_words_cache = OrderedDict()
+_words_lock = threading.Lock()
+
+
+def _extract_words_cached(text):
+    """提取文本中的词汇（按文本摘要缓存分词结果，返回不可变元组）"""
+    cache_key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    
+    with _words_lock:
+        words = _words_cache.get(cache_key)
+        if words is not None:
+            _words_cache.move_to_end(cache_key)
+    if words is not None:
+        return words
+    
+    stop_words = _STOP_WORDS
+    
+    # 中文分词（分词与过滤在同一个生成器中完成，不生成中间列表）
+    chinese_words = tuple(word for word in jieba.cut(text) if len(word) > 1 and word not in stop_words)
+    
+    # 英文分词
+    english_words = tuple(word for word in _EN_WORD_RE.findall(text.lower()) if word not in stop_words)
+    
+    words = chinese_words + english_words
+    with _words_lock:
+        _words_cache[cache_key] = words
+        _words_cache.move_to_end(cache_key)
+        while len(_words_cache) > _WORDS_CACHE_SIZE:
+            _words_cache.popitem(last=False)
+    
+    return words
 
 
 class SEOAnalyzer:
-    """SEO分析器"""
+    """SEO分析器（无请求相关状态，全局共用 seo_analyzer 实例即可）"""
+    
+    __slots__ = ('stop_words', 'max_content_length')
+    
+    # 竞争对手页面最多读取的字节数
+    COMPETITOR_MAX_BYTES = 2 * 1024 * 1024
+    
+    # 参与分析的最大内容长度（字符），超出部分不再影响SEO各项指标
+    MAX_CONTENT_LENGTH = 200000
     
     def __init__(self):
-        self.stop_words = set([
-            '的', '了', '是', '在', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说',
-            '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这', '那', '这个', '那个', '什么', '怎么',
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'
-        ])
+        self.stop_words = _STOP_WORDS
+        self.max_content_length = self.MAX_CONTENT_LENGTH
     
     def analyze_content(self, content, title="", meta_description="", url=""):
         """
         全面分析内容的SEO质量
-        返回详细的分析报告
+        返回详细的分析报告（标题和正文的分词结果按文本摘要缓存）
         """
+        # 超长内容截断后再分析，避免对异常大的文本分词
+        if content and len(content) > self.max_content_length:
+            content = content[:self.max_content_length]
+        
+        return self._analyze_content(content, title, meta_description, url)
+    
+    def _analyze_content(self, content, title, meta_description, url):
+        """执行全部分析项并生成报告"""
         analysis = {
             'score': 0,
             'max_score': 100,
@@ -39,17 +233,21 @@ class SEOAnalyzer:
             'meta_analysis': {}
         }
         
+        # 标题和正文各分词一次，供内容、关键词和标题分析共用
+        title_words = _extract_words_cached(title.lower()) if title else ()
+        content_words = _extract_words_cached(content.lower()) if content else ()
+        
         # 1. 标题分析 (20分)
-        title_score = self._analyze_title(title, analysis)
+        title_score = self._analyze_title(title, title_words, analysis)
         
         # 2. 元描述分析 (15分)
         meta_score = self._analyze_meta_description(meta_description, analysis)
         
         # 3. 内容分析 (25分)
-        content_score = self._analyze_content_body(content, analysis)
+        content_score = self._analyze_content_body(content, content_words, analysis)
         
         # 4. 关键词分析 (20分)
-        keyword_score = self._analyze_keywords(content, title, analysis)
+        keyword_score = self._analyze_keywords(content_words, title_words, analysis)
         
         # 5. 可读性分析 (10分)
         readability_score = self._analyze_readability(content, analysis)
@@ -65,7 +263,7 @@ class SEOAnalyzer:
         
         return analysis
     
-    def _analyze_title(self, title, analysis):
+    def _analyze_title(self, title, title_words, analysis):
         """分析标题质量"""
         score = 0
         
@@ -77,24 +275,14 @@ class SEOAnalyzer:
         title_len = len(title)
         
         # 标题长度分析
-        if 10 <= title_len <= 60:
-            score += 15
-            analysis['meta_analysis']['title_length'] = 'optimal'
-        elif 60 < title_len <= 70:
-            score += 12
-            analysis['issues'].append('标题稍长，可能在搜索结果中被截断')
-            analysis['meta_analysis']['title_length'] = 'good'
-        elif title_len < 10:
-            score += 5
-            analysis['issues'].append('标题过短，缺乏描述性')
-            analysis['meta_analysis']['title_length'] = 'too_short'
-        else:
-            score += 8
-            analysis['issues'].append('标题过长，将在搜索结果中被截断')
-            analysis['meta_analysis']['title_length'] = 'too_long'
+        length_score, rating, issue = _grade(title_len, _TITLE_LENGTH_GRID)
+        score += length_score
+        if issue:
+            analysis['issues'].append(issue)
+        analysis['meta_analysis']['title_length'] = rating
         
         # 标题关键词分析
-        if self._has_meaningful_keywords(title):
+        if self._has_meaningful_keywords(title_words):
             score += 5
             analysis['meta_analysis']['title_keywords'] = 'good'
         else:
@@ -118,28 +306,18 @@ class SEOAnalyzer:
         desc_len = len(meta_description)
         
         # 元描述长度分析
-        if 120 <= desc_len <= 160:
-            score += 15
-            analysis['meta_analysis']['description_length'] = 'optimal'
-        elif 160 < desc_len <= 200:
-            score += 12
-            analysis['issues'].append('元描述稍长，可能在搜索结果中被截断')
-            analysis['meta_analysis']['description_length'] = 'good'
-        elif desc_len < 120:
-            score += 8
-            analysis['issues'].append('元描述过短，建议扩充到120-160字符')
-            analysis['meta_analysis']['description_length'] = 'too_short'
-        else:
-            score += 5
-            analysis['issues'].append('元描述过长，将在搜索结果中被截断')
-            analysis['meta_analysis']['description_length'] = 'too_long'
+        length_score, rating, issue = _grade(desc_len, _DESCRIPTION_LENGTH_GRID)
+        score += length_score
+        if issue:
+            analysis['issues'].append(issue)
+        analysis['meta_analysis']['description_length'] = rating
         
         analysis['meta_analysis']['description'] = meta_description
         analysis['meta_analysis']['description_character_count'] = desc_len
         
         return score
     
-    def _analyze_content_body(self, content, analysis):
+    def _analyze_content_body(self, content, content_words, analysis):
         """分析内容主体质量"""
         score = 0
         
@@ -148,26 +326,24 @@ class SEOAnalyzer:
             return score
         
         # 内容长度分析
-        word_count = len(self._extract_words(content))
-        char_count = len(content.replace(' ', '').replace('\n', ''))
+        word_count = len(content_words)
+        # 统计空格和换行以外的字符数，用 count 计数而不复制整篇内容
+        char_count = len(content) - content.count(' ') - content.count('\n')
         
-        if char_count >= 500:
-            score += 10
-            analysis['content_analysis']['length'] = 'good'
-        elif char_count >= 300:
-            score += 8
-            analysis['content_analysis']['length'] = 'adequate'
-        else:
-            score += 5
-            analysis['issues'].append('内容长度不足，建议增加到300字符以上')
-            analysis['content_analysis']['length'] = 'too_short'
+        length_score, rating, issue = _grade(char_count, _CONTENT_LENGTH_GRID)
+        score += length_score
+        if issue:
+            analysis['issues'].append(issue)
+        analysis['content_analysis']['length'] = rating
+        
+        structure = _scan_markdown(content)
         
         # 内容结构分析
-        structure_score = self._analyze_content_structure(content, analysis)
+        structure_score = self._analyze_content_structure(structure, analysis)
         score += structure_score
         
         # 图片分析
-        image_score = self._analyze_images(content, analysis)
+        image_score = self._analyze_images(structure, analysis)
         score += image_score
         
         analysis['content_analysis']['word_count'] = word_count
@@ -175,14 +351,14 @@ class SEOAnalyzer:
         
         return score
     
-    def _analyze_content_structure(self, content, analysis):
-        """分析内容结构"""
+    def _analyze_content_structure(self, structure, analysis):
+        """分析内容结构（structure 为 _scan_markdown 的统计结果）"""
         score = 0
         
-        # 检查标题标签
-        h1_count = len(re.findall(r'#\s+.*', content))
-        h2_count = len(re.findall(r'##\s+.*', content))
-        h3_count = len(re.findall(r'###\s+.*', content))
+        # 检查标题标签（按行首的 # 数量区分级别，H2/H3 不计入 H1）
+        h1_count = structure['h1']
+        h2_count = structure['h2']
+        h3_count = structure['h3']
         
         if h1_count > 0:
             score += 3
@@ -199,7 +375,7 @@ class SEOAnalyzer:
             analysis['content_analysis']['has_h2'] = False
         
         # 检查列表
-        list_count = len(re.findall(r'^\s*[-*+]\s+.*', content, re.MULTILINE))
+        list_count = structure['lists']
         if list_count > 0:
             score += 2
             analysis['content_analysis']['has_lists'] = True
@@ -208,7 +384,7 @@ class SEOAnalyzer:
             analysis['content_analysis']['has_lists'] = False
         
         # 检查链接
-        link_count = len(re.findall(r'\[.*?\]\(.*?\)', content))
+        link_count = structure['links']
         if link_count > 0:
             score += 2
             analysis['content_analysis']['has_links'] = True
@@ -226,58 +402,54 @@ class SEOAnalyzer:
         
         return score
     
-    def _analyze_images(self, content, analysis):
-        """分析图片使用"""
+    def _analyze_images(self, structure, analysis):
+        """分析图片使用（structure 为 _scan_markdown 的统计结果）"""
         score = 0
         
         # 检查Markdown图片
-        image_pattern = r'!\[([^\]]*)\]\(([^)]+)\)'
-        images = re.findall(image_pattern, content)
+        image_count = structure['images_total']
         
-        if images:
+        if image_count:
             score += 3
             analysis['content_analysis']['has_images'] = True
             
             # 检查Alt文本
-            images_with_alt = [img for img in images if img[0].strip()]
-            if len(images_with_alt) == len(images):
+            images_with_alt = structure['images_with_alt']
+            if images_with_alt == image_count:
                 score += 2
                 analysis['content_analysis']['images_have_alt'] = True
             else:
-                analysis['issues'].append(f'{len(images) - len(images_with_alt)} 个图片缺少Alt文本')
+                analysis['issues'].append(f'{image_count - images_with_alt} 个图片缺少Alt文本')
                 analysis['content_analysis']['images_have_alt'] = False
         else:
             analysis['recommendations'].append('添加相关图片来提高内容丰富度')
             analysis['content_analysis']['has_images'] = False
         
-        analysis['content_analysis']['image_count'] = len(images)
+        analysis['content_analysis']['image_count'] = image_count
         
         return score
     
-    def _analyze_keywords(self, content, title, analysis):
+    def _analyze_keywords(self, content_words, title_words, analysis):
         """关键词密度分析"""
         score = 0
         
-        # 提取所有文本
-        full_text = f"{title} {content}"
-        words = self._extract_words(full_text.lower())
+        # 标题和正文的分词结果按顺序串联遍历，不拼接成新的元组
+        total_words = len(title_words) + len(content_words)
         
-        if not words:
+        if not total_words:
             return score
         
-        # 计算词频
-        word_freq = Counter(words)
-        total_words = len(words)
+        # 计算词频（只统计可作为关键词的词，分词结果已过滤停用词）
+        word_freq = Counter(word for word in chain(title_words, content_words) if len(word) > 2)
         
-        # 提取关键词
+        # 提取关键词：取前20个只需部分排序
         keywords = {}
-        for word, count in word_freq.most_common(20):
-            if len(word) > 2 and word not in self.stop_words:
-                density = (count / total_words) * 100
-                keywords[word] = {
-                    'count': count,
-                    'density': round(density, 2)
-                }
+        for word, count in heapq.nlargest(20, word_freq.items(), key=itemgetter(1)):
+            density = (count / total_words) * 100
+            keywords[word] = {
+                'count': count,
+                'density': round(density, 2)
+            }
         
         analysis['keywords'] = keywords
         
@@ -305,31 +477,31 @@ class SEOAnalyzer:
         if not content:
             return score
         
-        # 句子分析
-        sentences = re.split(r'[。！？.!?]', content)
-        sentences = [s.strip() for s in sentences if s.strip()]
+        # 句子分析：只根据匹配位置计算长度，不复制句子文本
+        sentence_lengths = [match.end() - match.start() for match in _SENTENCE_RE.finditer(content)]
+        sentence_count = len(sentence_lengths)
         
-        if not sentences:
+        if not sentence_count:
             return score
         
         # 平均句子长度
-        avg_sentence_length = sum(len(s) for s in sentences) / len(sentences)
-        
-        if avg_sentence_length <= 20:
-            score += 5
-            analysis['readability']['sentence_length'] = 'good'
-        elif avg_sentence_length <= 30:
-            score += 3
-            analysis['readability']['sentence_length'] = 'adequate'
-        else:
-            analysis['issues'].append('句子平均长度过长，建议使用更短的句子')
-            analysis['readability']['sentence_length'] = 'too_long'
-        
-        # 段落分析
-        paragraphs = content.split('\n\n')
-        paragraphs = [p.strip() for p in paragraphs if p.strip()]
-        
-        if len(paragraphs) >= 3:
+        avg_sentence_length = sum(sentence_lengths) / sentence_count
+        
+        length_score, rating, issue = _grade(avg_sentence_length, _SENTENCE_LENGTH_GRID)
+        score += length_score
+        if issue:
+            analysis['issues'].append(issue)
+        analysis['readability']['sentence_length'] = rating
+        
+        # 段落分析：只统计首尾非空白字符之间的空行分隔数，不切分出各段落文本
+        paragraph_count = 0
+        first_char = _NON_SPACE_RE.search(content)
+        if first_char:
+            start = first_char.start()
+            end = _TRAILING_SPACE_RE.search(content, start).start()
+            paragraph_count = 1 + sum(1 for _ in _PARAGRAPH_BREAK_RE.finditer(content, start, end))
+        
+        if paragraph_count >= 3:
             score += 3
             analysis['readability']['paragraph_structure'] = 'good'
         else:
@@ -337,8 +509,10 @@ class SEOAnalyzer:
             analysis['readability']['paragraph_structure'] = 'needs_improvement'
         
         # 复杂词汇分析（简化版）
-        complex_words = len(re.findall(r'[\u4e00-\u9fff]{4,}', content))  # 4字以上的中文词汇
-        total_chars = len(re.findall(r'[\u4e00-\u9fff]', content))
+        # 一次扫描取出连续的中文片段，同时得到中文字符总数和4字以上的片段数
+        cjk_runs = _CJK_RUN_RE.findall(content)
+        complex_words = sum(1 for run in cjk_runs if len(run) >= 4)  # 4字以上的中文词汇
+        total_chars = sum(map(len, cjk_runs))
         
         if total_chars > 0:
             complex_ratio = complex_words / total_chars
@@ -350,8 +524,8 @@ class SEOAnalyzer:
                 analysis['readability']['complexity'] = 'complex'
         
         analysis['readability']['avg_sentence_length'] = round(avg_sentence_length, 1)
-        analysis['readability']['paragraph_count'] = len(paragraphs)
-        analysis['readability']['sentence_count'] = len(sentences)
+        analysis['readability']['paragraph_count'] = paragraph_count
+        analysis['readability']['sentence_count'] = sentence_count
         
         return score
     
@@ -369,7 +543,7 @@ class SEOAnalyzer:
                 analysis['technical']['url_length'] = 'too_long'
             
             # URL结构分析
-            if re.search(r'[a-zA-Z0-9\-_/]', url):
+            if _URL_CLEAN_RE.search(url):
                 analysis['technical']['url_structure'] = 'clean'
             else:
                 analysis['recommendations'].append('使用更清晰的URL结构')
@@ -411,42 +585,48 @@ class SEOAnalyzer:
     
     def _extract_words(self, text):
         """提取文本中的词汇"""
-        # 中文分词
-        chinese_words = jieba.lcut(text)
-        chinese_words = [word for word in chinese_words if len(word) > 1 and word not in self.stop_words]
-        
-        # 英文分词
-        english_words = re.findall(r'\b[a-zA-Z]{2,}\b', text.lower())
-        english_words = [word for word in english_words if word not in self.stop_words]
-        
-        return chinese_words + english_words
+        return list(_extract_words_cached(text))
     
-    def _has_meaningful_keywords(self, text):
-        """检查文本是否包含有意义的关键词"""
-        words = self._extract_words(text.lower())
-        meaningful_words = [w for w in words if len(w) > 2 and w not in self.stop_words]
-        return len(meaningful_words) >= 2
+    def _has_meaningful_keywords(self, words):
+        """检查分词结果中是否包含有意义的关键词（已过滤停用词），找到两个即返回"""
+        count = 0
+        for word in words:
+            if len(word) > 2:
+                count += 1
+                if count >= 2:
+                    return True
+        return False
     
     def generate_sitemap_entry(self, url, lastmod=None, changefreq='monthly', priority=0.5):
         """生成站点地图条目"""
         if not lastmod:
-            lastmod = datetime.now().strftime('%Y-%m-%d')
+            lastmod = _today_str()
         
         return {
             'url': url,
             'lastmod': lastmod,
-            'changefreq': changefreq,
+            'changefreq': sys.intern(changefreq),
             'priority': priority
         }
     
     def analyze_competitor(self, competitor_url):
         """竞争对手分析（简化版）"""
         try:
-            response = requests.get(competitor_url, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # 流式读取并限制大小，超大页面只解析前 COMPETITOR_MAX_BYTES 字节
+            chunks = []
+            size = 0
+            with requests.get(competitor_url, timeout=10, stream=True) as response:
+                for chunk in response.iter_content(chunk_size=65536):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= self.COMPETITOR_MAX_BYTES:
+                        break
+            
+            soup = _parse_html(b''.join(chunks))
+            title_tag = soup.find('title')
             
             analysis = {
-                'title': soup.find('title').get_text() if soup.find('title') else '',
+                'title': title_tag.get_text() if title_tag else '',
                 'meta_description': '',
                 'h1_count': len(soup.find_all('h1')),
                 'h2_count': len(soup.find_all('h2')),
@@ -463,6 +643,26 @@ class SEOAnalyzer:
             
         except Exception as e:
             return {'error': f'分析失败: {str(e)}'}
+    
+    def analyze_competitors(self, competitor_urls, max_workers=8):
+        """
+        批量竞争对手分析（并发请求各页面）
+        
+        Args:
+            competitor_urls: 竞争对手URL列表
+            max_workers: 最大并发数
+        
+        Returns:
+            dict: URL到分析结果的映射
+        """
+        urls = list(dict.fromkeys(url for url in competitor_urls if url))
+        if not urls:
+            return {}
+        
+        # 网络等待为主，线程并发即可重叠各页面的请求延迟
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+            futures = {url: executor.submit(self.analyze_competitor, url) for url in urls}
+            return {url: future.result() for url, future in futures.items()}
 
 
 class SEOReportGenerator:
@@ -483,7 +683,13 @@ class SEOReportGenerator:
         else:
             score_color = 'danger'
         
-        html_report = f"""
+        meta_analysis = analysis_data['meta_analysis']
+        content_analysis = analysis_data['content_analysis']
+        title = escape(str(meta_analysis.get('title', '未设置')))
+        description = escape(str(meta_analysis.get('description', '未设置'))[:100])
+        
+        # 各片段依次追加到列表，最后一次性拼接；用户内容均经过HTML转义
+        parts = [f"""
         <div class="seo-report">
             <div class="seo-score-card">
                 <h3>SEO总评分</h3>
@@ -498,21 +704,21 @@ class SEOReportGenerator:
                 <div class="meta-analysis">
                     <h4>元数据分析</h4>
                     <div class="analysis-item">
-                        <strong>标题:</strong> {analysis_data['meta_analysis'].get('title', '未设置')}
-                        <span class="badge bg-secondary">{analysis_data['meta_analysis'].get('title_character_count', 0)} 字符</span>
+                        <strong>标题:</strong> {title}
+                        <span class="badge bg-secondary">{meta_analysis.get('title_character_count', 0)} 字符</span>
                     </div>
                     <div class="analysis-item">
-                        <strong>描述:</strong> {analysis_data['meta_analysis'].get('description', '未设置')[:100]}...
-                        <span class="badge bg-secondary">{analysis_data['meta_analysis'].get('description_character_count', 0)} 字符</span>
+                        <strong>描述:</strong> {description}...
+                        <span class="badge bg-secondary">{meta_analysis.get('description_character_count', 0)} 字符</span>
                     </div>
                 </div>
                 
                 <div class="content-analysis">
                     <h4>内容分析</h4>
                     <div class="stats-grid">
-                        <div>字数统计: {analysis_data['content_analysis'].get('word_count', 0)}</div>
-                        <div>字符数: {analysis_data['content_analysis'].get('character_count', 0)}</div>
-                        <div>图片数量: {analysis_data['content_analysis'].get('image_count', 0)}</div>
+                        <div>字数统计: {content_analysis.get('word_count', 0)}</div>
+                        <div>字符数: {content_analysis.get('character_count', 0)}</div>
+                        <div>图片数量: {content_analysis.get('image_count', 0)}</div>
                         <div>段落数: {analysis_data['readability'].get('paragraph_count', 0)}</div>
                     </div>
                 </div>
@@ -521,14 +727,18 @@ class SEOReportGenerator:
                     <div class="issues">
                         <h4>发现的问题</h4>
                         <ul>
-                            {''.join([f'<li>{issue}</li>' for issue in analysis_data['issues']])}
+                            """]
+        parts.extend(f'<li>{escape(issue)}</li>' for issue in analysis_data['issues'])
+        parts.append("""
                         </ul>
                     </div>
                     
                     <div class="recommendations">
                         <h4>优化建议</h4>
                         <ul>
-                            {''.join([f'<li>{rec}</li>' for rec in analysis_data['recommendations']])}
+                            """)
+        parts.extend(f'<li>{escape(rec)}</li>' for rec in analysis_data['recommendations'])
+        parts.append("""
                         </ul>
                     </div>
                 </div>
@@ -536,16 +746,30 @@ class SEOReportGenerator:
                 <div class="keywords-analysis">
                     <h4>关键词分析</h4>
                     <div class="keywords-list">
-                        {''.join([f'<span class="keyword-badge">{kw} ({data["density"]}%)</span>' for kw, data in list(analysis_data['keywords'].items())[:10]])}
+                        """)
+        parts.extend(
+            f'<span class="keyword-badge">{escape(kw)} ({data["density"]}%)</span>'
+            for kw, data in islice(analysis_data['keywords'].items(), 10)
+        )
+        parts.append("""
                     </div>
                 </div>
             </div>
         </div>
-        """
+        """)
         
-        return html_report
+        return ''.join(parts)
     
     @staticmethod
     def generate_json_report(analysis_data):
         """生成JSON格式的SEO报告"""
-        return json.dumps(analysis_data, ensure_ascii=False, indent=2)
\ No newline at end of file
+        return _dumps(analysis_data)
+
+
+# 全局SEO分析器实例
+seo_analyzer = SEOAnalyzer()
+
+
+def analyze_content(content, title="", meta_description="", url=""):
+    """使用全局分析器分析内容的SEO质量"""
+    return seo_analyzer.analyze_content(content, title, meta_description, url)
@@ -5,57 +5,142 @@
 import re
 import unicodedata
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 from pypinyin import lazy_pinyin, Style
 
 
+# 预编译的正则表达式
+_CHINESE_RE = re.compile(r'[\u4e00-\u9fff]+')
+_SLUG_WORD_RE = re.compile(r'[a-zA-Z0-9]+')
+
+# ASCII字节表：字母数字保持不变，其余字节统一映射为连字符
+_SLUG_BYTE_TABLE = bytes(
+    byte if chr(byte).isascii() and chr(byte).isalnum() else 0x2d
+    for byte in range(256)
+)
+_VALID_SLUG_RE = re.compile(r'^[a-z0-9-]+$')
+
+# 特殊字符替换表：有对应英文单词的替换为 -单词-，其余替换为连字符
+_SPECIAL_CHAR_REPLACEMENTS = {
+    '&': 'and',
+    '+': 'plus',
+    '@': 'at',
+    '#': 'hash',
+    '%': 'percent',
+    '=': 'equals',
+    '<': 'lt',
+    '>': 'gt',
+    '|': 'or',
+    '\\': 'backslash',
+    '/': 'slash',
+    '?': 'question',
+    '!': 'exclamation',
+    '*': 'star',
+    '"': 'quote',
+    "'": 'quote',
+    '(': '',
+    ')': '',
+    '[': '',
+    ']': '',
+    '{': '',
+    '}': '',
+    '：': 'colon',
+    '；': 'semicolon',
+    '，': 'comma',
+    '。': 'period',
+    '！': 'exclamation',
+    '？': 'question',
+    '（': '',
+    '）': '',
+    '【': '',
+    '】': '',
+}
+_SPECIAL_CHAR_TABLE = str.maketrans({
+    char: f'-{replacement}-' if replacement else '-'
+    for char, replacement in _SPECIAL_CHAR_REPLACEMENTS.items()
+})
+
+
+@lru_cache(maxsize=2048)
+def _nfkd_strip(text):
+    """Unicode标准化并移除重音符号（已是NFKD形式时跳过标准化）"""
+    if not unicodedata.is_normalized('NFKD', text):
+        text = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=4096)
+def _pinyin_for(chinese):
+    """连续中文片段转拼音（结果确定，常见标题词可直接命中缓存）"""
+    return '-'.join(lazy_pinyin(chinese, style=Style.NORMAL))
+
+
 class SlugGenerator:
     """URL Slug 生成器"""
     
+    # 常用词汇映射表（类级只读表，所有实例共用）
+    common_mappings = MappingProxyType({
+        # 技术术语
+        'javascript': 'js',
+        'typescript': 'ts', 
+        'python': 'py',
+        'artificial-intelligence': 'ai',
+        'machine-learning': 'ml',
+        'deep-learning': 'dl',
+        'application-programming-interface': 'api',
+        'user-interface': 'ui',
+        'user-experience': 'ux',
+        'database': 'db',
+        'development': 'dev',
+        'production': 'prod',
+        
+        # 中文常用词
+        '人工智能': 'ai',
+        '机器学习': 'ml', 
+        '深度学习': 'dl',
+        '数据库': 'database',
+        '应用程序': 'app',
+        '编程接口': 'api',
+        '用户界面': 'ui',
+        '用户体验': 'ux',
+        '开发': 'dev',
+        '生产': 'prod',
+        '测试': 'test',
+        '项目': 'project',
+        '系统': 'system',
+        '网站': 'website',
+        '博客': 'blog',
+        '文章': 'article',
+        '教程': 'tutorial',
+        '指南': 'guide',
+    })
+    
+    # 映射词汇合并为一个正则（长词优先），一次扫描完成全部替换
+    _mapping_re = re.compile('|'.join(
+        re.escape(original)
+        for original in sorted(common_mappings, key=len, reverse=True)
+    ))
+    
+    # 停用词列表（URL中应避免的词）
+    stop_words = frozenset({
+        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were',
+        '的', '了', '是', '在', '我', '有', '和', '就', '不', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着'
+    })
+    
+    # 扩展停用词列表（紧凑版slug使用，更激进的词汇移除）
+    _EXTENDED_STOP_WORDS = stop_words | frozenset({
+        'how', 'what', 'when', 'where', 'why', 'which', 'who',
+        '如何', '什么', '怎么', '哪里', '为什么', '哪个', '谁',
+        'tutorial', 'guide', 'introduction', 'basic', 'advanced',
+        '教程', '指南', '介绍', '基础', '高级', '入门'
+    })
+    
     def __init__(self):
-        # 常用词汇映射表
-        self.common_mappings = {
-            # 技术术语
-            'javascript': 'js',
-            'typescript': 'ts', 
-            'python': 'py',
-            'artificial-intelligence': 'ai',
-            'machine-learning': 'ml',
-            'deep-learning': 'dl',
-            'application-programming-interface': 'api',
-            'user-interface': 'ui',
-            'user-experience': 'ux',
-            'database': 'db',
-            'development': 'dev',
-            'production': 'prod',
-            
-            # 中文常用词
-            '人工智能': 'ai',
-            '机器学习': 'ml', 
-            '深度学习': 'dl',
-            '数据库': 'database',
-            '应用程序': 'app',
-            '编程接口': 'api',
-            '用户界面': 'ui',
-            '用户体验': 'ux',
-            '开发': 'dev',
-            '生产': 'prod',
-            '测试': 'test',
-            '项目': 'project',
-            '系统': 'system',
-            '网站': 'website',
-            '博客': 'blog',
-            '文章': 'article',
-            '教程': 'tutorial',
-            '指南': 'guide',
-        }
-        
-        # 停用词列表（URL中应避免的词）
-        self.stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were',
-            '的', '了', '是', '在', '我', '有', '和', '就', '不', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着'
-        }
+        # slug主体按实例缓存：缓存随实例一起释放，不会像方法上的类级 lru_cache 那样让所有实例常驻内存
+        self._base_slug = lru_cache(maxsize=8192)(self._build_base_slug)
     
-    def generate_slug(self, title, max_length=60, use_pinyin=True, include_date=False):
+    def generate_slug(self, title, max_length=60, use_pinyin=True, include_date=False, _stop_words=None):
         """
         生成URL友好的slug
         
@@ -64,6 +149,7 @@ class SlugGenerator:
             max_length: 最大长度限制
             use_pinyin: 是否将中文转换为拼音
             include_date: 是否包含日期
+            _stop_words: 内部使用，覆盖默认停用词集合
         
         Returns:
             生成的slug字符串
@@ -71,27 +157,8 @@ class SlugGenerator:
         if not title:
             return self._generate_fallback_slug()
         
-        # 1. 基础清理
-        slug = title.lower().strip()
-        
-        # 2. 应用常用词映射
-        slug = self._apply_mappings(slug)
-        
-        # 3. 中文处理
-        if use_pinyin:
-            slug = self._chinese_to_pinyin(slug)
-        
-        # 4. 英文和特殊字符处理
-        slug = self._clean_english_text(slug)
-        
-        # 5. 移除停用词
-        slug = self._remove_stop_words(slug)
-        
-        # 6. 规范化处理
-        slug = self._normalize_slug(slug)
-        
-        # 7. 长度限制
-        slug = self._truncate_slug(slug, max_length)
+        # 1-7. 与时间无关的转换步骤（结果可缓存）
+        slug = self._base_slug(title, max_length, use_pinyin, _stop_words)
         
         # 8. 添加日期前缀（可选）
         if include_date:
@@ -103,93 +170,68 @@ class SlugGenerator:
         
         return slug
     
-    def _apply_mappings(self, text):
-        """应用常用词汇映射"""
-        for original, mapped in self.common_mappings.items():
-            text = text.replace(original, mapped)
-        return text
-    
-    def _chinese_to_pinyin(self, text):
-        """中文转拼音"""
-        # 提取中文字符
-        chinese_pattern = r'[\u4e00-\u9fff]+'
-        chinese_matches = re.findall(chinese_pattern, text)
+    def _build_base_slug(self, title, max_length, use_pinyin, stop_words):
+        """
+        生成slug主体（不含日期前缀和后备处理）
         
-        for match in chinese_matches:
-            # 转换为拼音
-            pinyin_list = lazy_pinyin(match, style=Style.NORMAL)
-            pinyin_text = '-'.join(pinyin_list)
-            text = text.replace(match, pinyin_text)
+        结果只取决于参数，缓存后重复生成同一标题（后台列表、站点地图）只需一次查表；
+        后备slug含时间戳，放在缓存之外生成
+        """
+        # 1. 基础清理
+        slug = title.lower().strip()
         
-        return text
-    
-    def _clean_english_text(self, text):
-        """清理英文文本和特殊字符"""
-        # Unicode标准化
-        text = unicodedata.normalize('NFKD', text)
+        # 2. 应用常用词映射
+        slug = self._apply_mappings(slug)
         
-        # 移除重音符号
-        text = ''.join(c for c in text if not unicodedata.combining(c))
-        
-        # 替换特殊字符
-        replacements = {
-            '&': 'and',
-            '+': 'plus',
-            '@': 'at',
-            '#': 'hash',
-            '%': 'percent',
-            '=': 'equals',
-            '<': 'lt',
-            '>': 'gt',
-            '|': 'or',
-            '\\': 'backslash',
-            '/': 'slash',
-            '?': 'question',
-            '!': 'exclamation',
-            '*': 'star',
-            '"': 'quote',
-            "'": 'quote',
-            '(': '',
-            ')': '',
-            '[': '',
-            ']': '',
-            '{': '',
-            '}': '',
-            '：': 'colon',
-            '；': 'semicolon',
-            '，': 'comma',
-            '。': 'period',
-            '！': 'exclamation',
-            '？': 'question',
-            '（': '',
-            '）': '',
-            '【': '',
-            '】': '',
-        }
+        # 3. 中文处理（纯ASCII标题不含中文，直接跳过）
+        if use_pinyin and not slug.isascii():
+            slug = self._chinese_to_pinyin(slug)
         
-        for char, replacement in replacements.items():
-            text = text.replace(char, f'-{replacement}-' if replacement else '-')
+        # 4-6. 特殊字符处理、移除停用词、规范化
+        slug = self._fused_clean(slug, stop_words)
         
-        return text
+        # 7. 长度限制
+        return self._truncate_slug(slug, max_length)
     
-    def _remove_stop_words(self, text):
-        """移除停用词"""
-        words = text.split('-')
-        filtered_words = [word for word in words if word and word not in self.stop_words and len(word) > 1]
-        return '-'.join(filtered_words)
+    def _apply_mappings(self, text):
+        """应用常用词汇映射"""
+        return self._mapping_re.sub(lambda match: self.common_mappings[match.group()], text)
     
-    def _normalize_slug(self, slug):
-        """规范化slug"""
-        # 只保留字母、数字和连字符
-        slug = re.sub(r'[^a-zA-Z0-9\-]', '-', slug)
-        
-        # 将多个连续的连字符替换为单个
-        slug = re.sub(r'-+', '-', slug)
+    def _chinese_to_pinyin(self, text):
+        """中文转拼音"""
+        # 逐段替换连续中文字符，单次扫描完成
+        return _CHINESE_RE.sub(lambda match: _pinyin_for(match.group()), text)
+    
+    def _fused_clean(self, text, stop_words=None):
+        """
+        清理特殊字符、移除停用词并规范化（合并为一次遍历）
         
-        # 移除开头和结尾的连字符
-        slug = slug.strip('-')
+        按连字符切分后逐词处理：停用词和单字符词直接跳过，纯字母数字的词
+        原样保留，其余词只取其中的字母数字片段，最后统一用连字符连接
+        """
+        if stop_words is None:
+            stop_words = self.stop_words
+        
+        # Unicode标准化并移除重音符号（纯ASCII文本无需处理）
+        if not text.isascii():
+            text = _nfkd_strip(text)
+        
+        # 替换特殊字符（一次 translate 完成全部替换）后按连字符切分
+        words = []
+        for word in text.translate(_SPECIAL_CHAR_TABLE).split('-'):
+            if len(word) < 2 or word in stop_words:
+                continue
+            if not word.isascii():
+                # 其余字符均视为分隔符
+                words.extend(_SLUG_WORD_RE.findall(word))
+            elif word.isalnum():
+                words.append(word)
+            else:
+                # 纯ASCII词在字节层面一次 translate 替换分隔符
+                pieces = word.encode('ascii').translate(_SLUG_BYTE_TABLE).decode('ascii').split('-')
+                words.extend(piece for piece in pieces if piece)
         
-        return slug
+        return '-'.join(words)
     
     def _truncate_slug(self, slug, max_length):
         """截断slug到指定长度"""
@@ -229,23 +271,33 @@ class SlugGenerator:
         """批量生成slug"""
         slugs = {}
         used_slugs = set()
+        slug_counters = {}
         
         for title in titles:
             base_slug = self.generate_slug(title, **kwargs)
-            unique_slug = self._ensure_unique_slug(base_slug, used_slugs)
+            unique_slug = self._ensure_unique_slug(base_slug, used_slugs, slug_counters)
             slugs[title] = unique_slug
             used_slugs.add(unique_slug)
         
         return slugs
     
-    def _ensure_unique_slug(self, slug, used_slugs):
-        """确保slug唯一性"""
+    def _ensure_unique_slug(self, slug, used_slugs, counters=None):
+        """
+        确保slug唯一性
+        
+        counters 记录每个基础slug已用到的编号，批量处理同名标题时
+        从上次的编号继续，而不是每次都从1开始探测
+        """
         if slug not in used_slugs:
             return slug
         
-        counter = 1
+        if counters is None:
+            counters = {}
+        
+        counter = counters.get(slug, 0) + 1
         while f"{slug}-{counter}" in used_slugs:
             counter += 1
+        counters[slug] = counter
         
         return f"{slug}-{counter}"
     
@@ -280,24 +332,8 @@ class SlugGenerator:
     
     def _generate_compact_slug(self, title):
         """生成紧凑版slug（更激进的词汇移除）"""
-        # 扩展停用词列表
-        extended_stop_words = self.stop_words.union({
-            'how', 'what', 'when', 'where', 'why', 'which', 'who',
-            '如何', '什么', '怎么', '哪里', '为什么', '哪个', '谁',
-            'tutorial', 'guide', 'introduction', 'basic', 'advanced',
-            '教程', '指南', '介绍', '基础', '高级', '入门'
-        })
-        
-        # 暂时替换停用词列表
-        original_stop_words = self.stop_words
-        self.stop_words = extended_stop_words
-        
-        compact_slug = self.generate_slug(title, max_length=40)
-        
-        # 恢复原始停用词列表
-        self.stop_words = original_stop_words
-        
-        return compact_slug
+        # 通过参数传入扩展停用词，不修改实例状态（多线程共用实例时安全）
+        return self.generate_slug(title, max_length=40, _stop_words=self._EXTENDED_STOP_WORDS)
     
     def analyze_slug_seo(self, slug):
         """分析slug的SEO质量"""
@@ -308,6 +344,9 @@ class SlugGenerator:
             'recommendations': []
         }
         
+        # 按连字符切分一次，连字符数与单词分析共用
+        words = slug.split('-')
+        
         # 长度分析
         length = len(slug)
         if 3 <= length <= 60:
@@ -320,13 +359,13 @@ class SlugGenerator:
             analysis['score'] += 10
         
         # 字符分析
-        if re.match(r'^[a-z0-9-]+$', slug):
+        if _VALID_SLUG_RE.match(slug):
             analysis['score'] += 20
         else:
             analysis['issues'].append('URL包含不推荐的字符，建议只使用小写字母、数字和连字符')
         
         # 连字符分析
-        dash_count = slug.count('-')
+        dash_count = len(words) - 1
         if dash_count <= 5:
             analysis['score'] += 20
         else:
@@ -334,7 +373,6 @@ class SlugGenerator:
             analysis['score'] += 10
         
         # 可读性分析
-        words = slug.split('-')
         if len(words) >= 2:
             analysis['score'] += 20
             if all(len(word) >= 3 for word in words):
@@ -367,4 +405,13 @@ class SlugGenerator:
         else:
             analysis['grade'] = 'D'
         
-        return analysis
\ No newline at end of file
+        return analysis
+
+
+# 全局slug生成器实例
+slug_generator = SlugGenerator()
+
+
+def generate_slug(title, **kwargs):
+    """使用全局生成器生成slug"""
+    return slug_generator.generate_slug(title, **kwargs)
@@ -2,7 +2,96 @@
 🎨 模板过滤器工具
 📊 data-scientist 设计的模板增强工具集
 """
-from flask import current_app
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from flask import current_app, g, has_app_context
+
+
+# 预编译的正则表达式
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+# HTML转义表（与 html.escape 一致，一次 translate 完成）
+_HTML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;',
+})
+
+_UTC = timezone.utc
+
+# GitHub官方语言颜色映射
+_LANGUAGE_COLORS = {
+    'Python': '#3776ab',
+    'JavaScript': '#f1e05a',
+    'TypeScript': '#2b7489',
+    'Java': '#b07219',
+    'Go': '#00add8',
+    'Rust': '#dea584',
+    'C++': '#f34b7d',
+    'C': '#555555',
+    'CSS': '#563d7c',
+    'HTML': '#e34c26',
+    'Shell': '#89e051',
+    'Vue': '#2c3e50',
+    'React': '#61dafb',
+    'PHP': '#4f5d95',
+    'Ruby': '#701516',
+    'Swift': '#ffac45',
+    'Kotlin': '#f18e33',
+    'Scala': '#c22d40',
+    'R': '#198ce7',
+    'Dart': '#00b4ab',
+    'Elixir': '#6e4a7e',
+    'Haskell': '#5e5086',
+    'Lua': '#000080',
+    'Perl': '#0298c3',
+    'PowerShell': '#012456',
+    'Objective-C': '#438eff',
+    'C#': '#239120',
+    'F#': '#b845fc',
+    'Clojure': '#db5855',
+    'CoffeeScript': '#244776',
+    'Erlang': '#b83998',
+    'OCaml': '#3be133',
+    'Scheme': '#1e4aec',
+    'Assembly': '#6e4c13',
+    'Makefile': '#427819',
+    'Dockerfile': '#384d54',
+    'YAML': '#cb171e',
+    'JSON': '#292929',
+    'XML': '#0060ac',
+    'Markdown': '#083fa1',
+    'LaTeX': '#3d6117',
+}
+_DEFAULT_LANGUAGE_COLOR = '#6c757d'
+
+# 文件大小单位（每级1024倍）
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+# GitHub状态徽章的固定HTML前缀
+_STAR_BADGE_PREFIX = '<span class="badge bg-warning text-dark me-1"><i class="fas fa-star"></i> '
+_FORK_BADGE_PREFIX = '<span class="badge bg-info text-white me-1"><i class="fas fa-code-branch"></i> '
+_LICENSE_BADGE_PREFIX = '<span class="badge bg-secondary text-white me-1"><i class="fas fa-balance-scale"></i> '
+
+
+@lru_cache(maxsize=256)
+def _highlight_pattern(query: str):
+    """编译搜索关键词的高亮正则（同一结果页的多条摘要共用）"""
+    return re.compile(re.escape(query), re.IGNORECASE)
+
+
+def _utc_now() -> datetime:
+    """当前UTC时间，同一请求内只取一次（列表页每张卡片共用）"""
+    if not has_app_context():
+        return datetime.now(_UTC)
+    
+    now = g.get('_time_ago_now')
+    if now is None:
+        now = g._time_ago_now = datetime.now(_UTC)
+    return now
 
 
 def get_language_color(language_name: str) -> str:
@@ -15,53 +104,8 @@ def get_language_color(language_name: str) -> str:
     Returns:
         颜色的十六进制代码
     """
-    # GitHub官方语言颜色映射
-    language_colors = {
-        'Python': '#3776ab',
-        'JavaScript': '#f1e05a', 
-        'TypeScript': '#2b7489',
-        'Java': '#b07219',
-        'Go': '#00add8',
-        'Rust': '#dea584',
-        'C++': '#f34b7d',
-        'C': '#555555',
-        'CSS': '#563d7c',
-        'HTML': '#e34c26',
-        'Shell': '#89e051',
-        'Vue': '#2c3e50',
-        'React': '#61dafb',
-        'PHP': '#4f5d95',
-        'Ruby': '#701516',
-        'Swift': '#ffac45',
-        'Kotlin': '#f18e33',
-        'Scala': '#c22d40',
-        'R': '#198ce7',
-        'Dart': '#00b4ab',
-        'Elixir': '#6e4a7e',
-        'Haskell': '#5e5086',
-        'Lua': '#000080',
-        'Perl': '#0298c3',
-        'PowerShell': '#012456',
-        'Objective-C': '#438eff',
-        'C#': '#239120',
-        'F#': '#b845fc',
-        'Clojure': '#db5855',
-        'CoffeeScript': '#244776',
-        'Erlang': '#b83998',
-        'OCaml': '#3be133',
-        'Scheme': '#1e4aec',
-        'Assembly': '#6e4c13',
-        'Makefile': '#427819',
-        'Dockerfile': '#384d54',
-        'YAML': '#cb171e',
-        'JSON': '#292929',
-        'XML': '#0060ac',
-        'Markdown': '#083fa1',
-        'LaTeX': '#3d6117',
-    }
-    
     # 返回对应颜色，如果没找到则返回默认灰色
-    return language_colors.get(language_name, '#6c757d')
+    return _LANGUAGE_COLORS.get(language_name, _DEFAULT_LANGUAGE_COLOR)
 
 
 def format_number(number: int, threshold: int = 1000) -> str:
@@ -78,12 +122,13 @@ def format_number(number: int, threshold: int = 1000) -> str:
     if not isinstance(number, (int, float)):
         return str(number)
     
+    # 常见情况（星数、派生数较小）直接返回，不做任何除法
+    if number < threshold and number < 1000000:
+        return str(int(number))
+    
     if number >= 1000000:
         return f"{number / 1000000:.1f}M"
-    elif number >= threshold:
-        return f"{number / 1000:.1f}K"
-    else:
-        return str(int(number))
+    return f"{number / 1000:.1f}K"
 
 
 def format_file_size(size_bytes: int) -> str:
@@ -99,13 +144,13 @@ def format_file_size(size_bytes: int) -> str:
     if size_bytes == 0:
         return "0 B"
     
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
+    # 由二进制位数直接确定单位（每10位一级），无需逐级相除
+    if size_bytes < 1024:
+        i = 0
+    else:
+        i = min((int(size_bytes).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
     
-    return f"{size_bytes:.1f} {size_names[i]}"
+    return f"{size_bytes / (1 << (i * 10)):.1f} {_SIZE_UNITS[i]}"
 
 
 def truncate_commit_message(message: str, max_length: int = 50) -> str:
@@ -145,20 +190,18 @@ def time_ago(date_string: str) -> str:
         return ""
     
     try:
-        from datetime import datetime, timezone
-        import re
-        
-        # 处理不同的日期格式
-        if date_string.endswith('Z'):
-            dt = datetime.fromisoformat(date_string.replace('Z', '+00:00'))
-        elif '+' in date_string[-6:] or '-' in date_string[-6:]:
-            dt = datetime.fromisoformat(date_string)
+        # 处理不同的日期格式（GitHub API 常见的 'Z' 结尾直接截掉后标记为UTC）
+        if date_string[-1] == 'Z':
+            dt = datetime.fromisoformat(date_string[:-1]).replace(tzinfo=_UTC)
         else:
-            # 假设是UTC时间
-            dt = datetime.fromisoformat(date_string).replace(tzinfo=timezone.utc)
+            tail = date_string[-6:]
+            if '+' in tail or '-' in tail:
+                dt = datetime.fromisoformat(date_string)
+            else:
+                # 假设是UTC时间
+                dt = datetime.fromisoformat(date_string).replace(tzinfo=_UTC)
         
-        now = datetime.now(timezone.utc)
-        diff = now - dt
+        diff = _utc_now() - dt
         
         days = diff.days
         seconds = diff.seconds
@@ -197,28 +240,30 @@ def github_status_badge(status: dict) -> str:
     if not status or not status.get('available'):
         return ""
     
+    stars = status.get('stars', 0)
+    forks = status.get('forks', 0)
+    language = status.get('language')
+    license_name = status.get('license')
+    
     badges = []
     
     # 星数徽章
-    if status.get('stars', 0) > 0:
-        badges.append(f'<span class="badge bg-warning text-dark me-1">'
-                     f'<i class="fas fa-star"></i> {format_number(status["stars"])}</span>')
+    if stars > 0:
+        badges.append(f'{_STAR_BADGE_PREFIX}{format_number(stars)}</span>')
     
     # 派生数徽章
-    if status.get('forks', 0) > 0:
-        badges.append(f'<span class="badge bg-info text-white me-1">'
-                     f'<i class="fas fa-code-branch"></i> {format_number(status["forks"])}</span>')
+    if forks > 0:
+        badges.append(f'{_FORK_BADGE_PREFIX}{format_number(forks)}</span>')
     
     # 主要语言徽章
-    if status.get('language'):
-        color = get_language_color(status['language'])
+    if language:
+        color = get_language_color(language)
         badges.append(f'<span class="badge me-1" style="background-color: {color}; color: white;">'
-                     f'{status["language"]}</span>')
+                     f'{language}</span>')
     
     # 许可证徽章
-    if status.get('license'):
-        badges.append(f'<span class="badge bg-secondary text-white me-1">'
-                     f'<i class="fas fa-balance-scale"></i> {status["license"]}</span>')
+    if license_name:
+        badges.append(f'{_LICENSE_BADGE_PREFIX}{license_name}</span>')
     
     return ' '.join(badges)
 
@@ -237,24 +282,20 @@ def highlight_search(text: str, search_query: str) -> str:
     if not text or not search_query:
         return text
     
+    # 如果文本已经是HTML，先处理掉标签（大多数摘要不含标签，跳过正则）
+    clean_text = str(text)
+    if '<' in clean_text:
+        clean_text = _HTML_TAG_RE.sub('', clean_text)
     # 转义HTML特殊字符
-    import html
-    import re
-    
-    # 如果文本已经是HTML，先处理掉标签
-    clean_text = re.sub(r'<[^>]+>', '', str(text))
-    escaped_text = html.escape(clean_text)
-    
-    # 转义搜索查询中的特殊正则字符
-    escaped_query = re.escape(search_query.strip())
+    escaped_text = clean_text.translate(_HTML_ESCAPE_TABLE)
     
-    if not escaped_query:
+    query = search_query.strip()
+    if not query:
         return escaped_text
     
     # 使用正则表达式进行不区分大小写的搜索和替换
-    pattern = re.compile(escaped_query, re.IGNORECASE)
-    highlighted = pattern.sub(
-        lambda m: f'<mark class="bg-warning text-dark">{m.group()}</mark>',
+    highlighted = _highlight_pattern(query).sub(
+        r'<mark class="bg-warning text-dark">\g<0></mark>',
         escaped_text
     )
     
@@ -20,6 +20,9 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_RECORD_QUERIES = True
     
+    # SQLite 快速连接参数（WAL + synchronous=NORMAL），断电时可能丢失最近的提交，仅开发/测试启用
+    SQLITE_FAST_PRAGMAS = False
+    
     # 📧 邮件配置
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
@@ -35,6 +38,10 @@ class Config:
     UPLOAD_FOLDER = os.path.join(basedir, 'app', 'static', 'uploads')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'pdf', 'zip'}
     
+    # 🐙 GitHub配置 (GITHUB_TOKENS 为逗号分隔的多个令牌，轮询使用以扩大速率配额)
+    GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
+    GITHUB_TOKENS = os.environ.get('GITHUB_TOKENS')
+    
     # 🔍 SEO配置
     SITE_NAME = "王某某的多元世界"
     SITE_DESCRIPTION = "全栈工程师 + 手工艺人，技术与创意的结合者"
@@ -42,13 +49,18 @@ class Config:
     SITE_AUTHOR = "王某某"
     
     # ⚡ 性能配置
-    CACHE_TYPE = "SimpleCache"
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or "SimpleCache"  # 多进程部署可设为 RedisCache
+    CACHE_REDIS_URL = os.environ.get('REDIS_URL')
     CACHE_DEFAULT_TIMEOUT = 300
     
     @staticmethod
     def init_app(app):
         """应用初始化回调"""
-        pass
+        # PostgreSQL (psycopg2) 批量写入：executemany 改写为多行 VALUES 语句，减少往返
+        driver = app.config['SQLALCHEMY_DATABASE_URI'].split('://', 1)[0]
+        if driver in ('postgresql', 'postgresql+psycopg2'):
+            engine_options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+            engine_options.setdefault('executemany_mode', 'values_plus_batch')
 
 
 class DevelopmentConfig(Config):
@@ -56,6 +68,7 @@ class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'instance', 'dev_portal.db')
+    SQLITE_FAST_PRAGMAS = True
     
     # 开发环境邮件配置 (控制台输出)
     MAIL_SUPPRESS_SEND = True
@@ -137,6 +150,7 @@ class TestingConfig(Config):
     """🧪 测试环境配置"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLITE_FAST_PRAGMAS = True
     WTF_CSRF_ENABLED = False
     MAIL_SUPPRESS_SEND = True
 
@@ -7,6 +7,7 @@
 import os
 import sys
 from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
 from app import create_app, db
 from app.models import Content, Project, ProjectInquiry, Tag
 from app.models.customer import Customer, CustomerInteraction, BusinessOpportunity
@@ -14,6 +15,7 @@ from app.models.customer import Customer, CustomerInteraction, BusinessOpportuni
 def create_demo_data():
     """创建演示数据"""
     print("🚀 开始创建演示数据...")
+    now = datetime.utcnow()
     
     # 1. 创建技术文章内容
     articles = [
@@ -184,25 +186,6 @@ CDN + SSR的结合，提升用户体验。
         }
     ]
     
-    print("📝 创建文章内容...")
-    for article_data in articles:
-        article = Content(
-            title=article_data['title'],
-            content=article_data['content'],
-            category=article_data['category'],
-            is_featured=article_data['is_featured'],
-            summary=article_data['summary'],
-            reading_time=article_data['reading_time'],
-            is_published=article_data['published'],
-            created_at=datetime.utcnow() - timedelta(days=len(articles) - articles.index(article_data))
-        )
-        db.session.add(article)
-        
-        # 处理标签 - 在文章保存后添加
-        if 'tags' in article_data:
-            tag_names = [tag.strip() for tag in article_data['tags'].split(',')]
-            article.update_tags(tag_names)
-    
     # 2. 创建项目作品
     projects = [
         {
@@ -226,7 +209,7 @@ CDN + SSR的结合，提升用户体验。
 - 部署：Docker + Nginx
 
 这个项目展示了现代Web开发的最佳实践。''',
-            'tech_stack': 'Flask,Python,SQLAlchemy,Bootstrap,JavaScript,HTML5,CSS3',
+            'tech_stack': ['Flask', 'Python', 'SQLAlchemy', 'Bootstrap', 'JavaScript', 'HTML5', 'CSS3'],
             'status': '已完成',
             'demo_url': 'https://demo.example.com',
             'github_url': 'https://github.com/user/personal-portal',
@@ -254,7 +237,7 @@ CDN + SSR的结合，提升用户体验。
 - A/B测试框架
 
 该系统显著提升了用户参与度和内容消费量。''',
-            'tech_stack': 'Python,TensorFlow,Pandas,Redis,FastAPI,PostgreSQL',
+            'tech_stack': ['Python', 'TensorFlow', 'Pandas', 'Redis', 'FastAPI', 'PostgreSQL'],
             'status': '开发中',
             'demo_url': None,
             'github_url': 'https://github.com/user/ai-recommender',
@@ -284,7 +267,7 @@ CDN + SSR的结合，提升用户体验。
 - 物流服务
 
 这个项目体现了企业级应用的复杂性和扩展性。''',
-            'tech_stack': 'Java,Spring Cloud,Docker,Kubernetes,Redis,MySQL,RabbitMQ',
+            'tech_stack': ['Java', 'Spring Cloud', 'Docker', 'Kubernetes', 'Redis', 'MySQL', 'RabbitMQ'],
             'status': '规划中',
             'demo_url': None,
             'github_url': None,
@@ -294,23 +277,6 @@ CDN + SSR的结合，提升用户体验。
         }
     ]
     
-    print("💼 创建项目数据...")
-    for project_data in projects:
-        project = Project(
-            name=project_data['title'],
-            summary=project_data.get('subtitle', ''),
-            description=project_data['description'],
-            tech_stack=project_data['tech_stack'].split(',') if isinstance(project_data['tech_stack'], str) else project_data['tech_stack'],
-            project_status=project_data['status'],
-            demo_url=project_data['demo_url'],
-            github_url=project_data['github_url'],
-            start_date=project_data['start_date'],
-            completion_date=project_data['completion_date'],
-            is_featured=project_data['is_featured'],
-            created_at=datetime.utcnow() - timedelta(days=len(projects) - projects.index(project_data))
-        )
-        db.session.add(project)
-    
     # 3. 创建示例咨询
     inquiries = [
         {
@@ -376,25 +342,6 @@ CDN + SSR的结合，提升用户体验。
         }
     ]
     
-    print("📨 创建咨询数据...")
-    for inquiry_data in inquiries:
-        inquiry = ProjectInquiry(
-            client_name=inquiry_data['name'],
-            client_email=inquiry_data['email'],
-            client_phone=inquiry_data['phone'],
-            client_company=inquiry_data['company'],
-            client_title=inquiry_data['position'],
-            project_type=inquiry_data['inquiry_type'],
-            title=inquiry_data['subject'],
-            description=inquiry_data['description'],
-            budget_range=inquiry_data['budget_range'],
-            timeline=inquiry_data['timeline'],
-            status=inquiry_data['status'],
-            priority=inquiry_data['priority'],
-            created_at=datetime.utcnow() - timedelta(days=len(inquiries) - inquiries.index(inquiry_data))
-        )
-        db.session.add(inquiry)
-    
     # 4. 创建CRM客户数据
     customers = [
         {
@@ -421,46 +368,107 @@ CDN + SSR的结合，提升用户体验。
         }
     ]
     
-    print("🏢 创建CRM客户数据...")
-    for customer_data in customers:
-        customer = Customer(
-            name=customer_data['name'],
-            email=customer_data['email'],
-            phone=customer_data['phone'],
-            company_size=customer_data['company_size'],
-            industry=customer_data['industry'],
-            lead_score=customer_data['lead_score'],
-            customer_type=customer_data['status'],
-            lead_source=customer_data['source'],
-            notes=customer_data['notes'],
-            created_at=datetime.utcnow() - timedelta(days=len(customers) - customers.index(customer_data))
-        )
-        db.session.add(customer)
-    
-    # 提交所有数据
+    # 所有写入放在同一个事务中，任何一步失败都整体回滚
     try:
-        db.session.commit()
-        print("✅ 演示数据创建成功！")
+        with db.session.begin():
+            # 文章需要经过ORM：插入事件会生成小写副本、提取关键词并建立搜索索引
+            print("📝 创建文章内容...")
+            tags_by_name = {}  # 各篇文章共用，同名标签只查询/创建一次
+            
+            # 标签都经 tags_by_name 解析，循环中的查询无需先 flush 待写入的文章
+            with db.session.no_autoflush:
+                for i, article_data in enumerate(articles):
+                    article = Content(
+                        title=article_data['title'],
+                        content=article_data['content'],
+                        category=article_data['category'],
+                        is_featured=article_data['is_featured'],
+                        summary=article_data['summary'],
+                        reading_time=article_data['reading_time'],
+                        is_published=article_data['published'],
+                        created_at=now - timedelta(days=len(articles) - i)
+                    )
+                    db.session.add(article)
         
-        # 统计信息
-        content_count = Content.query.count()
-        project_count = Project.query.count() 
-        inquiry_count = ProjectInquiry.query.count()
-        customer_count = Customer.query.count()
-        
-        print(f"""
+                    # 处理标签 - 在文章保存后添加
+                    if 'tags' in article_data:
+                        tag_names = [tag.strip() for tag in article_data['tags'].split(',')]
+                        article.update_tags(tag_names, tags_by_name)
+            
+            # 项目没有构造逻辑和插入事件，一条批量INSERT写入全部行
+            print("💼 创建项目数据...")
+            db.session.execute(insert(Project), [
+                {
+                    'name': project_data['title'],
+                    'summary': project_data.get('subtitle', ''),
+                    'description': project_data['description'],
+                    'tech_stack': project_data['tech_stack'],
+                    'project_status': project_data['status'],
+                    'demo_url': project_data['demo_url'],
+                    'github_url': project_data['github_url'],
+                    'start_date': project_data['start_date'],
+                    'completion_date': project_data['completion_date'],
+                    'is_featured': project_data['is_featured'],
+                    'created_at': now - timedelta(days=len(projects) - i)
+                }
+                for i, project_data in enumerate(projects)
+            ])
+            
+            # 咨询和客户需经过构造函数生成编号（依次查询已有编号），保持逐个创建
+            print("📨 创建咨询数据...")
+            for i, inquiry_data in enumerate(inquiries):
+                inquiry = ProjectInquiry(
+                    client_name=inquiry_data['name'],
+                    client_email=inquiry_data['email'],
+                    client_phone=inquiry_data['phone'],
+                    client_company=inquiry_data['company'],
+                    client_title=inquiry_data['position'],
+                    project_type=inquiry_data['inquiry_type'],
+                    title=inquiry_data['subject'],
+                    description=inquiry_data['description'],
+                    budget_range=inquiry_data['budget_range'],
+                    timeline=inquiry_data['timeline'],
+                    status=inquiry_data['status'],
+                    priority=inquiry_data['priority'],
+                    created_at=now - timedelta(days=len(inquiries) - i)
+                )
+                db.session.add(inquiry)
+            
+            print("🏢 创建CRM客户数据...")
+            for i, customer_data in enumerate(customers):
+                customer = Customer(
+                    name=customer_data['name'],
+                    email=customer_data['email'],
+                    phone=customer_data['phone'],
+                    company_size=customer_data['company_size'],
+                    industry=customer_data['industry'],
+                    lead_score=customer_data['lead_score'],
+                    customer_type=customer_data['status'],
+                    lead_source=customer_data['source'],
+                    notes=customer_data['notes'],
+                    created_at=now - timedelta(days=len(customers) - i)
+                )
+                db.session.add(customer)
+    except Exception as e:
+        print(f"❌ 数据创建失败: {str(e)}")
+        return False
+    
+    print("✅ 演示数据创建成功！")
+    
+    # 统计信息（四个计数合并为一条查询）
+    content_count, project_count, inquiry_count, customer_count = db.session.execute(select(
+        *(select(func.count()).select_from(model).scalar_subquery()
+          for model in (Content, Project, ProjectInquiry, Customer))
+    )).one()
+    
+    print(f"""
 📊 数据统计:
   📝 技术文章: {content_count} 篇
   💼 项目作品: {project_count} 个
   📨 客户咨询: {inquiry_count} 条
   🏢 CRM客户: {customer_count} 个
         """)
-        
-    except Exception as e:
-        db.session.rollback()
-        print(f"❌ 数据创建失败: {str(e)}")
-        return False
-        
+    
     return True
 
 if __name__ == '__main__':
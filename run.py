@@ -19,6 +19,32 @@ def init_db():
     print("数据库表创建完成！")
 
 
+@app.cli.command()
+def rebuild_search_index():
+    """🔍 重建全文搜索索引命令"""
+    from app.utils.search_engine import search_indexer
+    
+    print("正在重建全文搜索索引...")
+    count = search_indexer.rebuild_index()
+    print(f"全文搜索索引重建完成，共索引 {count} 篇内容！")
+
+
+@app.cli.command()
+def upgrade_search_schema():
+    """🔧 为旧数据库补齐搜索所需的列和表，并回填搜索数据和索引"""
+    from app.utils.search_engine import search_indexer
+    
+    print("正在检查搜索相关的数据库结构...")
+    added = search_indexer.upgrade_schema()
+    if added:
+        print(f"已新增：{', '.join(added)}")
+    else:
+        print("数据库结构已是最新")
+    
+    count = search_indexer.rebuild_index()
+    print(f"搜索数据回填完成，共处理 {count} 篇内容！")
+
+
 @app.cli.command() 
 def create_admin():
     """👤 创建管理员用户命令"""
@@ -45,6 +71,7 @@ def create_admin():
 def seed_data():
     """🌱 填充示例数据"""
     from datetime import datetime
+    from sqlalchemy import insert
     
     print("正在创建示例数据...")
     
@@ -53,17 +80,19 @@ def seed_data():
     creative_tags = ['3D打印', '建模', '平面设计', '钩织', '手工艺']
     life_tags = ['钓鱼', '生活感悟', '旅行', '摄影', '思考']
     
-    for tag_name in tech_tags:
-        tag = Tag(name=tag_name, category='技术', color='#007bff')
-        db.session.add(tag)
-    
-    for tag_name in creative_tags:
-        tag = Tag(name=tag_name, category='创意', color='#28a745')
-        db.session.add(tag)
+    # 一条批量INSERT写入全部标签
+    tag_rows = (
+        [{'name': tag_name, 'category': '技术', 'color': '#007bff'} for tag_name in tech_tags]
+        + [{'name': tag_name, 'category': '创意', 'color': '#28a745'} for tag_name in creative_tags]
+        + [{'name': tag_name, 'category': '生活', 'color': '#ffc107'} for tag_name in life_tags]
+    )
+    db.session.execute(insert(Tag), tag_rows)
     
-    for tag_name in life_tags:
-        tag = Tag(name=tag_name, category='生活', color='#ffc107')
-        db.session.add(tag)
+    # 一次查询取回全部标签，供下面的内容关联使用
+    tags_by_name = {
+        tag.name: tag
+        for tag in Tag.query.filter(Tag.name.in_([row['name'] for row in tag_rows])).all()
+    }
     
     # 创建示例内容
     sample_contents = [
@@ -121,7 +150,7 @@ SQLAlchemy ORM的使用技巧...''',
         
         # 添加标签
         for tag_name in content_data['tags']:
-            tag = Tag.query.filter_by(name=tag_name).first()
+            tag = tags_by_name.get(tag_name)
             if tag:
                 content.tags.append(tag)
         
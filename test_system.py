@@ -2,37 +2,55 @@
 """
 🧪 Phase 3 系统验收测试脚本
 验证内容发布系统的核心功能完整性
+可直接运行，也可用 pytest -n auto test_system.py 多进程并行（每个进程各自使用内存数据库）
 """
 import os
 import sys
 import unittest
-from app import create_app, db
+from unittest import mock
+from app import create_app, db, cache
 from app.models import Content, Tag, Project
-from app.utils.search_engine import search_engine
-from app.utils.seo_analyzer import SEOAnalyzer
+from app.utils import search_engine as search_engine_module
+from app.utils.search_engine import search_engine, search_indexer
+from app.utils.seo_analyzer import SEOAnalyzer, _scan_markdown
 
 
 class Phase3SystemTest(unittest.TestCase):
     """Phase 3 系统功能测试"""
     
+    @classmethod
+    def setUpClass(cls):
+        """创建应用和测试数据库（整个测试类只执行一次）"""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        
+        # 创建测试数据库
+        db.create_all()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """删除测试数据库"""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+    
     def setUp(self):
         """测试前准备"""
-        self.app = create_app('testing')
-        self.app_context = self.app.app_context()
-        self.app_context.push()
         self.client = self.app.test_client()
         
-        # 创建测试数据库
-        db.create_all()
+        # 应用实例在测试间共用，清掉上一个测试留下的查询缓存
+        cache.clear()
         
         # 创建测试数据
         self.create_test_data()
     
     def tearDown(self):
-        """测试后清理"""
+        """测试后清理：清空各表数据，表结构留给下一个测试"""
         db.session.remove()
-        db.drop_all()
-        self.app_context.pop()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
     
     def create_test_data(self):
         """创建测试数据"""
@@ -41,8 +59,8 @@ class Phase3SystemTest(unittest.TestCase):
         tag2 = Tag(name='Flask', category='技术', color='#007bff')
         tag3 = Tag(name='AI', category='技术', color='#007bff')
         
+        # 标签与内容一起在最后的 commit 中写入，关联表由ORM按依赖顺序处理，无需提前 flush
         db.session.add_all([tag1, tag2, tag3])
-        db.session.flush()
         
         # 创建测试内容
         content1 = Content(
@@ -118,6 +136,51 @@ class Phase3SystemTest(unittest.TestCase):
             any('Python' in title for title in titles)
         )
     
+    def test_search_results_independent_of_sort(self):
+        """测试切换排序方式不改变搜索结果集合和总数"""
+        results_by_sort = {
+            sort_by: search_engine.full_text_search(query='Flask', sort_by=sort_by)
+            for sort_by in ('relevance', 'date', 'views', 'likes')
+        }
+        
+        expected_ids = {result['content'].id for result in results_by_sort['relevance']['results']}
+        self.assertIn(self.content1_id, expected_ids)
+        for sort_by, results in results_by_sort.items():
+            self.assertEqual(results['total'], results_by_sort['relevance']['total'], sort_by)
+            self.assertEqual({result['content'].id for result in results['results']}, expected_ids, sort_by)
+    
+    def test_search_index_follows_update_and_delete(self):
+        """测试编辑和删除内容后搜索索引同步更新"""
+        content = Content.query.get(self.content2_id)
+        content.title = '量子计算教程'
+        db.session.commit()
+        
+        # 旧标题中的词不再命中，新标题中的词可以搜到
+        old_ids = [result['content'].id for result in search_engine.full_text_search('入门')['results']]
+        new_ids = [result['content'].id for result in search_engine.full_text_search('量子')['results']]
+        self.assertNotIn(self.content2_id, old_ids)
+        self.assertIn(self.content2_id, new_ids)
+        
+        db.session.delete(content)
+        db.session.commit()
+        
+        results = search_engine.full_text_search('量子')
+        self.assertEqual(results['total'], 0)
+        self.assertEqual(results['results'], [])
+    
+    def test_term_index_fallback(self):
+        """测试数据库不支持FTS5时使用倒排索引评分"""
+        with mock.patch.object(search_engine_module, '_fts_exists', return_value=False), \
+                mock.patch.object(search_engine_module, '_ensure_fts', return_value=False):
+            self.assertEqual(search_indexer.rebuild_index(), 3)
+            
+            scores = search_engine._index_term_scores([self.content1_id, self.content2_id], ['flask'])
+            self.assertGreater(scores.get(self.content1_id, 0), 0)
+            self.assertNotIn(self.content2_id, scores)
+            
+            results = search_engine.full_text_search('Flask')
+            self.assertEqual(results['results'][0]['content'].id, self.content1_id)
+    
     def test_semantic_search(self):
         """测试语义搜索功能"""
         results = search_engine.semantic_search(
@@ -201,6 +264,16 @@ class Phase3SystemTest(unittest.TestCase):
         self.assertGreaterEqual(analysis['score'], 0)
         self.assertLessEqual(analysis['score'], analysis['max_score'])
     
+    def test_seo_markdown_structure_counts(self):
+        """测试Markdown结构计数规则（h1 沿用原规则，也计入 ## 行和行中的 "C# "）"""
+        structure = _scan_markdown('# 标题\n## 小节\n### 细节\n学习 C# 语言\n- 列表项\n[链接](/a)')
+        
+        self.assertEqual(structure['h1'], 4)
+        self.assertEqual(structure['h2'], 2)
+        self.assertEqual(structure['h3'], 1)
+        self.assertEqual(structure['lists'], 1)
+        self.assertEqual(structure['links'], 1)
+    
     def test_published_content_filter(self):
         """测试已发布内容过滤"""
         # 搜索应该只返回已发布的内容
@@ -224,12 +297,16 @@ def run_system_tests():
         'test_content_creation',
         'test_tag_association', 
         'test_search_functionality',
+        'test_search_results_independent_of_sort',
+        'test_search_index_follows_update_and_delete',
+        'test_term_index_fallback',
         'test_semantic_search',
         'test_related_content',
         'test_trending_content',
         'test_search_suggestions',
         'test_category_stats',
         'test_seo_analyzer',
+        'test_seo_markdown_structure_counts',
         'test_published_content_filter'
     ]
     
@@ -5,6 +5,7 @@
 """
 import sys
 import os
+from importlib.util import find_spec
 
 def check_import(module_name, description):
     """检查模块导入"""
@@ -13,7 +14,9 @@ def check_import(module_name, description):
             import jieba
             print(f"✅ {description}: jieba {jieba.__version__}")
         elif module_name == 'pypinyin':
-            import pypinyin
+            # 只需确认已安装，查找模块规格即可，不执行导入
+            if find_spec('pypinyin') is None:
+                raise ImportError("No module named 'pypinyin'")
             print(f"✅ {description}: pypinyin 已安装")
         elif module_name == 'flask':
             import flask
@@ -22,7 +25,8 @@ def check_import(module_name, description):
             import flask_sqlalchemy
             print(f"✅ {description}: Flask-SQLAlchemy {flask_sqlalchemy.__version__}")
         elif module_name == 'pillow':
-            from PIL import Image
+            if find_spec('PIL') is None:
+                raise ImportError("No module named 'PIL'")
             print(f"✅ {description}: Pillow 已安装")
         elif module_name == 'markdown':
             import markdown